@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from .models import (
-    Categoria, Perfil, Articulo, Comentario, MensajeContacto, AcercaDe
+    Categoria, Perfil, Articulo, Comentario, MensajeContacto, AcercaDe, CorreoPendiente
 )
 
 # Register your models here.
@@ -35,7 +35,7 @@ admin.site.register(User, UserAdmin)
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'descripcion']
+    list_display = ['nombre', 'descripcion', 'total_articulos', 'total_comentarios']
     search_fields = ['nombre']
 
 @admin.register(Perfil)
@@ -51,7 +51,7 @@ class PerfilAdmin(admin.ModelAdmin):
 
 @admin.register(Articulo)
 class ArticuloAdmin(admin.ModelAdmin):
-    list_display = ['titulo', 'autor', 'categoria', 'destacado', 'fecha_creacion']
+    list_display = ['titulo', 'autor', 'categoria', 'destacado', 'total_comentarios', 'fecha_creacion']
     list_filter = ['categoria', 'destacado', 'fecha_creacion']
     search_fields = ['titulo', 'contenido']
 
@@ -66,6 +66,13 @@ class MensajeContactoAdmin(admin.ModelAdmin):
     list_filter = ['gestionado']
     search_fields = ['nombre', 'email', 'mensaje']
 
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ['asunto', 'estado', 'intentos', 'proximo_intento', 'fecha_creacion', 'fecha_envio']
+    list_filter = ['estado']
+    search_fields = ['asunto', 'ultimo_error']
+    readonly_fields = ['intentos', 'ultimo_error', 'fecha_envio']
+
 @admin.register(AcercaDe)
 class AcercaDeAdmin(admin.ModelAdmin):
     list_display = ['fecha_actualizacion']
\ No newline at end of file
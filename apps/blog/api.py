@@ -0,0 +1,297 @@
+"""
+API JSON de solo lectura para artículos, categorías y comentarios.
+
+- ?fields=id,titulo,autor  elige los campos; cada campo sabe qué columnas
+  necesita, así que la consulta pide solo esas con .only() y hace JOIN
+  (select_related) solo si se pidió el autor o la categoría.
+- ?cursor=  paginación por cursor (ver paginacion.py); ?limite= hasta 100.
+- ETag a partir de las etiquetas de la caché de páginas: un cliente que ya
+  tiene la última versión recibe 304 sin ninguna consulta.
+- El JSON se escribe por partes con StreamingHttpResponse, un objeto por vez,
+  en lugar de armar la lista completa y serializarla de una vez.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .cache import CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES
+from .cache_paginas import ARTICULOS, COMENTARIOS, USUARIOS, etag_etiquetas, etiqueta_articulo, etiqueta_categoria
+from .models import Articulo, Categoria, Comentario
+from .paginacion import paginar_por_cursor
+from .views import ORDEN_COMENTARIOS, ORDENES_ARTICULOS
+
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+# Tamaño aproximado de cada escritura al cliente
+TAMANIO_BLOQUE = 16 * 1024
+
+_codificar = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+# ---------- Campos ----------
+# {nombre público: (columnas para .only(), función(objeto, request) -> valor)}
+
+def _usuario(usuario):
+    if usuario is None:
+        return None
+    return {'id': usuario.pk, 'username': usuario.username, 'nombre': usuario.get_full_name()}
+
+
+_COLUMNAS_USUARIO = ('autor__id', 'autor__username', 'autor__first_name', 'autor__last_name')
+
+CAMPOS_ARTICULO = {
+    'id': (('id',), lambda a, request: a.pk),
+    'titulo': (('titulo',), lambda a, request: a.titulo),
+    'resumen': (('resumen',), lambda a, request: a.resumen),
+    'contenido': (('contenido',), lambda a, request: a.contenido),
+    'imagen': (
+        ('imagen_destacada',),
+        lambda a, request: request.build_absolute_uri(a.imagen_destacada.url) if a.imagen_destacada else None,
+    ),
+    'fecha_creacion': (('fecha_creacion',), lambda a, request: a.fecha_creacion),
+    'fecha_actualizacion': (('fecha_actualizacion',), lambda a, request: a.fecha_actualizacion),
+    'destacado': (('destacado',), lambda a, request: a.destacado),
+    'total_comentarios': (('total_comentarios',), lambda a, request: a.total_comentarios),
+    'categoria': (
+        ('categoria__id', 'categoria__nombre'),
+        lambda a, request: {'id': a.categoria.pk, 'nombre': a.categoria.nombre},
+    ),
+    'autor': (_COLUMNAS_USUARIO, lambda a, request: _usuario(a.autor)),
+    'url': (('id',), lambda a, request: request.build_absolute_uri(reverse('detalle_articulo', args=[a.pk]))),
+}
+# El listado no manda el contenido completo salvo que se pida
+CAMPOS_ARTICULO_LISTADO = tuple(nombre for nombre in CAMPOS_ARTICULO if nombre != 'contenido')
+
+CAMPOS_CATEGORIA = {
+    'id': (('id',), lambda c, request: c.pk),
+    'nombre': (('nombre',), lambda c, request: c.nombre),
+    'descripcion': (('descripcion',), lambda c, request: c.descripcion),
+    'total_articulos': (('total_articulos',), lambda c, request: c.total_articulos),
+    'total_comentarios': (('total_comentarios',), lambda c, request: c.total_comentarios),
+    'fecha_actualizacion': (('fecha_actualizacion',), lambda c, request: c.fecha_actualizacion),
+    'url': (('id',), lambda c, request: request.build_absolute_uri(reverse('listar_por_categoria', args=[c.pk]))),
+}
+
+CAMPOS_COMENTARIO = {
+    'id': (('id',), lambda c, request: c.pk),
+    'articulo': (('articulo_id',), lambda c, request: c.articulo_id),
+    'contenido': (('contenido',), lambda c, request: c.contenido),
+    'fecha_creacion': (('fecha_creacion',), lambda c, request: c.fecha_creacion),
+    'fecha_actualizacion': (('fecha_actualizacion',), lambda c, request: c.fecha_actualizacion),
+    'autor': (_COLUMNAS_USUARIO, lambda c, request: _usuario(c.autor)),
+}
+
+
+class CamposInvalidos(ValueError):
+    pass
+
+
+def _elegir_campos(request, disponibles, por_defecto):
+    """Los campos de ?fields= (o los por defecto), validados contra `disponibles`"""
+    pedidos = request.GET.get('fields')
+    if not pedidos:
+        return por_defecto
+    nombres = tuple(dict.fromkeys(nombre.strip() for nombre in pedidos.split(',') if nombre.strip()))
+    desconocidos = [nombre for nombre in nombres if nombre not in disponibles]
+    if desconocidos or not nombres:
+        raise CamposInvalidos(
+            f'Campos desconocidos: {", ".join(desconocidos) or "(ninguno)"}. '
+            f'Disponibles: {", ".join(disponibles)}'
+        )
+    return nombres
+
+
+def _proyectar(queryset, disponibles, nombres, siempre=('id',)):
+    """Aplica .only() y select_related() con las columnas que necesitan los campos"""
+    columnas = set(siempre)
+    for nombre in nombres:
+        columnas.update(disponibles[nombre][0])
+    relaciones = {columna.split('__')[0] for columna in columnas if '__' in columna}
+    if relaciones:
+        queryset = queryset.select_related(*relaciones)
+    return queryset.only(*columnas)
+
+
+def _serializador(disponibles, nombres, request):
+    valores = [(nombre, disponibles[nombre][1]) for nombre in nombres]
+    return lambda objeto: {nombre: valor(objeto, request) for nombre, valor in valores}
+
+
+# ---------- Respuestas ----------
+
+def _en_bloques(partes):
+    """Junta las partes chicas en escrituras de ~TAMANIO_BLOQUE bytes"""
+    bloque, tamanio = [], 0
+    for parte in partes:
+        parte = parte.encode()
+        bloque.append(parte)
+        tamanio += len(parte)
+        if tamanio >= TAMANIO_BLOQUE:
+            yield b''.join(bloque)
+            bloque, tamanio = [], 0
+    if bloque:
+        yield b''.join(bloque)
+
+
+def _partes_lista(objetos, serializar, siguiente=None, anterior=None):
+    yield '{"resultados":['
+    separador = ''
+    for objeto in objetos:
+        yield separador + _codificar(serializar(objeto))
+        separador = ','
+    yield f'],"siguiente":{_codificar(siguiente)},"anterior":{_codificar(anterior)}}}'
+
+
+def _respuesta(partes, etag):
+    respuesta = StreamingHttpResponse(_en_bloques(partes), content_type='application/json')
+    respuesta['ETag'] = etag
+    patch_cache_control(respuesta, no_cache=True)
+    return respuesta
+
+
+def _error(mensaje, status):
+    return JsonResponse({'error': mensaje}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _no_modificado(request, etag):
+    respuesta = get_conditional_response(request, etag=etag)
+    if respuesta is not None:
+        respuesta['ETag'] = etag
+        patch_cache_control(respuesta, no_cache=True)
+    return respuesta
+
+
+def _limite(request):
+    try:
+        limite = int(request.GET.get('limite', LIMITE_POR_DEFECTO))
+    except ValueError:
+        return LIMITE_POR_DEFECTO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _enlace(request, cursor):
+    """URL absoluta de otra página: la misma consulta con otro cursor"""
+    if cursor is None:
+        return None
+    parametros = request.GET.copy()
+    parametros['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{parametros.urlencode()}')
+
+
+def _lista_paginada(request, queryset, orden, serializar, etag):
+    pagina = paginar_por_cursor(queryset, orden, cursor=request.GET.get('cursor'), tamanio=_limite(request))
+    return _respuesta(
+        _partes_lista(
+            pagina.elementos, serializar,
+            siguiente=_enlace(request, pagina.cursor_siguiente),
+            anterior=_enlace(request, pagina.cursor_anterior),
+        ),
+        etag,
+    )
+
+
+def _etiquetas_de_campos(nombres):
+    """Etiquetas extra de los campos que muestran datos de otros modelos"""
+    etiquetas = []
+    if 'total_comentarios' in nombres:
+        etiquetas.append(COMENTARIOS)
+    if 'autor' in nombres:
+        etiquetas.append(USUARIOS)
+    return etiquetas
+
+
+# ---------- Vistas ----------
+
+@require_safe
+def articulos(request):
+    """Artículos, opcionalmente de una categoría (?categoria=) y en otro orden (?orden=)"""
+    try:
+        nombres = _elegir_campos(request, CAMPOS_ARTICULO, CAMPOS_ARTICULO_LISTADO)
+    except CamposInvalidos as error:
+        return _error(str(error), 400)
+
+    categoria_id = request.GET.get('categoria', '')
+    categoria_id = int(categoria_id) if categoria_id.isdigit() else None
+    if categoria_id is None:
+        etiquetas = [ARTICULOS, CATEGORIAS_GLOBALES]
+    else:
+        etiquetas = [etiqueta_categoria(categoria_id), CATEGORIAS_GLOBALES]
+    # Los comentarios y los autores no tocan las etiquetas de los artículos
+    etag = etag_etiquetas(request, etiquetas + _etiquetas_de_campos(nombres))
+    no_modificado = _no_modificado(request, etag)
+    if no_modificado is not None:
+        return no_modificado
+
+    orden = ORDENES_ARTICULOS.get(request.GET.get('orden'), ORDENES_ARTICULOS['reciente'])
+
+    queryset = Articulo.objects.all()
+    if categoria_id is not None:
+        queryset = queryset.filter(categoria_id=categoria_id)
+    # Las columnas del orden siempre, para armar el cursor
+    queryset = _proyectar(queryset, CAMPOS_ARTICULO, nombres, siempre=[campo.lstrip('-') for campo in orden])
+    return _lista_paginada(
+        request, queryset, orden, _serializador(CAMPOS_ARTICULO, nombres, request), etag
+    )
+
+
+@require_safe
+def articulo(request, id):
+    try:
+        nombres = _elegir_campos(request, CAMPOS_ARTICULO, tuple(CAMPOS_ARTICULO))
+    except CamposInvalidos as error:
+        return _error(str(error), 400)
+    etag = etag_etiquetas(request, [etiqueta_articulo(id), CATEGORIAS_GLOBALES] + _etiquetas_de_campos(nombres))
+    no_modificado = _no_modificado(request, etag)
+    if no_modificado is not None:
+        return no_modificado
+
+    objeto = _proyectar(Articulo.objects.filter(pk=id), CAMPOS_ARTICULO, nombres).first()
+    if objeto is None:
+        return _error('Artículo no encontrado', 404)
+    return _respuesta([_codificar(_serializador(CAMPOS_ARTICULO, nombres, request)(objeto))], etag)
+
+
+@require_safe
+def comentarios(request, id):
+    """Comentarios del artículo, los más recientes primero"""
+    try:
+        nombres = _elegir_campos(request, CAMPOS_COMENTARIO, tuple(CAMPOS_COMENTARIO))
+    except CamposInvalidos as error:
+        return _error(str(error), 400)
+    etag = etag_etiquetas(request, [etiqueta_articulo(id)] + _etiquetas_de_campos(nombres))
+    no_modificado = _no_modificado(request, etag)
+    if no_modificado is not None:
+        return no_modificado
+
+    if not Articulo.objects.filter(pk=id).exists():
+        return _error('Artículo no encontrado', 404)
+
+    queryset = _proyectar(
+        Comentario.objects.filter(articulo_id=id), CAMPOS_COMENTARIO, nombres,
+        siempre=[campo.lstrip('-') for campo in ORDEN_COMENTARIOS],
+    )
+    return _lista_paginada(
+        request, queryset, ORDEN_COMENTARIOS, _serializador(CAMPOS_COMENTARIO, nombres, request), etag
+    )
+
+
+@require_safe
+def categorias(request):
+    """Todas las categorías (son pocas: sin paginar)"""
+    # ARTICULOS: cualquier cambio de un artículo renueva la fecha de su categoría
+    etag = etag_etiquetas(request, [ARTICULOS, CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES])
+    no_modificado = _no_modificado(request, etag)
+    if no_modificado is not None:
+        return no_modificado
+
+    try:
+        nombres = _elegir_campos(request, CAMPOS_CATEGORIA, tuple(CAMPOS_CATEGORIA))
+    except CamposInvalidos as error:
+        return _error(str(error), 400)
+    queryset = _proyectar(Categoria.objects.order_by('nombre'), CAMPOS_CATEGORIA, nombres)
+    return _respuesta(
+        _partes_lista(queryset.iterator(), _serializador(CAMPOS_CATEGORIA, nombres, request)), etag
+    )
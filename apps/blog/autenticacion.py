@@ -0,0 +1,52 @@
+"""
+Backend de autenticación que carga el usuario con su perfil en la misma
+consulta de la sesión y deja el rol resuelto en `request.user.rol`.
+
+Así los decoradores, las vistas y las plantillas (el header lo mira varias
+veces por página) deciden los permisos sin ninguna consulta extra.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+# De menor a mayor: cada rol puede lo mismo que los anteriores
+ROLES = ('miembro', 'colaborador', 'administrador')
+
+
+def rol_de(usuario):
+    """
+    Rol efectivo del usuario: el del perfil, 'administrador' para los
+    superusuarios y '' para visitantes o usuarios sin perfil. Queda guardado
+    en `usuario.rol`.
+    """
+    if not usuario.is_authenticated:
+        return ''
+    rol = getattr(usuario, 'rol', None)
+    if rol is None:
+        if usuario.is_superuser:
+            rol = 'administrador'
+        else:
+            perfil = getattr(usuario, 'perfil', None)
+            rol = perfil.rol if perfil is not None else ''
+        usuario.rol = rol
+    return rol
+
+
+def tiene_rol(usuario, minimo):
+    """True si el rol del usuario es `minimo` o uno superior"""
+    rol = rol_de(usuario)
+    return rol in ROLES and ROLES.index(rol) >= ROLES.index(minimo)
+
+
+class BackendConPerfil(ModelBackend):
+    def get_user(self, user_id):
+        User = get_user_model()
+        try:
+            # Un usuario sin perfil queda con el perfil en None, sin otra consulta
+            usuario = User._default_manager.select_related('perfil').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        if not self.user_can_authenticate(usuario):
+            return None
+        rol_de(usuario)
+        return usuario
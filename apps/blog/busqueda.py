@@ -0,0 +1,307 @@
+"""
+Búsqueda de artículos y de usuarios con SQLite FTS5.
+
+El índice `blog_articulo_fts` es una tabla virtual de "contenido externo": no
+duplica el texto, solo guarda el índice invertido y lee titulo/contenido de
+blog_articulo. Lo mantienen sincronizado tres triggers, así que también
+cubre cambios hechos con update(), bulk_create() o desde el admin.
+
+`blog_user_fts` hace lo mismo con usuario, email y nombre de auth_user, con
+el tokenizador trigram: encuentra cualquier parte del texto (no solo
+palabras enteras) usando el índice.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Articulo
+from .paginacion import ANTERIOR, SIGUIENTE, PaginaCursor, codificar_cursor, decodificar_cursor
+
+
+TABLA_FTS = 'blog_articulo_fts'
+
+# Peso de cada columna en el ranking BM25: un acierto en el título vale más
+PESO_TITULO = 10.0
+PESO_CONTENIDO = 1.0
+
+# Marcadores que devuelve FTS5 alrededor de cada coincidencia. Son caracteres
+# de control para poder escapar el texto antes de convertirlos en <mark>.
+_INICIO_MARCA = '\x02'
+_FIN_MARCA = '\x03'
+
+SQL_CREAR_TABLA = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        titulo, contenido,
+        content='blog_articulo', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+SQL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON blog_articulo BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, titulo, contenido) VALUES (new.id, new.titulo, new.contenido);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON blog_articulo BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, titulo, contenido)
+        VALUES ('delete', old.id, old.titulo, old.contenido);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE OF titulo, contenido ON blog_articulo BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, titulo, contenido)
+        VALUES ('delete', old.id, old.titulo, old.contenido);
+        INSERT INTO {TABLA_FTS}(rowid, titulo, contenido) VALUES (new.id, new.titulo, new.contenido);
+    END
+    """,
+]
+
+SQL_RECONSTRUIR = f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')"
+
+TABLA_FTS_USUARIOS = 'blog_user_fts'
+COLUMNAS_USUARIOS = ('username', 'email', 'first_name', 'last_name')
+
+# Trigram indexa cada secuencia de 3 caracteres: más corto no hay qué buscar
+MINIMO_BUSQUEDA_USUARIOS = 3
+
+
+def _sql_triggers_usuarios():
+    columnas = ', '.join(COLUMNAS_USUARIOS)
+    nuevos = ', '.join(f'new.{columna}' for columna in COLUMNAS_USUARIOS)
+    viejos = ', '.join(f'old.{columna}' for columna in COLUMNAS_USUARIOS)
+    borrar = (
+        f"INSERT INTO {TABLA_FTS_USUARIOS}({TABLA_FTS_USUARIOS}, rowid, {columnas}) "
+        f"VALUES ('delete', old.id, {viejos});"
+    )
+    insertar = f'INSERT INTO {TABLA_FTS_USUARIOS}(rowid, {columnas}) VALUES (new.id, {nuevos});'
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {TABLA_FTS_USUARIOS}_ai AFTER INSERT ON auth_user BEGIN {insertar} END',
+        f'CREATE TRIGGER IF NOT EXISTS {TABLA_FTS_USUARIOS}_ad AFTER DELETE ON auth_user BEGIN {borrar} END',
+        f'CREATE TRIGGER IF NOT EXISTS {TABLA_FTS_USUARIOS}_au AFTER UPDATE OF {columnas} ON auth_user '
+        f'BEGIN {borrar} {insertar} END',
+    ]
+
+
+SQL_CREAR_TABLA_USUARIOS = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS_USUARIOS} USING fts5(
+        {', '.join(COLUMNAS_USUARIOS)},
+        content='auth_user', content_rowid='id',
+        tokenize='trigram'
+    )
+"""
+SQL_TRIGGERS_USUARIOS = _sql_triggers_usuarios()
+SQL_RECONSTRUIR_USUARIOS = f"INSERT INTO {TABLA_FTS_USUARIOS}({TABLA_FTS_USUARIOS}) VALUES ('rebuild')"
+
+# {tabla: (crear tabla, triggers, reindexar)}
+INDICES = {
+    TABLA_FTS: (SQL_CREAR_TABLA, SQL_TRIGGERS, SQL_RECONSTRUIR),
+    TABLA_FTS_USUARIOS: (SQL_CREAR_TABLA_USUARIOS, SQL_TRIGGERS_USUARIOS, SQL_RECONSTRUIR_USUARIOS),
+}
+
+
+def fts_disponible(conexion=connection):
+    return conexion.vendor == 'sqlite'
+
+
+def instalar_indice(conexion=connection, reconstruir=True, tabla=TABLA_FTS):
+    """Crea la tabla FTS y sus triggers (idempotente) y opcionalmente la reindexa"""
+    crear, triggers, reindexar = INDICES[tabla]
+    with conexion.cursor() as cursor:
+        cursor.execute(crear)
+        for sql in triggers:
+            cursor.execute(sql)
+        if reconstruir:
+            cursor.execute(reindexar)
+
+
+def borrar_indice(conexion=connection, tabla=TABLA_FTS):
+    with conexion.cursor() as cursor:
+        for sufijo in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {tabla}_{sufijo}')
+        cursor.execute(f'DROP TABLE IF EXISTS {tabla}')
+
+
+def asegurar_indice(conexion=connection):
+    """
+    Vuelve a crear los triggers si faltan y reindexa.
+
+    En SQLite, las migraciones que alteran blog_articulo (o auth_user)
+    reconstruyen la tabla y con eso se pierden sus triggers; se llama
+    después de cada migrate.
+    """
+    if not fts_disponible(conexion):
+        return
+    for tabla, (_, triggers, _) in INDICES.items():
+        with conexion.cursor() as cursor:
+            # Sin la tabla FTS no hay nada que reparar (migración sin aplicar)
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s", [tabla])
+            if not cursor.fetchone()[0]:
+                continue
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{tabla}_a_'],
+            )
+            if cursor.fetchone()[0] == len(triggers):
+                continue
+        instalar_indice(conexion, tabla=tabla)
+
+
+@contextmanager
+def indexar_al_final(conexion=connection, tablas=tuple(INDICES)):
+    """
+    Para cargas masivas: quita los triggers mientras dura el bloque y al final
+    reindexa todo de una vez, que es mucho más rápido que fila por fila.
+    """
+    if not fts_disponible(conexion):
+        yield
+        return
+    with conexion.cursor() as cursor:
+        for tabla in tablas:
+            for sufijo in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {tabla}_{sufijo}')
+    try:
+        yield
+    finally:
+        for tabla in tablas:
+            instalar_indice(conexion, tabla=tabla)
+
+
+def filtrar_usuarios(usuarios, texto):
+    """
+    Los usuarios de `usuarios` cuyo usuario, email o nombre contienen cada
+    palabra de `texto` (sin distinguir mayúsculas). Las palabras de menos de
+    MINIMO_BUSQUEDA_USUARIOS caracteres se ignoran: el índice no las cubre.
+    """
+    palabras = [palabra for palabra in (texto or '').split() if len(palabra) >= MINIMO_BUSQUEDA_USUARIOS][:10]
+    if not palabras:
+        return usuarios
+    if not fts_disponible():
+        for palabra in palabras:
+            usuarios = usuarios.filter(
+                Q(username__icontains=palabra) | Q(email__icontains=palabra) |
+                Q(first_name__icontains=palabra) | Q(last_name__icontains=palabra)
+            )
+        return usuarios
+    # Cada palabra como frase entre comillas: con trigram es "contiene"
+    consulta = ' '.join('"{}"'.format(palabra.replace('"', '""')) for palabra in palabras)
+    return usuarios.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {TABLA_FTS_USUARIOS} WHERE {TABLA_FTS_USUARIOS} MATCH %s', [consulta],
+    ))
+
+
+def armar_consulta_fts(texto):
+    """
+    Convierte lo que escribió el usuario en una consulta FTS5 segura.
+
+    Cada palabra va entre comillas (así los caracteres especiales de FTS5 no
+    rompen la consulta) y la última se busca como prefijo para que "mess"
+    encuentre "Messi".
+    """
+    palabras = re.findall(r'\w+', texto or '')[:10]
+    if not palabras:
+        return ''
+    terminos = [f'"{palabra}"' for palabra in palabras]
+    terminos[-1] += '*'
+    return ' '.join(terminos)
+
+
+def _resaltar(texto):
+    """Escapa el fragmento y convierte los marcadores de FTS5 en <mark>"""
+    return mark_safe(
+        escape(texto).replace(_INICIO_MARCA, '<mark>').replace(_FIN_MARCA, '</mark>')
+    )
+
+
+def _cursor_valido(valores):
+    """(puntaje, id) con un número y un entero: el cursor viene de la URL y va directo al SQL"""
+    if len(valores) != 2 or any(isinstance(valor, bool) for valor in valores):
+        return False
+    puntaje, articulo_id = valores
+    return isinstance(puntaje, (int, float)) and isinstance(articulo_id, int)
+
+
+def buscar_articulos(texto, categoria_id=None, cursor=None, tamanio=10):
+    """
+    Devuelve una PaginaCursor con los artículos que coinciden, ordenados por
+    relevancia (BM25). Cada artículo trae `titulo_resaltado` y `fragmento`.
+
+    El cursor es (puntaje, id): BM25 es determinista mientras el índice no
+    cambie, así que sirve como clave de orden igual que una fecha.
+    """
+    consulta = armar_consulta_fts(texto)
+    if not consulta or not fts_disponible():
+        return PaginaCursor([])
+
+    condiciones = [f'{TABLA_FTS} MATCH %s']
+    parametros = [consulta]
+    if categoria_id:
+        condiciones.append('a.categoria_id = %s')
+        parametros.append(categoria_id)
+
+    direccion = SIGUIENTE
+    datos = decodificar_cursor(cursor)
+    if datos and _cursor_valido(datos[1]):
+        direccion, (puntaje, articulo_id) = datos
+        comparacion = '<' if direccion == ANTERIOR else '>'
+        condiciones.append(f'(puntaje {comparacion} %s OR (puntaje = %s AND a.id {comparacion} %s))')
+        parametros += [puntaje, puntaje, articulo_id]
+    else:
+        datos = None
+
+    sentido = 'DESC' if direccion == ANTERIOR else 'ASC'
+    sql = f"""
+        SELECT * FROM (
+            SELECT a.id AS id, a.categoria_id AS categoria_id,
+                   bm25({TABLA_FTS}, {PESO_TITULO}, {PESO_CONTENIDO}) AS puntaje,
+                   highlight({TABLA_FTS}, 0, %s, %s) AS titulo_resaltado,
+                   snippet({TABLA_FTS}, 1, %s, %s, '…', 24) AS fragmento
+            FROM {TABLA_FTS}
+            JOIN blog_articulo a ON a.id = {TABLA_FTS}.rowid
+            WHERE {condiciones[0]}
+        ) a
+        WHERE {' AND '.join(['1 = 1'] + condiciones[1:])}
+        ORDER BY puntaje {sentido}, a.id {sentido}
+        LIMIT %s
+    """
+    marcas = [_INICIO_MARCA, _FIN_MARCA, _INICIO_MARCA, _FIN_MARCA]
+    with connection.cursor() as c:
+        c.execute(sql, marcas + parametros + [tamanio + 1])
+        filas = c.fetchall()
+
+    hay_mas = len(filas) > tamanio
+    filas = filas[:tamanio]
+    if direccion == ANTERIOR:
+        filas.reverse()
+
+    # Segunda consulta, por clave primaria, para las columnas de la tarjeta
+    articulos = Articulo.objects.para_listado().in_bulk([fila[0] for fila in filas])
+    resultados = []
+    for articulo_id, _, puntaje, titulo, fragmento in filas:
+        articulo = articulos.get(articulo_id)
+        if articulo is None:
+            continue
+        articulo.puntaje = puntaje
+        articulo.titulo_resaltado = _resaltar(titulo)
+        articulo.fragmento = _resaltar(fragmento)
+        resultados.append(articulo)
+
+    if direccion == ANTERIOR:
+        hay_siguiente, hay_anterior = True, hay_mas
+    else:
+        hay_siguiente, hay_anterior = hay_mas, bool(datos)
+
+    def token(direccion, fila):
+        return codificar_cursor(direccion, [fila[2], fila[0]])
+
+    return PaginaCursor(
+        resultados,
+        cursor_siguiente=token(SIGUIENTE, filas[-1]) if filas and hay_siguiente else None,
+        cursor_anterior=token(ANTERIOR, filas[0]) if filas and hay_anterior else None,
+    )
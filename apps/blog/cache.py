@@ -0,0 +1,134 @@
+"""
+Caché con claves versionadas.
+
+Cada dato cacheado tiene un número de versión propio. Para invalidarlo no se
+borra nada: se cambia la versión y la próxima lectura arma una clave nueva.
+Las señales (signals.py) llaman a invalidar() cuando cambian los datos.
+
+Cada versión nueva sale del reloj (time.time_ns()) en vez de un incr: la
+caché de archivos no incrementa de forma atómica, y dos procesos que
+invalidan a la vez podrían escribir el mismo número.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Nombres de los datos cacheados
+CATEGORIAS_POPULARES = 'categorias_populares'
+CATEGORIAS_GLOBALES = 'categorias_globales'
+# No cachea datos: su versión solo marca cuándo cambiaron los relacionados
+RELACIONADOS = 'relacionados'
+
+# Cuánto puede tardar como máximo una reconstrucción antes de liberar el candado
+TIEMPO_CANDADO = 30
+# Espera total de los workers que no consiguieron el candado
+ESPERA_MAXIMA = 2.0
+ESPERA_INTERVALO = 0.05
+
+
+def _clave_version(nombre):
+    return f'blog:version:{nombre}'
+
+
+def obtener_version(nombre):
+    """Versión actual de `nombre`; si no existe se inicializa"""
+    clave = _clave_version(nombre)
+    version = cache.get(clave)
+    if version is None:
+        # Se parte de la hora actual para no repetir una versión vieja si la
+        # clave fue desalojada de la caché
+        cache.add(clave, time.time_ns(), None)
+        version = cache.get(clave)
+    return version
+
+
+def versiones_guardadas(nombres):
+    """Las versiones que ya existen de `nombres`, sin inicializar las que faltan"""
+    claves = {_clave_version(nombre): nombre for nombre in nombres}
+    return {claves[clave]: version for clave, version in cache.get_many(claves).items()}
+
+
+def obtener_versiones(nombres):
+    """Como obtener_version() para varios nombres, con una sola lectura a la caché"""
+    versiones = versiones_guardadas(nombres)
+    for nombre in nombres:
+        if nombre not in versiones:
+            versiones[nombre] = obtener_version(nombre)
+    return versiones
+
+
+def invalidar(*nombres):
+    """Cambia la versión de cada nombre una vez confirmada la transacción"""
+    def cambiar():
+        cache.set_many({_clave_version(nombre): time.time_ns() for nombre in nombres}, None)
+
+    transaction.on_commit(cambiar)
+
+
+def obtener_o_construir(nombre, construir, timeout=None):
+    """
+    Devuelve el valor cacheado de `nombre` o lo arma con `construir()`.
+
+    Si varios workers encuentran la caché vacía a la vez, solo uno reconstruye
+    (el que consigue el candado con cache.add); el resto sirve la última versión
+    conocida o espera brevemente a que el primero termine.
+    """
+    clave = f'blog:{nombre}:{obtener_version(nombre)}'
+    clave_ultimo = f'blog:{nombre}:ultimo'
+
+    valor = cache.get(clave)
+    if valor is not None:
+        return valor
+
+    candado = f'{clave}:candado'
+    if cache.add(candado, 1, TIEMPO_CANDADO):
+        try:
+            valor = construir()
+            cache.set_many({clave: valor, clave_ultimo: valor}, timeout)
+        finally:
+            cache.delete(candado)
+        return valor
+
+    # Otro worker está reconstruyendo
+    valor = cache.get(clave_ultimo)
+    if valor is not None:
+        return valor
+
+    esperado = 0.0
+    while esperado < ESPERA_MAXIMA:
+        time.sleep(ESPERA_INTERVALO)
+        esperado += ESPERA_INTERVALO
+        valor = cache.get(clave)
+        if valor is not None:
+            return valor
+
+    # El otro worker no terminó a tiempo: mejor responder que seguir esperando
+    return construir()
+
+
+# Valores guardados en la memoria de este proceso: {nombre: (versión, valor)}
+_locales = {}
+_candado_local = threading.Lock()
+
+
+def obtener_local(nombre, construir):
+    """
+    Como obtener_o_construir(), pero el valor vive en la memoria del proceso.
+
+    Para datos chicos que se leen en cada request: solo se consulta la caché
+    compartida para comparar la versión, nunca la base de datos.
+    """
+    version = obtener_version(nombre)
+    guardado = _locales.get(nombre)
+    if guardado is not None and guardado[0] == version:
+        return guardado[1]
+
+    with _candado_local:
+        guardado = _locales.get(nombre)
+        if guardado is None or guardado[0] != version:
+            guardado = (version, construir())
+            _locales[nombre] = guardado
+    return guardado[1]
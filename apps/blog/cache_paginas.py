@@ -0,0 +1,168 @@
+"""
+Caché de páginas completas para visitantes anónimos.
+
+Cada página se guarda junto con las versiones de las etiquetas de las que
+depende (artículos, categorías y los datos que comparten todas las páginas).
+Al leerla se comparan esas versiones con una sola lectura a la caché
+(get_many): si alguna cambió, la página se descarta y se vuelve a generar.
+Las señales (signals.py) invalidan las etiquetas cuando cambian los datos,
+así que un comentario nuevo solo regenera la página de su artículo.
+
+Un acierto no hace ninguna consulta a la base de datos.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, quote_etag
+
+from . import replica
+from .cache import obtener_versiones, versiones_guardadas
+from .paginacion import codificar_cursor, decodificar_cursor
+
+
+# Cuánto vive una página en la caché aunque nada la invalide
+TIEMPO_PAGINA = 60 * 15
+
+# Largo máximo de un texto dentro de un cursor (títulos, fechas)
+LARGO_VALOR_CURSOR = 300
+
+# Etiqueta de cualquier artículo (la portada los lista todos)
+ARTICULOS = 'pagina:articulos'
+# Cualquier comentario: cambia total_comentarios de los listados de la API
+COMENTARIOS = 'pagina:comentarios'
+# Nombre y usuario de cualquier autor, que la API incluye en artículos y comentarios
+USUARIOS = 'pagina:usuarios'
+
+
+def etiqueta_articulo(articulo_id):
+    return f'pagina:articulo:{articulo_id}'
+
+
+def etiqueta_categoria(categoria_id):
+    return f'pagina:categoria:{categoria_id}'
+
+
+def etiquetar(request, *etiquetas):
+    """Agrega, desde la vista, etiquetas que solo se conocen al armar la página"""
+    if hasattr(request, '_etiquetas_pagina'):
+        request._etiquetas_pagina.update(etiquetas)
+
+
+def etag_etiquetas(request, etiquetas):
+    """
+    ETag que cambia cuando se invalida alguna de las etiquetas.
+
+    Solo lee la caché: sirve para responder 304 antes de tocar la base.
+    """
+    versiones = obtener_versiones(list(etiquetas))
+    partes = [str(versiones[etiqueta]) for etiqueta in etiquetas]
+    partes += [request.get_host(), request.get_full_path()]
+    return quote_etag(hashlib.md5('|'.join(partes).encode(), usedforsecurity=False).hexdigest())
+
+
+def _es_anonimo(request):
+    """
+    Sin cookie de sesión no hay usuario logueado ni mensajes pendientes.
+
+    Se decide por las cookies y no por request.user para no leer la sesión.
+    """
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _normalizar_cursor(token):
+    """
+    El cursor reescrito en su forma canónica, o '' si no es uno que pueda
+    haber generado paginar_por_cursor (la vista muestra entonces la primera página).
+    """
+    datos = decodificar_cursor(token)
+    if datos is None:
+        return ''
+    direccion, valores = datos
+    if len(valores) != 2 or not all(
+        isinstance(valor, (int, float)) and not isinstance(valor, bool)
+        or isinstance(valor, str) and len(valor) <= LARGO_VALOR_CURSOR
+        for valor in valores
+    ):
+        return ''
+    return codificar_cursor(direccion, valores)
+
+
+def _clave_pagina(request, ordenes):
+    """
+    Clave de la página con sus parámetros normalizados: un valor inventado no
+    crea una entrada nueva en la caché.
+    """
+    cursor = _normalizar_cursor(request.GET.get('cursor'))
+    orden = request.GET.get('orden', '')
+    orden = orden if orden in ordenes else ''
+    return f'blog:pagina:{request.path}?orden={orden}&cursor={cursor}'
+
+
+def _respuesta_condicional(request, respuesta):
+    """Aplica If-None-Match / If-Modified-Since a una página servida desde la caché"""
+    return get_conditional_response(
+        request,
+        etag=respuesta.get('ETag'),
+        last_modified=parse_http_date_safe(respuesta.get('Last-Modified', '')),
+        response=respuesta,
+    )
+
+
+def cachear_para_anonimos(calcular_etiquetas, ordenes=()):
+    """
+    Decorador: sirve la página desde la caché a los visitantes anónimos.
+
+    `calcular_etiquetas(*args, **kwargs)` recibe los argumentos de la URL y
+    devuelve las etiquetas de la página; la vista puede sumar otras con
+    etiquetar(). `ordenes` son los valores de ?orden= que acepta la vista.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def wrapper(request, *args, **kwargs):
+            if not _es_anonimo(request):
+                return vista(request, *args, **kwargs)
+
+            clave = _clave_pagina(request, ordenes)
+            guardada = cache.get(clave)
+            if guardada is not None:
+                versiones, respuesta = guardada
+                if obtener_versiones(list(versiones)) == versiones:
+                    return _respuesta_condicional(request, respuesta)
+
+            # Versiones leídas antes de armar la página: si algo cambia
+            # mientras tanto, la copia guardada ya nace invalidada
+            etiquetas = set(calcular_etiquetas(*args, **kwargs))
+            inicio = time.time_ns()
+            versiones = obtener_versiones(list(etiquetas))
+            request._etiquetas_pagina = etiquetas
+            respuesta = vista(request, *args, **kwargs)
+
+            cacheable = (
+                request.method == 'GET'
+                and respuesta.status_code == 200
+                and not respuesta.cookies
+                and not request.META.get('CSRF_COOKIE_USED')
+                and not getattr(respuesta, 'streaming', False)
+                # Armada con una réplica atrasada: quedaría bajo las versiones nuevas
+                and replica.lectura_al_dia()
+            )
+            if cacheable:
+                # Las etiquetas de etiquetar() se conocen recién ahora. Las
+                # versiones son la hora de la invalidación: una posterior al
+                # inicio pudo cambiar datos ya leídos, y la página no se guarda.
+                # Una que no existe no se invalidó (invalidar() la habría creado)
+                agregadas = list(etiquetas - versiones.keys())
+                if all(version < inicio for version in versiones_guardadas(agregadas).values()):
+                    versiones.update(obtener_versiones(agregadas))
+                    cache.set(clave, (versiones, respuesta), TIEMPO_PAGINA)
+            return respuesta
+        return wrapper
+    return decorador
@@ -0,0 +1,120 @@
+"""
+Respuestas condicionales (ETag) para las páginas públicas.
+
+Antes de ejecutar la vista se calcula un sello con una sola consulta de
+agregación; si el navegador ya tiene esa versión se responde 304 sin tocar
+las plantillas. El sello combina:
+
+- las fechas de actualización de los datos de la página (artículo, último
+  comentario, relacionados, Categoria.fecha_actualizacion, que renuevan las
+  señales),
+- las versiones de caché de lo que se muestra alrededor (header, ranking de
+  categorías, relacionados, nombres de los autores), que no cuestan consultas,
+- el usuario y su rol, porque el header y los botones cambian con ellos.
+
+No se manda Last-Modified: una fecha no refleja ni el usuario ni las
+versiones de caché, y un navegador que solo mandara If-Modified-Since
+recibiría un 304 de otra versión de la página.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from . import replica
+from .autenticacion import rol_de
+from .cache import CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES, RELACIONADOS, obtener_version
+from .cache_paginas import USUARIOS
+from .models import Articulo, ArticuloRelacionado, Categoria, Comentario
+
+
+def sello_listado(request, categoria_id=None):
+    """Último cambio de los artículos de la categoría (o de todas)"""
+    categorias = Categoria.objects.all()
+    if categoria_id is not None:
+        categorias = categorias.filter(pk=categoria_id)
+    ultima = categorias.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+    if ultima is None:
+        return None
+    return [ultima], (CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES)
+
+
+def sello_articulo(request, id):
+    """Último cambio del artículo, de sus comentarios, de su categoría o de sus relacionados"""
+    # Una búsqueda en el índice (articulo, fecha_actualizacion), sin recorrer los comentarios
+    ultimo_comentario = (
+        Comentario.objects.filter(articulo=OuterRef('pk'))
+        .order_by('-fecha_actualizacion')
+        .values('fecha_actualizacion')[:1]
+    )
+    # La página muestra el título de cada relacionado
+    ultimo_relacionado = (
+        ArticuloRelacionado.objects.filter(articulo=OuterRef('pk'))
+        .order_by()
+        .values('articulo')
+        .annotate(ultima=Max('relacionado__fecha_actualizacion'))
+        .values('ultima')
+    )
+    fila = (
+        Articulo.objects.filter(pk=id)
+        .values_list('fecha_actualizacion', 'categoria__fecha_actualizacion', 'total_comentarios')
+        .annotate(ultimo_comentario=Subquery(ultimo_comentario), ultimo_relacionado=Subquery(ultimo_relacionado))
+        .first()
+    )
+    if fila is None:
+        return None
+    fechas = [fecha for fecha in (fila[0], fila[1], fila[3], fila[4]) if fecha is not None]
+    # El total de comentarios detecta borrados aunque la fecha máxima no cambie;
+    # USUARIOS, que un autor cambie su nombre
+    return fechas + [fila[2]], (CATEGORIAS_GLOBALES, RELACIONADOS, USUARIOS)
+
+
+def _identidad(request):
+    usuario = request.user
+    if not usuario.is_authenticated:
+        return ''
+    return f'{usuario.pk}:{usuario.is_superuser}:{rol_de(usuario)}'
+
+
+def condicional(calcular_sello):
+    """
+    Decorador: responde 304 Not Modified cuando el ETag que manda el
+    navegador coincide con el sello que devuelve `calcular_sello`.
+
+    `calcular_sello(request, *args, **kwargs)` devuelve (valores, nombres de
+    caché) o None si no se puede calcular (la vista decide, p. ej. con un 404).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def wrapper(request, *args, **kwargs):
+            # Los mensajes pendientes se muestran una sola vez: nunca un 304
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return vista(request, *args, **kwargs)
+
+            sello = calcular_sello(request, *args, **kwargs)
+            if sello is None:
+                return vista(request, *args, **kwargs)
+
+            valores, nombres = sello
+            partes = [str(valor) for valor in valores]
+            partes += [str(obtener_version(nombre)) for nombre in nombres]
+            partes += [_identidad(request), request.get_full_path()]
+            etag = quote_etag(hashlib.md5('|'.join(partes).encode(), usedforsecurity=False).hexdigest())
+
+            respuesta = get_conditional_response(request, etag=etag)
+            if respuesta is None:
+                respuesta = vista(request, *args, **kwargs)
+                # Con una réplica atrasada el contenido puede ser anterior al sello
+                if respuesta.status_code == 200 and replica.lectura_al_dia():
+                    respuesta.headers.setdefault('ETag', etag)
+            # Siempre revalidar: el sello es barato y la página cambia con cada comentario
+            if request.user.is_authenticated:
+                patch_cache_control(respuesta, no_cache=True, private=True)
+            else:
+                patch_cache_control(respuesta, no_cache=True)
+            return respuesta
+        return wrapper
+    return decorador
@@ -1,7 +1,23 @@
+from .autenticacion import rol_de
+from .cache import CATEGORIAS_GLOBALES, obtener_local
 from .models import Categoria
 
+
+def _cargar_categorias():
+    # Filas ya materializadas: el header las recorre dos veces (menú de
+    # escritorio y menú móvil) sin volver a consultar
+    return tuple(Categoria.objects.order_by('nombre').values('id', 'nombre'))
+
+
 def procesador_categorias(request):
     # devuelve un diccionario que estará disponible en TODOS los HTML
     return {
-        'categorias_globales': Categoria.objects.all().order_by('nombre')
+        'categorias_globales': obtener_local(CATEGORIAS_GLOBALES, _cargar_categorias)
     }
+
+
+def procesador_rol(request):
+    # BackendConPerfil ya deja user.rol resuelto; las sesiones viejas del
+    # ModelBackend no, y las plantillas lo leen directo
+    rol_de(request.user)
+    return {}
@@ -0,0 +1,135 @@
+"""
+Outbox de correos.
+
+Las vistas no hablan con el servidor SMTP: guardan un CorreoPendiente en la
+misma transacción que el resto de sus datos y responden. El comando
+procesar_outbox los envía por lotes reutilizando una sola conexión SMTP y
+reintenta los que fallan con espera exponencial.
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from .models import CorreoPendiente
+
+
+TAMANIO_LOTE = 50
+MAX_INTENTOS = 6
+# Espera antes del reintento n: ESPERA_BASE * 2^(n-1), con hasta un 20% de azar
+ESPERA_BASE = timedelta(minutes=1)
+# Si un worker muere a mitad de un lote, sus correos se liberan pasado este tiempo
+TIEMPO_RECLAMO = timedelta(minutes=10)
+
+
+def remitente_por_defecto():
+    return getattr(settings, 'EMAIL_HOST_USER', '') or 'noreply@tododeporte.com'
+
+
+def encolar_correo(asunto, cuerpo, destinatarios=None, remitente=None):
+    """Guarda el correo para enviarlo después (sin destinatarios: a los superusuarios)"""
+    return CorreoPendiente.objects.create(
+        asunto=asunto,
+        cuerpo=cuerpo,
+        destinatarios=list(destinatarios or []),
+        remitente=remitente or remitente_por_defecto(),
+    )
+
+
+def espera_reintento(intentos):
+    espera = ESPERA_BASE * (2 ** (intentos - 1))
+    return espera * (1 + random.random() * 0.2)
+
+
+def reclamar_lote(tamanio=TAMANIO_LOTE, ahora=None):
+    """
+    Marca hasta `tamanio` correos vencidos como propios de este worker y los
+    devuelve. El UPDATE es una sola sentencia: dos workers nunca se llevan el
+    mismo correo.
+    """
+    ahora = ahora or timezone.now()
+    reclamo = uuid.uuid4()
+    vencidos = (
+        CorreoPendiente.objects
+        .filter(estado=CorreoPendiente.PENDIENTE, proximo_intento__lte=ahora)
+        .order_by('proximo_intento')
+        .values('pk')[:tamanio]
+    )
+    CorreoPendiente.objects.filter(pk__in=Subquery(vencidos)).update(
+        reclamo=reclamo,
+        proximo_intento=ahora + TIEMPO_RECLAMO,
+    )
+    return list(CorreoPendiente.objects.filter(reclamo=reclamo).order_by('pk'))
+
+
+def _correos_administradores():
+    return list(
+        User.objects.filter(is_superuser=True).exclude(email='').values_list('email', flat=True)
+    )
+
+
+def procesar_lote(tamanio=TAMANIO_LOTE):
+    """Envía un lote de correos pendientes y devuelve (enviados, con error)"""
+    correos = reclamar_lote(tamanio)
+    if not correos:
+        return 0, 0
+
+    administradores = None
+    enviados, errores = [], []
+    conexion = get_connection()
+    try:
+        conexion.open()
+        for correo in correos:
+            destinatarios = correo.destinatarios
+            if not destinatarios:
+                if administradores is None:
+                    administradores = _correos_administradores()
+                destinatarios = administradores
+            if not destinatarios:
+                # Queda pendiente: sale cuando algún superusuario cargue su email
+                errores.append((correo, ValueError('Sin destinatarios: ningún superusuario tiene email')))
+                continue
+            try:
+                cantidad = EmailMessage(
+                    correo.asunto, correo.cuerpo, correo.remitente or None, destinatarios,
+                    connection=conexion,
+                ).send()
+            except Exception as error:
+                errores.append((correo, error))
+                # La conexión puede haber quedado inutilizable: se abre otra
+                conexion.close()
+                conexion.open()
+            else:
+                if cantidad:
+                    enviados.append(correo.pk)
+                else:
+                    errores.append((correo, RuntimeError('El backend de correo no envió el mensaje')))
+    except Exception as error:
+        # No se pudo conectar: todo el lote (lo que no salió) se reintenta
+        pendientes = {correo.pk for correo, _ in errores} | set(enviados)
+        errores += [(correo, error) for correo in correos if correo.pk not in pendientes]
+    finally:
+        conexion.close()
+
+    ahora = timezone.now()
+    CorreoPendiente.objects.filter(pk__in=enviados).update(
+        estado=CorreoPendiente.ENVIADO, fecha_envio=ahora, reclamo=None, intentos=F('intentos') + 1,
+    )
+    for correo, error in errores:
+        correo.intentos += 1
+        correo.ultimo_error = f'{type(error).__name__}: {error}'
+        correo.reclamo = None
+        if correo.intentos >= MAX_INTENTOS:
+            correo.estado = CorreoPendiente.FALLIDO
+        else:
+            correo.proximo_intento = ahora + espera_reintento(correo.intentos)
+    CorreoPendiente.objects.bulk_update(
+        [correo for correo, _ in errores],
+        ['intentos', 'ultimo_error', 'reclamo', 'estado', 'proximo_intento'],
+    )
+    return len(enviados), len(errores)
@@ -0,0 +1,203 @@
+"""
+Datos de ejemplo del sitio: categorías, usuarios de prueba, artículos reales
+y la página "Acerca de". Los usa el comando generar_datos, que además arma
+artículos y comentarios sintéticos a partir de estos textos.
+"""
+
+
+# (nombre, descripción, peso): el peso es la proporción de artículos
+# sintéticos de cada categoría
+CATEGORIAS = [
+    ('Fútbol', 'Noticias sobre fútbol nacional e internacional', 40),
+    ('Básquet', 'Todo sobre básquetbol profesional y amateur', 18),
+    ('Tenis', 'Grand Slams, ATP, WTA y más', 12),
+    ('Fórmula 1', 'El mundo del automovilismo de alta velocidad', 12),
+    ('Vóley', 'Voleibol nacional e internacional', 8),
+    ('Rugby', 'Los Pumas y el rugby mundial', 10),
+]
+
+# Contraseña de todos los usuarios generados
+PASSWORD = 'asd123456'
+
+USUARIOS = [
+    ('colaborador1', 'María', 'González', 'colaborador'),
+    ('colaborador2', 'Juan', 'Pérez', 'colaborador'),
+    ('miembro1', 'Ana', 'Martínez', 'miembro'),
+    ('miembro2', 'Carlos', 'López', 'miembro'),
+    ('administrador1', 'Pedro', 'Hernandez', 'administrador'),
+]
+
+ARTICULOS = [
+    {
+        'titulo': 'Messi rompe otro récord en el Inter Miami',
+        'contenido': '''Lionel Messi continúa escribiendo historia en la MLS. El astro argentino alcanzó su gol número 850 en su carrera profesional tras marcar un doblete en la victoria del Inter Miami por 3-1 ante Orlando City.
+
+El primer gol llegó a los 23 minutos tras una asistencia de Jordi Alba, mientras que el segundo fue un tiro libre magistral a los 67 minutos que dejó sin opciones al arquero rival.
+
+Con esta actuación, Messi se consolida como el máximo goleador extranjero en la historia de la MLS en una sola temporada, superando las expectativas desde su llegada al fútbol estadounidense.
+
+El técnico Gerardo Martino destacó: "Leo sigue demostrando por qué es el mejor. Su influencia va más allá de los números, eleva el nivel de todo el equipo."
+
+El Inter Miami se mantiene en la cima de la Conferencia Este con 67 puntos, a falta de cuatro jornadas para el final de la temporada regular.''',
+        'categoria': 'Fútbol',
+        'destacado': True,
+    },
+    {
+        'titulo': 'Ubeda, el apuntado por La Bombonera tras la eliminación de Boca ante Racing',
+        'contenido': '''Boca perdió 1-0 con Racing en las semifinales del Torneo Clausura 2025 y Claudio Ubeda fue el gran apuntado por La Bombonera tras la eliminación.
+
+El Xeneize jugó un primer tiempo aceptable ante La Academia, aunque prácticamente no pateó al arco. En la segunda etapa, el conjunto local se apagó, dejó crecer a Racing y fue víctima del regreso al gol de Adrián Maravilla Martínez.''',
+        'categoria': 'Fútbol',
+        'destacado': True,
+    },
+    {
+        'titulo': 'Argentina convoca a juveniles para el Sudamericano Sub-20',
+        'contenido': '''La Selección Argentina Sub-20 dio a conocer la lista de convocados para el Campeonato Sudamericano que se disputará en Venezuela el próximo mes.
+Javier Mascherano, técnico del combinado albiceleste, incluyó en la nómina a varias promesas que vienen destacándose en el fútbol local y europeo.
+Entre los nombres más resonantes figuran Claudio Echeverri (River Plate), Franco Mastantuono (River Plate) y Agustín Ruberto (River Plate), considerados las joyas del fútbol argentino juvenil.
+"Es un grupo con mucho talento y hambre de triunfo", expresó Mascherano en conferencia de prensa. "El objetivo es claro: clasificar al Mundial Sub-20 y hacerlo de la mejor manera posible."
+El Sudamericano arranca el 23 de enero y Argentina integra el Grupo B junto a Brasil, Colombia, Ecuador y Paraguay.''',
+        'categoria': 'Fútbol',
+        'destacado': False,
+    },
+    {
+        'titulo': 'Eduardo Domínguez: Llegaron a la final dos de los mejores equipos del país',
+        'contenido': '''Estudiantes eliminó a Gimnasia en las semifinales del Torneo Clausura 2025 por el triunfo por 1-0 y ahora jugará la final, en la que espera Racing. Eduardo Domínguez, DT del Pincha, analizó y celebró la clasificación al duelo decisivo.''',
+        'categoria': 'Fútbol',
+        'destacado': False,
+    },
+    {
+        'titulo': 'Campazzo brilla en su regreso a la NBA',
+        'contenido': '''Facundo Campazzo tuvo una destacada actuación en su primer partido tras regresar a la NBA. El base cordobés aportó 14 puntos, 8 asistencias y 4 rebotes en los 28 minutos que estuvo en cancha.
+
+El equipo de Campazzo se impuso por 112-98 ante los Milwaukee Bucks, en un partido donde el argentino demostró por qué es considerado uno de los mejores armadores sudamericanos de la historia.
+
+"Estoy muy feliz de estar de vuelta", declaró Facu al término del encuentro. "Extrañaba mucho competir al máximo nivel y mi familia está feliz también."
+
+El entrenador Steve Kerr elogió el desempeño del argentino: "Facundo nos dio exactamente lo que necesitábamos: ritmo, defensa y liderazgo en momentos clave."
+
+Los números de Campazzo en el Real Madrid la temporada pasada (16.4 puntos y 7.1 asistencias promedio) convencieron a la franquicia para darle una nueva oportunidad en la mejor liga del mundo.''',
+        'categoria': 'Básquet',
+        'destacado': True,
+    },
+    {
+        'titulo': 'Liga Nacional: Obras Basket se consagra campeón',
+        'contenido': '''Obras Basket se proclamó campeón de la Liga Nacional de Básquet tras vencer a Quimsa por 4-2 en la serie final.
+
+El equipo dirigido por Gonzalo García selló el título con una victoria contundente por 91-75 en el Estadio Obras Sanitarias, ante una multitud que colmó las instalaciones.
+
+Leandro Bolmaro fue la gran figura de la final con 27 puntos, 6 rebotes y 5 asistencias, siendo elegido como el MVP de las finales.
+
+"Es un sueño hecho realidad para todos nosotros", expresó Bolmaro emocionado. "Este título es para toda la gente de Obras que nos apoyó incondicionalmente."
+
+Con este campeonato, Obras Basket suma su tercer título en la Liga Nacional y se clasifica automáticamente a la próxima edición de la Basketball Champions League Americas.''',
+        'categoria': 'Básquet',
+        'destacado': False,
+    },
+    {
+        'titulo': 'Sebastián Báez avanza a cuartos de final en Roland Garros',
+        'contenido': '''El tenista argentino Sebastián Báez dio el golpe en París al vencer al número 5 del mundo en cuatro sets (6-4, 3-6, 7-6, 6-2) y clasificarse a los cuartos de final de Roland Garros.
+
+Báez, de 23 años, mostró un tenis sólido y contundente ante uno de los mejores jugadores del circuito, aprovechando sus mejores armas: la devolución y el físico privilegiado en la arcilla.
+
+"Es el triunfo más importante de mi carrera", afirmó Báez tras el partido. "Jugué con mucha confianza y pude sostener el nivel en los momentos clave."
+
+En cuartos de final enfrentará al ganador del duelo entre Novak Djokovic y Lorenzo Musetti. De superar esa instancia, Báez se convertiría en el primer argentino en semifinales de Roland Garros desde Juan Martín del Potro en 2018.
+
+La actuación de Báez genera gran expectativa en Argentina, donde el tenis vuelve a tener un representante de jerarquía mundial.''',
+        'categoria': 'Tenis',
+        'destacado': True,
+    },
+    {
+        'titulo': 'Colapinto cerca de conseguir un asiento para la próxima temporada',
+        'contenido': '''Franco Colapinto estaría muy cerca de asegurar un lugar como piloto titular en la próxima temporada de Fórmula 1. Según fuentes cercanas al paddock, dos equipos habrían presentado ofertas formales al piloto argentino.
+
+El joven de 21 años viene realizando una temporada destacada como piloto de reserva y desarrollo, completando miles de kilómetros en los test de mitad de semana y demostrando un ritmo competitivo.
+
+"Franco ha impresionado a todos con su velocidad y madurez", comentó un representante de uno de los equipos interesados. "Definitivamente está listo para el desafío de la F1."
+
+De concretarse, Colapinto se convertiría en el primer piloto argentino titular en Fórmula 1 desde Gastón Mazzacane en 2001, un hito histórico para el automovilismo nacional.
+
+Las negociaciones están en etapa avanzada y se espera que haya novedades en las próximas semanas, antes del cierre de la temporada actual.''',
+        'categoria': 'Fórmula 1',
+        'destacado': False,
+    },
+    {
+        'titulo': 'Lando Norris es el campeón de F1, pero: ¿es un gran campeón?',
+        'contenido': '''El inglés terminó con el reinado de Max Verstappen al consagrarse con su McLaren, pero es un piloto que por ahora no emociona ni genera fanatismo.
+            “Todos los años hay un campeón, pero no siempre hay un gran campeón”. La frase la inmortalizó Ayrton Senna. La temporada 2025 de Fórmula 1 tuvo, como debía ser, un campeón: Lando Norris. La gran pregunta, parafraseando al enorme piloto brasileño es: ¿hubo un gran campeón?''',
+        'categoria': 'Fórmula 1',
+        'destacado': False,
+    },
+    {
+        'titulo': 'La selección argentina de vóley masculino se clasifica al Mundial',
+        'contenido': '''Argentina logró su clasificación al Mundial de Voleibol tras vencer a Chile por 3-0 (25-19, 25-22, 25-17) en el partido decisivo del Sudamericano disputado en Santiago.
+
+El equipo dirigido por Marcelo Méndez mostró un nivel superlativo durante todo el torneo, finalizando invicto con 6 victorias en igual cantidad de presentaciones.
+
+Luciano De Cecco, capitán del seleccionado, fue la figura del partido con 12 puntos y una dirección impecable del juego. "Estamos muy contentos por lograr el objetivo", declaró el experimentado armador.
+
+Bruno Lima aportó 18 puntos en la victoria, consolidándose como el máximo anotador argentino del torneo con 96 puntos en total.
+
+El Mundial se disputará en Polonia entre agosto y septiembre del próximo año, y Argentina buscará superar su mejor participación histórica (5° puesto en 1982).''',
+        'categoria': 'Vóley',
+        'destacado': False,
+    },
+    {
+        'titulo': 'Los Pumas derrotan a los All Blacks en histórico partido',
+        'contenido': '''Argentina escribió una página dorada en su historia al vencer a Nueva Zelanda por 38-30 en un épico encuentro disputado en el Estadio Único de La Plata ante 53.000 espectadores.
+
+Los Pumas dominaron desde el inicio con un juego inteligente y agresivo, aprovechando cada oportunidad para vulnerar la defensa neozelandesa. Tries de Santiago Carreras, Mateo Carreras y Pablo Matera encaminaron el triunfo argentino.
+
+"Es una victoria histórica para el rugby argentino", expresó emocionado el capitán Julián Montoya. "El equipo jugó de manera perfecta y demostró que podemos competir de igual a igual con las mejores selecciones del mundo."
+
+La bota de Emiliano Boffelli fue fundamental con 18 puntos producto de conversiones y penales en momentos clave del partido.
+
+Con este resultado, Argentina se consolida en el segundo lugar del Rugby Championship y genera gran ilusión de cara al Mundial de Francia 2027.''',
+        'categoria': 'Rugby',
+        'destacado': False,
+    },
+]
+
+ACERCA_DE_CONTENIDO = """TodoDeporte nació en 2025 como un proyecto del Informatorio Chaco, con la misión de acercar las mejores noticias deportivas a todos los argentinos.
+
+Somos un equipo apasionado por el deporte en todas sus formas, comprometidos con ofrecer información precisa, análisis profundos y cobertura en tiempo real de los eventos más importantes.
+
+Nuestra plataforma cubre fútbol, básquet, tenis, automovilismo, vóley, rugby y mucho más, siempre con la perspectiva argentina pero sin perder de vista el panorama internacional."""
+
+ACERCA_DE_INTEGRANTES = """• Facundo Lovey - Programador
+• Alejandro Martinez - Programador
+• Dihué De Cuadra - Programador
+• José Centurión - Programador"""
+
+
+# ---------- Vocabulario para los datos sintéticos ----------
+
+# Protagonistas de los títulos, por categoría
+PROTAGONISTAS = {
+    'Fútbol': ['Boca', 'River', 'Racing', 'Independiente', 'Estudiantes', 'San Lorenzo', 'la Selección', 'Messi', 'Scaloni', 'Mastantuono'],
+    'Básquet': ['Obras', 'Quimsa', 'Boca', 'Instituto', 'Campazzo', 'Bolmaro', 'Deck', 'la Selección de básquet'],
+    'Tenis': ['Báez', 'Cerúndolo', 'Etcheverry', 'Navone', 'Podoroska', 'Djokovic', 'Alcaraz', 'Sinner'],
+    'Fórmula 1': ['Colapinto', 'Norris', 'Verstappen', 'Leclerc', 'Hamilton', 'Alpine', 'McLaren', 'Ferrari'],
+    'Vóley': ['De Cecco', 'Bruno Lima', 'la Selección de vóley', 'Las Panteras', 'Ciudad Vóley', 'UPCN'],
+    'Rugby': ['Los Pumas', 'Montoya', 'Boffelli', 'Carreras', 'Matera', 'Los Pumas 7s', 'Pampas'],
+}
+
+ACCIONES = [
+    'gana y se acerca a la cima', 'cae en un partido polémico', 'rescata un empate sobre el final',
+    'confirma su lista de convocados', 'presenta a su nuevo refuerzo', 'sufre una lesión antes del debut',
+    'vuelve a la victoria', 'se despide del torneo', 'avanza a la siguiente ronda', 'rompe un récord histórico',
+    'renueva su contrato', 'analiza la derrota', 'prepara la revancha', 'se consagra campeón',
+]
+
+TORNEOS = ['', '', ' en la fecha', ' en el clásico', ' de visitante', ' en casa', ' en la final', ' en el debut']
+
+COMENTARIOS = [
+    '¡Qué partidazo!', 'No coincido con la nota, fue un robo.', 'Muy buen análisis.',
+    'Se veía venir después de la fecha pasada.', 'Hay que bancar al técnico.', 'Impresionante lo que hizo.',
+    'El arbitraje fue lamentable.', 'Vamos que se puede, falta mucho.', 'Gran nota, gracias por la cobertura.',
+    'Con este nivel no alcanza.', 'Ojalá se recupere pronto.', 'Histórico, lo vi en la cancha.',
+]
+
+NOMBRES = ['Lucía', 'Martín', 'Sofía', 'Mateo', 'Valentina', 'Santiago', 'Camila', 'Tomás', 'Julieta', 'Nicolás']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Fernández', 'Sosa', 'Romero', 'Benítez', 'Acosta', 'Medina', 'Herrera', 'Silva']
@@ -1,50 +1,86 @@
+import math
+from functools import wraps
+
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.contrib.auth import SESSION_KEY
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
 
-# Solo administradores
-def administrador_required(view_func):
-    @login_required
-    def wrapper(request, *args, **kwargs):
-        # Permitir acceso a superusuarios
-        if request.user.is_superuser:
-            return view_func(request, *args, **kwargs)
-        # Verificar si el usuario tiene perfil y es administrador
-        if hasattr(request.user, 'perfil_users'):
-            if request.user.perfil_users.rol == 'administrador':
+from . import limites
+from .autenticacion import tiene_rol
+
+# Acceso por rol: el del usuario o uno superior. Los superusuarios cuentan
+# como administradores. El rol ya viene resuelto con el usuario de la sesión
+# (ver autenticacion.py), así que no hay consultas extra.
+def rol_required(minimo):
+    def decorador(view_func):
+        @login_required
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if tiene_rol(request.user, minimo):
                 return view_func(request, *args, **kwargs)
-        raise PermissionDenied
-    return wrapper
+            raise PermissionDenied
+        return wrapper
+    return decorador
+
+# Solo administradores
+administrador_required = rol_required('administrador')
 
 # Solo colaboradores o administradores
-def colaborador_required(view_func):
-    @login_required
-    def wrapper(request, *args, **kwargs):
-        # Permitir acceso a superusuarios
-        if request.user.is_superuser:
-            return view_func(request, *args, **kwargs)
-        # Verificar si el usuario tiene perfil y es colaborador o administrador
-        if hasattr(request.user, 'perfil_users'):
-            if request.user.perfil_users.rol in ['colaborador', 'administrador']:
-                return view_func(request, *args, **kwargs)
-        raise PermissionDenied
-    return wrapper
+colaborador_required = rol_required('colaborador')
 
 # Solo miembros o superiores (miembro, colaborador o admin)
-def miembro_required(view_func):
-    @login_required
-    def wrapper(request, *args, **kwargs):
-        # Permitir acceso a superusuarios
-        if request.user.is_superuser:
-            return view_func(request, *args, **kwargs)
-        # Verificar si el usuario tiene perfil y es miembro o superior
-        if hasattr(request.user, 'perfil_users'):
-            if request.user.perfil_users.rol in ['miembro', 'colaborador', 'administrador']:
-                return view_func(request, *args, **kwargs)
-        raise PermissionDenied
-    return wrapper
+miembro_required = rol_required('miembro')
 
 # Visitantes — no requiere login
 def visitante_required(view_func):
     def wrapper(request, *args, **kwargs):
         return view_func(request, *args, **kwargs)
     return wrapper
+
+def ip_cliente(request):
+    """
+    IP del cliente. Detrás de PROXIES_CONFIABLES proxies, REMOTE_ADDR es la del
+    último proxy: la del cliente es la que anotó en X-Forwarded-For el primero
+    de ellos (las de más a la izquierda las puede inventar el cliente).
+    """
+    proxies = settings.PROXIES_CONFIABLES
+    if proxies:
+        saltos = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(saltos) >= proxies:
+            return saltos[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# Límite de escrituras (POST) por usuario e IP, con token bucket compartido
+# entre procesos (ver limites.py). Se decide con la sesión y la IP, sin
+# consultar el usuario, así el 429 sale antes de competir por el lock de SQLite.
+def limitar_escrituras(nombre, rafaga, por_minuto):
+    def decorador(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            por_segundo = por_minuto / 60
+            # La IP siempre (con más margen: puede ser una red compartida), y el
+            # usuario si inició sesión: así cambiar de cookie no evita el límite
+            baldes = [(f'{nombre}:ip:{ip_cliente(request)}', rafaga * 4, por_segundo * 4)]
+            usuario_id = request.session.get(SESSION_KEY)
+            if usuario_id:
+                baldes.append((f'{nombre}:usuario:{usuario_id}', rafaga, por_segundo))
+
+            # Todos o ninguno: un pedido rechazado no gasta fichas
+            espera = limites.consumir_todos(baldes)
+            if espera:
+                respuesta = HttpResponse(
+                    'Demasiadas solicitudes. Esperá unos segundos y volvé a intentarlo.',
+                    status=429,
+                    content_type='text/plain; charset=utf-8',
+                )
+                respuesta['Retry-After'] = str(math.ceil(espera))
+                return respuesta
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorador
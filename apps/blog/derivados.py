@@ -0,0 +1,99 @@
+"""
+Generación en segundo plano de las miniaturas de `imagen_destacada`.
+
+Al guardar un artículo con una imagen nueva, signals.py encola el trabajo en
+un pool de procesos acotado (MINIATURAS_PROCESOS) y el request responde sin
+esperar. Cuando el proceso termina se marca el artículo con
+`imagen_derivados` y desde ese momento las plantillas usan srcset; mientras
+tanto se sigue sirviendo la imagen original. Las miniaturas de una imagen
+reemplazada, quitada o de un artículo borrado se eliminan con
+borrar_derivados().
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .cache import invalidar
+from .cache_paginas import ARTICULOS, etiqueta_articulo, etiqueta_categoria
+from .miniaturas import generar_derivados, nombres_derivados
+from .models import Articulo
+
+
+logger = logging.getLogger(__name__)
+
+PROCESOS = getattr(settings, 'MINIATURAS_PROCESOS', 2)
+
+_pool = None
+_candado = threading.Lock()
+
+
+def crear_pool(procesos=PROCESOS):
+    # "spawn": los procesos no heredan las conexiones ni los hilos del servidor
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _obtener_pool():
+    global _pool
+    with _candado:
+        if _pool is None:
+            _pool = crear_pool()
+        return _pool
+
+
+def enviar(pool, nombre):
+    """Encola la generación de las miniaturas de `nombre` en `pool`"""
+    return pool.submit(generar_derivados, default_storage.path(nombre), str(settings.MEDIA_ROOT), nombre)
+
+
+def marcar_generados(articulo_id, nombre):
+    """
+    Marca que ya existen las miniaturas de `nombre`, salvo que la imagen del
+    artículo haya cambiado mientras se generaban.
+    """
+    fila = (
+        Articulo.objects.filter(pk=articulo_id, imagen_destacada=nombre)
+        .values_list('categoria_id', 'imagen_derivados').first()
+    )
+    if fila is None:
+        # La imagen cambió mientras se generaban: estas ya no las usa el artículo
+        borrar_derivados(nombre)
+        return False
+    categoria_id, anterior = fila
+    # update(): no pasa por save() ni por las señales de contadores
+    Articulo.objects.filter(pk=articulo_id, imagen_destacada=nombre).update(imagen_derivados=nombre)
+    invalidar(ARTICULOS, etiqueta_articulo(articulo_id), etiqueta_categoria(categoria_id))
+    if anterior and anterior != nombre:
+        # Después de confirmar: hasta entonces las páginas siguen apuntando a las anteriores
+        transaction.on_commit(lambda: borrar_derivados(anterior))
+    return True
+
+
+def borrar_derivados(nombre):
+    """Borra las miniaturas de `nombre` si ningún artículo usa esa imagen"""
+    if Articulo.objects.filter(Q(imagen_destacada=nombre) | Q(imagen_derivados=nombre)).exists():
+        return
+    for derivado in nombres_derivados(nombre):
+        default_storage.delete(derivado)
+
+
+def _terminado(articulo_id, futuro):
+    # Corre en un hilo del pool, fuera de cualquier request
+    try:
+        marcar_generados(articulo_id, futuro.result())
+    except Exception:
+        logger.exception('No se pudieron generar las miniaturas del artículo %s', articulo_id)
+    finally:
+        connection.close()
+
+
+def encolar(articulo_id, nombre):
+    """Genera las miniaturas en segundo plano y marca el artículo al terminar"""
+    futuro = enviar(_obtener_pool(), nombre)
+    futuro.add_done_callback(lambda futuro: _terminado(articulo_id, futuro))
+    return futuro
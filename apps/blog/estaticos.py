@@ -0,0 +1,200 @@
+"""
+Archivos estáticos con hash en el nombre, precomprimidos y con caché de un año.
+
+- AlmacenEstaticos (STORAGES['staticfiles']) minifica el CSS y el JS del
+  proyecto al copiarlos y guarda cada archivo también con el hash de su
+  contenido en el nombre (styles.3f2a9c1b.css), con el manifiesto de Django.
+- "python manage.py construir_estaticos" corre collectstatic y deja al lado
+  de cada archivo de texto su versión .gz (y .br si está instalado brotli).
+- EstaticosMiddleware sirve STATIC_ROOT desde Django, sin otro servidor: elige
+  la versión comprimida según Accept-Encoding y marca los nombres con hash
+  como inmutables por un año. Si cambia el archivo cambia el nombre, así que
+  el navegador nunca vuelve a preguntar por él.
+
+Mientras no se construyan los estáticos (desarrollo, tests) las URLs son las
+de siempre y los sirve runserver como antes.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestFilesMixin, ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import minificar
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli solo se genera .gz
+    brotli = None
+
+
+MINIFICADORES = {'.css': minificar.css, '.js': minificar.js}
+
+# Los que vale la pena comprimir: las imágenes PNG/JPG ya vienen comprimidas
+COMPRIMIBLES = frozenset({'.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.html'})
+
+# En orden de preferencia cuando el navegador acepta varias
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+UN_ANIO = 365 * 24 * 60 * 60
+
+
+# El hash que agrega el manifiesto: styles.3f2a9c1b04de.css
+_HASH = re.compile(r'\.[0-9a-f]{12}(?=\.[^./]+$)')
+
+
+def _del_proyecto(nombre):
+    """True si el archivo (o el original de una copia con hash) viene de STATICFILES_DIRS"""
+    nombre = _HASH.sub('', nombre)
+    return any(os.path.isfile(os.path.join(directorio, nombre)) for directorio in settings.STATICFILES_DIRS)
+
+
+class AlmacenEstaticos(ManifestStaticFilesStorage):
+    def _save(self, name, content):
+        minificador = MINIFICADORES.get(os.path.splitext(name)[1])
+        if minificador and '.min.' not in name and _del_proyecto(name):
+            # post_process ya lo leyó para calcular el hash
+            content.seek(0)
+            content = ContentFile(minificador(content.read().decode('utf-8')).encode('utf-8'))
+        return super()._save(name, content)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # No está en el manifiesto (no se corrió construir_estaticos): el nombre original
+            return name
+
+    def url(self, name, force=False):
+        # En producción el nombre con hash aunque DEBUG siga activo
+        return super().url(name, force=force or settings.PRODUCCION)
+
+
+def comprimir(raiz):
+    """
+    Escribe las versiones .gz (y .br) de los archivos de texto de `raiz`,
+    solo si salen más chicas. Devuelve {extensión: (archivos, bytes antes, bytes después)}.
+    """
+    totales = {}
+    for directorio, _, archivos in os.walk(raiz):
+        for archivo in archivos:
+            if os.path.splitext(archivo)[1] not in COMPRIMIBLES:
+                continue
+            ruta = os.path.join(directorio, archivo)
+            with open(ruta, 'rb') as original:
+                datos = original.read()
+            variantes = {'.gz': gzip.compress(datos, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variantes['.br'] = brotli.compress(datos, quality=11)
+            for sufijo, comprimido in variantes.items():
+                if len(comprimido) >= len(datos):
+                    continue
+                with open(ruta + sufijo, 'wb') as destino:
+                    destino.write(comprimido)
+                cantidad, antes, despues = totales.get(sufijo, (0, 0, 0))
+                totales[sufijo] = (cantidad + 1, antes + len(datos), despues + len(comprimido))
+    return totales
+
+
+def _codificaciones_aceptadas(request):
+    aceptadas = set()
+    for parte in request.headers.get('Accept-Encoding', '').split(','):
+        nombre, _, parametros = parte.partition(';')
+        if parametros.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+class EstaticosMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        url = urlsplit(settings.STATIC_URL)
+        # Con un STATIC_URL en otro dominio (CDN) no hay nada que servir acá
+        self.prefijo = None if url.netloc else url.path
+        self.archivos = None
+
+    def __call__(self, request):
+        if self.prefijo and request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefijo):
+            archivo = self.indice().get(request.path_info[len(self.prefijo):])
+            if archivo is not None:
+                return self.servir(request, archivo)
+        return self.get_response(request)
+
+    def indice(self):
+        """
+        {nombre: (ruta, tamaño, fecha, inmutable, {codificación: (ruta, tamaño)})}
+        de STATIC_ROOT. Se arma una vez por proceso: después de construir los
+        estáticos hay que reiniciar, como con cualquier deploy.
+        """
+        if self.archivos is not None:
+            return self.archivos
+        con_hash = set()
+        if isinstance(staticfiles_storage, ManifestFilesMixin):
+            # Del archivo: el almacén pudo cargarlo antes de la construcción
+            con_hash.update(staticfiles_storage.load_manifest()[0].values())
+        archivos = {}
+        raiz = settings.STATIC_ROOT
+        for directorio, _, nombres in os.walk(raiz or ''):
+            for nombre in nombres:
+                if nombre.endswith(('.gz', '.br')):
+                    continue
+                ruta = os.path.join(directorio, nombre)
+                relativo = os.path.relpath(ruta, raiz).replace(os.sep, '/')
+                estado = os.stat(ruta)
+                variantes = {}
+                for codificacion, sufijo in CODIFICACIONES:
+                    try:
+                        comprimido = os.stat(ruta + sufijo)
+                    except OSError:
+                        continue
+                    # Una versión comprimida más vieja que el original quedó de otra construcción
+                    if comprimido.st_mtime >= estado.st_mtime:
+                        variantes[codificacion] = (ruta + sufijo, comprimido.st_size)
+                archivos[relativo] = (ruta, estado.st_size, estado.st_mtime, relativo in con_hash, variantes)
+        self.archivos = archivos
+        return archivos
+
+    def servir(self, request, archivo):
+        ruta, tamanio, fecha, inmutable, variantes = archivo
+        if not inmutable and not was_modified_since(request.headers.get('If-Modified-Since'), fecha):
+            return HttpResponseNotModified()
+
+        codificacion = None
+        aceptadas = _codificaciones_aceptadas(request)
+        for nombre in variantes:
+            if nombre in aceptadas:
+                codificacion = nombre
+                ruta, tamanio = variantes[nombre]
+                break
+
+        tipo, _ = mimetypes.guess_type(archivo[0])
+        tipo = tipo or 'application/octet-stream'
+        if tipo.startswith('text/') or tipo in ('application/javascript', 'image/svg+xml'):
+            tipo += '; charset=utf-8'
+        if request.method == 'HEAD':
+            respuesta = HttpResponse(content_type=tipo)
+        else:
+            respuesta = FileResponse(open(ruta, 'rb'), content_type=tipo, filename=os.path.basename(archivo[0]))
+        respuesta['Content-Length'] = tamanio
+        respuesta['Last-Modified'] = http_date(fecha)
+        if codificacion:
+            respuesta['Content-Encoding'] = codificacion
+        if variantes:
+            patch_vary_headers(respuesta, ['Accept-Encoding'])
+        if inmutable:
+            patch_cache_control(respuesta, public=True, max_age=UN_ANIO, immutable=True)
+        else:
+            # Sin hash el nombre puede seguir igual con otro contenido: siempre se revalida
+            patch_cache_control(respuesta, no_cache=True)
+        return respuesta
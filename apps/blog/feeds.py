@@ -0,0 +1,246 @@
+"""
+Feeds RSS 2.0, Atom y JSON Feed del sitio y de cada categoría.
+
+El cuerpo se genera por partes (StreamingHttpResponse): se escribe un
+artículo por vez a medida que llegan del cursor de la base, así que un feed
+grande nunca está entero en memoria mientras se arma.
+
+El ETag sale solo de las versiones de caché de las etiquetas del feed (las
+mismas que invalidan las señales para la caché de páginas), de modo que un
+lector que ya tiene la última versión recibe un 304 sin ninguna consulta. Si
+el feed completo es chico se guarda en la caché hasta el próximo cambio.
+"""
+import json
+from calendar import timegm
+from xml.sax.saxutils import escape, quoteattr
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import replica
+from .cache import CATEGORIAS_GLOBALES
+from .cache_paginas import ARTICULOS, USUARIOS, etag_etiquetas, etiqueta_categoria
+from .models import Articulo, Categoria
+
+
+TITULO_SITIO = 'TodoDeporte'
+DESCRIPCION_SITIO = 'Noticias y artículos de deporte'
+
+FEED_ARTICULOS = 50
+# Artículos que se leen por vez del cursor de la base
+TAMANIO_TANDA = 20
+# Solo se guarda en la caché el feed que no pasa de este tamaño
+MAXIMO_EN_CACHE = 1024 * 1024
+# Igual se invalida con cada cambio; esto es solo el máximo
+TIEMPO_FEED = 60 * 60 * 24
+
+CAMPOS_FEED = (
+    'id', 'titulo', 'resumen', 'imagen_destacada', 'fecha_creacion', 'fecha_actualizacion',
+    'categoria__id', 'categoria__nombre',
+    'autor__id', 'autor__username', 'autor__first_name', 'autor__last_name',
+)
+
+
+# ---------- Formatos ----------
+# Cada uno recibe el canal (dict) y un iterador de artículos y devuelve
+# partes de texto.
+
+def _fecha_rss(fecha):
+    return http_date(timegm(fecha.utctimetuple()))
+
+
+def _nombre_autor(articulo):
+    autor = articulo.autor
+    if autor is None:
+        return TITULO_SITIO
+    return autor.get_full_name() or autor.username
+
+
+def _rss(canal, articulos):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+    yield (
+        f'<title>{escape(canal["titulo"])}</title>'
+        f'<link>{escape(canal["enlace"])}</link>'
+        f'<description>{escape(canal["descripcion"])}</description>'
+        f'<language>es</language>'
+        f'<lastBuildDate>{_fecha_rss(canal["actualizado"])}</lastBuildDate>'
+        f'<atom:link href={quoteattr(canal["enlace_feed"])} rel="self"/>'
+    )
+    for articulo in articulos:
+        yield (
+            f'<item><title>{escape(articulo.titulo)}</title>'
+            f'<link>{escape(articulo.enlace)}</link>'
+            f'<guid isPermaLink="true">{escape(articulo.enlace)}</guid>'
+            f'<description>{escape(articulo.resumen)}</description>'
+            f'<dc:creator>{escape(_nombre_autor(articulo))}</dc:creator>'
+            f'<category>{escape(articulo.categoria.nombre)}</category>'
+            f'<pubDate>{_fecha_rss(articulo.fecha_creacion)}</pubDate></item>'
+        )
+    yield '</channel></rss>\n'
+
+
+def _atom(canal, articulos):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="es">'
+    yield (
+        f'<title>{escape(canal["titulo"])}</title>'
+        f'<subtitle>{escape(canal["descripcion"])}</subtitle>'
+        f'<link href={quoteattr(canal["enlace"])} rel="alternate"/>'
+        f'<link href={quoteattr(canal["enlace_feed"])} rel="self"/>'
+        f'<id>{escape(canal["enlace"])}</id>'
+        f'<updated>{canal["actualizado"].isoformat()}</updated>'
+    )
+    for articulo in articulos:
+        yield (
+            f'<entry><title>{escape(articulo.titulo)}</title>'
+            f'<link href={quoteattr(articulo.enlace)} rel="alternate"/>'
+            f'<id>{escape(articulo.enlace)}</id>'
+            f'<published>{articulo.fecha_creacion.isoformat()}</published>'
+            f'<updated>{articulo.fecha_actualizacion.isoformat()}</updated>'
+            f'<author><name>{escape(_nombre_autor(articulo))}</name></author>'
+            f'<category term={quoteattr(articulo.categoria.nombre)}/>'
+            f'<summary>{escape(articulo.resumen)}</summary></entry>'
+        )
+    yield '</feed>\n'
+
+
+def _json_feed(canal, articulos):
+    cabecera = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': canal['titulo'],
+        'description': canal['descripcion'],
+        'home_page_url': canal['enlace'],
+        'feed_url': canal['enlace_feed'],
+        'language': 'es',
+    }
+    # Se abre la lista de items a mano para poder escribirlos de a uno
+    yield json.dumps(cabecera, ensure_ascii=False)[:-1] + ', "items": ['
+    separador = ''
+    for articulo in articulos:
+        item = {
+            'id': articulo.enlace,
+            'url': articulo.enlace,
+            'title': articulo.titulo,
+            'summary': articulo.resumen,
+            'content_text': articulo.resumen,
+            'date_published': articulo.fecha_creacion.isoformat(),
+            'date_modified': articulo.fecha_actualizacion.isoformat(),
+            'authors': [{'name': _nombre_autor(articulo)}],
+            'tags': [articulo.categoria.nombre],
+        }
+        if articulo.imagen_destacada:
+            item['image'] = articulo.imagen_url
+        yield separador + json.dumps(item, ensure_ascii=False)
+        separador = ','
+    yield ']}\n'
+
+
+FORMATOS = {
+    'rss': ('application/rss+xml; charset=utf-8', _rss),
+    'atom': ('application/atom+xml; charset=utf-8', _atom),
+    'json': ('application/feed+json; charset=utf-8', _json_feed),
+}
+
+
+# ---------- Respuesta ----------
+
+def _articulos(request, categoria_id):
+    """Últimos artículos con categoría y autor en la misma consulta, leídos por tandas"""
+    articulos = Articulo.objects.select_related('categoria', 'autor').only(*CAMPOS_FEED)
+    if categoria_id is not None:
+        articulos = articulos.filter(categoria_id=categoria_id)
+    articulos = articulos.order_by('-fecha_creacion', '-id')[:FEED_ARTICULOS]
+
+    base = request.build_absolute_uri('/')[:-1]
+    for articulo in articulos.iterator(chunk_size=TAMANIO_TANDA):
+        articulo.enlace = base + reverse('detalle_articulo', args=[articulo.pk])
+        if articulo.imagen_destacada:
+            articulo.imagen_url = request.build_absolute_uri(articulo.imagen_destacada.url)
+        yield articulo
+
+
+def _guardar_al_terminar(clave, etag, ultima, partes):
+    """Deja pasar las partes y, si el feed terminó y es chico, lo guarda en la caché"""
+    guardadas, tamanio = [], 0
+    for parte in partes:
+        parte = parte.encode()
+        if guardadas is not None:
+            tamanio += len(parte)
+            if tamanio <= MAXIMO_EN_CACHE:
+                guardadas.append(parte)
+            else:
+                guardadas = None
+        yield parte
+    if guardadas is not None:
+        cache.set(clave, (etag, ultima, b''.join(guardadas)), TIEMPO_FEED)
+
+
+def _con_cabeceras(respuesta, etag, ultima):
+    if etag is not None:
+        respuesta['ETag'] = etag
+    if ultima is not None:
+        respuesta['Last-Modified'] = http_date(ultima)
+    # El ETag es barato de comprobar: los lectores revalidan en cada consulta
+    patch_cache_control(respuesta, no_cache=True)
+    return respuesta
+
+
+def respuesta_feed(request, formato, categoria_id=None):
+    """Feed de los últimos artículos del sitio o de una categoría"""
+    if formato not in FORMATOS:
+        raise Http404
+    tipo, generar = FORMATOS[formato]
+
+    # USUARIOS: el feed muestra el nombre de cada autor
+    if categoria_id is None:
+        etiquetas = [ARTICULOS, CATEGORIAS_GLOBALES, USUARIOS]
+    else:
+        etiquetas = [etiqueta_categoria(categoria_id), CATEGORIAS_GLOBALES, USUARIOS]
+    etag = etag_etiquetas(request, etiquetas)
+
+    # Sin consultas: el lector ya tiene esta versión
+    no_modificado = get_conditional_response(request, etag=etag)
+    if no_modificado is not None:
+        return _con_cabeceras(no_modificado, etag, None)
+
+    clave = f'blog:feed:{request.get_host()}:{request.path}'
+    guardado = cache.get(clave)
+    if guardado is not None and guardado[0] == etag:
+        _, ultima, cuerpo = guardado
+        return _con_cabeceras(HttpResponse(cuerpo, content_type=tipo), etag, ultima)
+
+    categorias = Categoria.objects.all()
+    if categoria_id is None:
+        titulo, descripcion, enlace = TITULO_SITIO, DESCRIPCION_SITIO, reverse('index')
+    else:
+        categorias = categorias.filter(pk=categoria_id)
+        nombre = categorias.values_list('nombre', flat=True).first()
+        if nombre is None:
+            raise Http404
+        titulo = f'{TITULO_SITIO} - {nombre}'
+        descripcion = f'Últimos artículos de {nombre}'
+        enlace = reverse('listar_por_categoria', args=[categoria_id])
+    # Las señales renuevan la fecha de la categoría con cada cambio de sus artículos
+    actualizado = categorias.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+    ultima = timegm(actualizado.utctimetuple()) if actualizado else None
+    actualizado = actualizado or timezone.now()
+
+    canal = {
+        'titulo': titulo,
+        'descripcion': descripcion,
+        'enlace': request.build_absolute_uri(enlace),
+        'enlace_feed': request.build_absolute_uri(),
+        'actualizado': actualizado,
+    }
+    partes = generar(canal, _articulos(request, categoria_id))
+    if not replica.lectura_al_dia():
+        # Réplica atrasada: el feed puede ser anterior a la versión del ETag
+        return _con_cabeceras(StreamingHttpResponse(partes, content_type=tipo), None, ultima)
+    respuesta = StreamingHttpResponse(_guardar_al_terminar(clave, etag, ultima, partes), content_type=tipo)
+    return _con_cabeceras(respuesta, etag, ultima)
@@ -0,0 +1,111 @@
+"""
+Token bucket compartido entre los procesos del servidor.
+
+Los baldes viven en un archivo mapeado en memoria (mmap) con una tabla de
+tamaño fijo: cada ranura guarda (hash de la clave, fichas, última recarga).
+Cada worker WSGI abre el mismo archivo y bloquea solo la ranura que toca con
+fcntl.lockf, así que no hay base de datos ni servidor extra de por medio.
+
+Si dos claves caen en la misma ranura, la nueva reemplaza a la vieja (que
+vuelve a empezar con el balde lleno): es un límite aproximado, pensado para
+frenar ráfagas, no para contabilidad exacta.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: el límite queda por proceso
+    fcntl = None
+
+
+RANURAS = 8192
+_RANURA = struct.Struct('<Qdd')  # hash, fichas, última recarga
+
+_mapa = None
+# lockf bloquea entre procesos; entre hilos del mismo proceso hace falta otro candado
+_candado = threading.Lock()
+
+
+def _ruta_archivo():
+    return getattr(settings, 'LIMITES_ARCHIVO', None) or os.path.join(
+        tempfile.gettempdir(), 'tododeporte-limites.bin'
+    )
+
+
+def _abrir():
+    global _mapa
+    if _mapa is None:
+        descriptor = os.open(_ruta_archivo(), os.O_RDWR | os.O_CREAT, 0o600)
+        tamanio = RANURAS * _RANURA.size
+        if os.fstat(descriptor).st_size < tamanio:
+            os.ftruncate(descriptor, tamanio)
+        _mapa = (descriptor, mmap.mmap(descriptor, tamanio))
+    return _mapa
+
+
+def _hash(clave):
+    # 0 marca una ranura vacía
+    return int.from_bytes(hashlib.blake2b(clave.encode(), digest_size=8).digest(), 'little') or 1
+
+
+def consumir(clave, capacidad, por_segundo, ahora=None):
+    """
+    Intenta gastar una ficha del balde de `clave`.
+
+    Devuelve 0 si se pudo, o los segundos que faltan para la próxima ficha.
+    """
+    return consumir_todos([(clave, capacidad, por_segundo)], ahora)
+
+
+def consumir_todos(baldes, ahora=None):
+    """
+    Gasta una ficha de cada balde de `baldes` [(clave, capacidad, por_segundo)]
+    solo si todos tienen: un pedido rechazado no consume nada.
+
+    Devuelve 0 si se pudo, o los segundos que faltan para que alcancen todos.
+    """
+    ahora = time.time() if ahora is None else ahora
+    ranuras = {}
+    for clave, capacidad, por_segundo in baldes:
+        codigo = _hash(clave)
+        ranuras[(codigo % RANURAS) * _RANURA.size] = (codigo, capacidad, por_segundo)
+    # Siempre en el mismo orden: dos procesos con ranuras en común no se bloquean entre sí
+    posiciones = sorted(ranuras)
+
+    with _candado:
+        descriptor, mapa = _abrir()
+        bloqueadas = []
+        try:
+            for posicion in posiciones:
+                if fcntl:
+                    fcntl.lockf(descriptor, fcntl.LOCK_EX, _RANURA.size, posicion)
+                bloqueadas.append(posicion)
+
+            estados = {}
+            espera = 0
+            for posicion in posiciones:
+                codigo, capacidad, por_segundo = ranuras[posicion]
+                guardado, fichas, ultima = _RANURA.unpack_from(mapa, posicion)
+                if guardado != codigo or ultima > ahora:
+                    fichas, ultima = float(capacidad), ahora
+                fichas = min(float(capacidad), fichas + (ahora - ultima) * por_segundo)
+                estados[posicion] = fichas
+                if fichas < 1:
+                    espera = max(espera, (1 - fichas) / por_segundo)
+
+            for posicion in posiciones:
+                fichas = estados[posicion] if espera else estados[posicion] - 1
+                _RANURA.pack_into(mapa, posicion, ranuras[posicion][0], fichas, ahora)
+            return espera
+        finally:
+            if fcntl:
+                for posicion in bloqueadas:
+                    fcntl.lockf(descriptor, fcntl.LOCK_UN, _RANURA.size, posicion)
@@ -0,0 +1,304 @@
+import json
+import logging
+import math
+import os
+import subprocess
+import time
+from contextlib import contextmanager
+from statistics import median
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.blog import urls
+from apps.blog.models import Articulo, Categoria, Comentario
+
+
+# Datos de cada escala: (artículos, comentarios, usuarios, calcular relacionados).
+# Siempre con la misma semilla, así dos corridas miden exactamente la misma base.
+# Los relacionados de 1m no se calculan: cargar los términos de todo el
+# corpus en memoria necesita unos 16 GB.
+ESCALAS = {
+    '1k': (1_000, 5_000, 100, True),
+    '100k': (100_000, 500_000, 10_000, True),
+    '1m': (1_000_000, 5_000_000, 100_000, False),
+}
+SEMILLA = 1
+
+MODOS = {
+    # Visitante con la caché de páginas caliente (el caso más común)
+    'anonimo': 'Visitante, caché caliente',
+    # Visitante, caché vaciada antes de cada request: el costo real de la vista
+    'sin_cache': 'Visitante, sin caché',
+    # Superusuario logueado: sin caché de páginas y con acceso a la gestión
+    'usuario': 'Superusuario logueado',
+}
+
+# Parámetros GET extra para que la vista haga su trabajo normal
+PARAMETROS = {
+    'buscar': {'q': 'Messi'},
+    'api_articulos': {'limite': '100'},
+}
+USUARIO_BENCHMARK = 'benchmark'
+
+# Para no marcar como regresión el ruido de las vistas que tardan pocos milisegundos
+TOLERANCIA_MS = 2.0
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una lista ordenada"""
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+@contextmanager
+def usar_base(ruta):
+    """Apunta la conexión por defecto a otro archivo SQLite mientras dura el bloque"""
+    anterior = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = ruta
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = anterior
+
+
+@contextmanager
+def sin_avisos(nivel=logging.ERROR):
+    """Los 404/403 esperados no ensucian la salida"""
+    registro = logging.getLogger('django.request')
+    anterior = registro.level
+    registro.setLevel(nivel)
+    try:
+        yield
+    finally:
+        registro.setLevel(anterior)
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia (p50/p95/p99), consultas y bytes de cada URL del blog sobre datos generados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=ESCALAS, default='1k', help='Tamaño de la base (por defecto 1k)')
+        parser.add_argument('--iteraciones', type=int, default=20, help='Requests por URL y modo (por defecto 20)')
+        parser.add_argument(
+            '--modos', nargs='+', choices=MODOS, default=list(MODOS), help='Modos a medir (por defecto todos)',
+        )
+        parser.add_argument('--urls', nargs='+', help='Solo estos nombres de URL')
+        parser.add_argument(
+            '--directorio', default=os.path.join(settings.BASE_DIR, 'benchmarks'),
+            help='Dónde guardar las bases generadas y los resultados',
+        )
+        parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto en --directorio)')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para detectar regresiones')
+        parser.add_argument(
+            '--umbral', type=float, default=0.25,
+            help='Aumento relativo del p50 que cuenta como regresión (por defecto 0.25 = 25%%)',
+        )
+        parser.add_argument('--regenerar', action='store_true', help='Vuelve a generar la base de la escala')
+
+    def handle(self, *args, **options):
+        if options['iteraciones'] < 1:
+            raise CommandError('--iteraciones tiene que ser mayor que 0')
+        base_anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                base_anterior = json.load(archivo)
+
+        escala = options['escala']
+        directorio = options['directorio']
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f'base-{escala}.sqlite3')
+        sitemaps = os.path.join(directorio, f'sitemaps-{escala}')
+
+        with override_settings(SITEMAPS_ROOT=sitemaps):
+            if options['regenerar'] or not os.path.exists(ruta):
+                self.sembrar(ruta, escala)
+            with usar_base(ruta):
+                resultados = self._medir(options)
+
+        salida = options['salida'] or os.path.join(
+            directorio, f'resultados-{escala}-{commit_actual() or "sin-commit"}.json'
+        )
+        datos = {
+            'commit': commit_actual(),
+            'fecha': timezone.now().isoformat(),
+            'escala': escala,
+            'iteraciones': options['iteraciones'],
+            'resultados': resultados,
+        }
+        with open(salida, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, indent=1, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'Resultados en {salida}'))
+
+        if base_anterior is not None:
+            self._comparar(base_anterior, datos, options['umbral'])
+
+    # ---------- Datos ----------
+
+    def sembrar(self, ruta, escala):
+        """Genera la base en un archivo aparte y la pone en su lugar solo si terminó bien"""
+        articulos, comentarios, usuarios, relacionados = ESCALAS[escala]
+        self.stdout.write(f'Generando la base {escala} en {ruta}...')
+        temporal = f'{ruta}.generando'
+        for sufijo in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(temporal + sufijo):
+                os.remove(temporal + sufijo)
+
+        with usar_base(temporal):
+            call_command('migrate', verbosity=0)
+            call_command(
+                'generar_datos', articulos=articulos, comentarios=comentarios, usuarios=usuarios,
+                seed=SEMILLA, stdout=self.stdout,
+            )
+            call_command('generate_sitemaps', stdout=self.stdout)
+            if relacionados:
+                try:
+                    call_command('recompute_related', stdout=self.stdout)
+                except CommandError as error:
+                    # Sin numpy no hay relacionados; el detalle se mide igual
+                    self.stderr.write(f'Sin artículos relacionados: {error}')
+            User.objects.create_superuser(USUARIO_BENCHMARK, f'{USUARIO_BENCHMARK}@tododeporte.com', USUARIO_BENCHMARK)
+        os.replace(temporal, ruta)
+
+    def _argumentos(self):
+        """Valores reales para las URLs con parámetros: los objetos más pesados de la base"""
+        articulo_id = (
+            Articulo.objects.order_by('-total_comentarios', 'id').values_list('id', flat=True).first()
+        )
+        categoria_id = (
+            Categoria.objects.order_by('-total_articulos', 'id').values_list('id', flat=True).first()
+        )
+        comentario_id = (
+            Comentario.objects.filter(articulo_id=articulo_id).values_list('id', flat=True).first()
+        )
+        if None in (articulo_id, categoria_id, comentario_id):
+            raise CommandError('La base no tiene artículos, categorías o comentarios (probá con --regenerar)')
+        por_nombre = {
+            'editar_comentario': {'id': comentario_id},
+            'eliminar_comentario': {'id': comentario_id},
+            'editar_categoria': {'id': categoria_id},
+            'eliminar_categoria': {'id': categoria_id},
+        }
+        comunes = {'id': articulo_id, 'categoria_id': categoria_id, 'formato': 'rss', 'nombre': 'sitemap-0.xml'}
+        return por_nombre, comunes
+
+    def _urls(self, nombres):
+        por_nombre, comunes = self._argumentos()
+        rutas = {}
+        for patron in urls.urlpatterns:
+            if not patron.name or (nombres and patron.name not in nombres):
+                continue
+            argumentos = {
+                clave: por_nombre.get(patron.name, {}).get(clave, comunes[clave])
+                for clave in patron.pattern.converters
+            }
+            rutas[patron.name] = (reverse(patron.name, kwargs=argumentos), PARAMETROS.get(patron.name, {}))
+        return rutas
+
+    # ---------- Medición ----------
+
+    def _cliente(self, modo):
+        cliente = Client(HTTP_HOST='localhost')
+        if modo == 'usuario':
+            cliente.force_login(User.objects.get(username=USUARIO_BENCHMARK))
+        return cliente
+
+    def _pedir(self, cliente, ruta, parametros):
+        """Devuelve (segundos, consultas, bytes, status) de un GET completo"""
+        # El registro de consultas tiene un máximo de 9000: si se llena, el conteo sale mal
+        reset_queries()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            respuesta = cliente.get(ruta, parametros)
+            if respuesta.streaming:
+                tamanio = sum(len(parte) for parte in respuesta.streaming_content)
+            else:
+                tamanio = len(respuesta.content)
+            duracion = time.perf_counter() - inicio
+        respuesta.close()
+        return duracion, len(consultas), tamanio, respuesta.status_code
+
+    def _medir(self, options):
+        rutas = self._urls(options['urls'])
+        resultados = {}
+        with sin_avisos():
+            for modo in options['modos']:
+                self.stdout.write(f'\n{MODOS[modo]}')
+                self.stdout.write(f'  {"URL":<24}{"status":>7}{"p50":>9}{"p95":>9}{"p99":>9}{"consultas":>11}{"bytes":>10}')
+                cliente = self._cliente(modo)
+                resultados[modo] = {}
+                for nombre, (ruta, parametros) in rutas.items():
+                    cache.clear()
+                    # Una vuelta previa: compila plantillas y, en modo anónimo, llena la caché
+                    self._pedir(cliente, ruta, parametros)
+                    tiempos, consultas = [], []
+                    for _ in range(options['iteraciones']):
+                        if modo == 'sin_cache':
+                            cache.clear()
+                        duracion, cantidad, tamanio, status = self._pedir(cliente, ruta, parametros)
+                        tiempos.append(duracion * 1000)
+                        consultas.append(cantidad)
+                    tiempos.sort()
+                    fila = {
+                        'url': ruta,
+                        'status': status,
+                        'p50': round(percentil(tiempos, 50), 3),
+                        'p95': round(percentil(tiempos, 95), 3),
+                        'p99': round(percentil(tiempos, 99), 3),
+                        'consultas': int(median(consultas)),
+                        'bytes': tamanio,
+                    }
+                    resultados[modo][nombre] = fila
+                    self.stdout.write(
+                        f'  {nombre:<24}{status:>7}{fila["p50"]:>8.1f}ms{fila["p95"]:>7.1f}ms'
+                        f'{fila["p99"]:>7.1f}ms{fila["consultas"]:>11}{tamanio:>10}'
+                    )
+        return resultados
+
+    def _comparar(self, anterior, actual, umbral):
+        """
+        Marca como regresión un p50 más lento que el umbral o más consultas que
+        antes. Se compara la mediana y no el p95: con pocas iteraciones el p95
+        es una sola muestra y varía demasiado entre corridas.
+        """
+        if anterior.get('escala') != actual['escala']:
+            self.stderr.write(
+                f'Aviso: se compara la escala {actual["escala"]} contra {anterior.get("escala")}'
+            )
+        regresiones = []
+        for modo, filas in actual['resultados'].items():
+            for nombre, fila in filas.items():
+                previa = anterior.get('resultados', {}).get(modo, {}).get(nombre)
+                if previa is None:
+                    continue
+                limite = previa['p50'] * (1 + umbral)
+                if fila['p50'] > limite and fila['p50'] - previa['p50'] > TOLERANCIA_MS:
+                    regresiones.append(f'{modo}/{nombre}: p50 {previa["p50"]:.1f} -> {fila["p50"]:.1f} ms')
+                if fila['consultas'] > previa['consultas']:
+                    regresiones.append(f'{modo}/{nombre}: consultas {previa["consultas"]} -> {fila["consultas"]}')
+
+        base = anterior.get('commit') or 'la corrida anterior'
+        if regresiones:
+            for regresion in regresiones:
+                self.stderr.write(f'  {regresion}')
+            raise CommandError(f'{len(regresiones)} regresiones respecto de {base}')
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones respecto de {base} (umbral {umbral:.0%})'))
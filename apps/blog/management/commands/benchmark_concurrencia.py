@@ -0,0 +1,191 @@
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from apps.blog.models import Articulo, Comentario
+
+from .benchmark import ESCALAS, USUARIO_BENCHMARK, Command as Benchmark, percentil, sin_avisos, usar_base
+
+
+CONFIGURACIONES = {
+    # Las opciones de settings.DATABASES: WAL, busy_timeout, etc.
+    'pragmas': 'Perfil de producción (WAL y pragmas)',
+    # Lo que hace SQLite sin configurar: journal de rollback, transacciones diferidas
+    'sin_pragmas': 'SQLite por defecto (rollback journal)',
+}
+
+
+@contextmanager
+def _configuracion(nombre):
+    """Aplica las opciones de conexión de la configuración mientras dura el bloque"""
+    opciones = connection.settings_dict['OPTIONS']
+    anteriores = dict(opciones)
+    if nombre == 'sin_pragmas':
+        opciones.clear()
+    connection.close()
+    # journal_mode queda guardado en el archivo: hay que fijarlo explícitamente
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = WAL' if nombre == 'pragmas' else 'PRAGMA journal_mode = DELETE')
+    connection.close()
+    try:
+        yield
+    finally:
+        connection.close()
+        opciones.clear()
+        opciones.update(anteriores)
+
+
+class Command(BaseCommand):
+    help = 'Mide las lecturas por segundo mientras otro hilo escribe comentarios, con y sin los pragmas de SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=ESCALAS, default='1k', help='Base generada por "benchmark" (por defecto 1k)')
+        parser.add_argument('--lectores', type=int, default=4, help='Hilos que leen páginas (por defecto 4)')
+        parser.add_argument('--segundos', type=float, default=10, help='Duración de cada medición (por defecto 10)')
+        parser.add_argument(
+            '--escrituras', type=float, default=20,
+            help='Comentarios por segundo que intenta escribir el hilo escritor; 0 = sin pausa (por defecto 20)',
+        )
+        parser.add_argument(
+            '--configuraciones', nargs='+', choices=CONFIGURACIONES, default=list(CONFIGURACIONES),
+            help='Qué configuraciones medir (por defecto todas)',
+        )
+        parser.add_argument(
+            '--directorio', default=os.path.join(settings.BASE_DIR, 'benchmarks'),
+            help='Dónde están (o se generan) las bases de "benchmark"',
+        )
+
+    def handle(self, *args, **options):
+        if options['lectores'] < 1 or options['segundos'] <= 0:
+            raise CommandError('--lectores y --segundos tienen que ser mayores que 0')
+        escala = options['escala']
+        directorio = options['directorio']
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f'base-{escala}.sqlite3')
+        if not os.path.exists(ruta):
+            with override_settings(SITEMAPS_ROOT=os.path.join(directorio, f'sitemaps-{escala}')):
+                Benchmark(stdout=self.stdout, stderr=self.stderr).sembrar(ruta, escala)
+
+        self.stdout.write(
+            f'{options["lectores"]} lectores durante {options["segundos"]:g} s, '
+            f'escribiendo {options["escrituras"]:g} comentarios/s ({escala})'
+        )
+        self.stdout.write(
+            f'  {"configuración":<40}{"lecturas/s":>11}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"escrituras/s":>14}{"errores":>9}'
+        )
+        for nombre in options['configuraciones']:
+            # Cada medición sobre una copia: los comentarios escritos no tocan la base original
+            copia = os.path.join(directorio, f'concurrencia-{escala}.sqlite3')
+            for sufijo in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(copia + sufijo):
+                    os.remove(copia + sufijo)
+            shutil.copyfile(ruta, copia)
+            with usar_base(copia), _configuracion(nombre), sin_avisos(logging.CRITICAL):
+                fila = self._medir(options)
+            self.stdout.write(
+                f'  {CONFIGURACIONES[nombre]:<40}{fila["lecturas"]:>11.1f}{fila["p50"]:>7.1f}ms'
+                f'{fila["p95"]:>7.1f}ms{fila["p99"]:>7.1f}ms{fila["escrituras"]:>14.1f}{fila["errores"]:>9}'
+            )
+
+    def _medir(self, options):
+        """Lanza los lectores y el escritor a la vez; devuelve las tasas y percentiles de lectura"""
+        articulo_id = Articulo.objects.order_by('-total_comentarios', 'id').values_list('id', flat=True).first()
+        if articulo_id is None:
+            raise CommandError('La base no tiene artículos')
+        articulos = list(Articulo.objects.values_list('id', flat=True)[:200])
+        usuario = User.objects.get(username=USUARIO_BENCHMARK)
+        # Logueado: sin caché de páginas, cada lectura llega a la base
+        sesion = Client(HTTP_HOST='localhost')
+        sesion.force_login(usuario)
+        rutas = [
+            reverse('detalle_articulo', args=[articulo_id]),
+            reverse('index'),
+            reverse('api_comentarios', args=[articulo_id]),
+        ]
+        connection.close()
+
+        segundos = options['segundos']
+        intervalo = 1 / options['escrituras'] if options['escrituras'] > 0 else 0
+        latencias = []
+        contadores = {'errores': 0, 'escrituras': 0}
+        candado = threading.Lock()
+        comienzo = threading.Barrier(options['lectores'] + 1)
+
+        def leer(numero):
+            cliente = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            # Solo la cookie de sesión: cada hilo tiene su propio cliente
+            cliente.cookies[settings.SESSION_COOKIE_NAME] = sesion.cookies[settings.SESSION_COOKIE_NAME].value
+            propias, errores = [], 0
+            comienzo.wait()
+            fin = time.perf_counter() + segundos
+            try:
+                while time.perf_counter() < fin:
+                    ruta = rutas[(numero + len(propias) + errores) % len(rutas)]
+                    inicio = time.perf_counter()
+                    respuesta = cliente.get(ruta)
+                    if respuesta.streaming:
+                        b''.join(respuesta.streaming_content)
+                    duracion = time.perf_counter() - inicio
+                    if respuesta.status_code == 200:
+                        propias.append(duracion * 1000)
+                    else:
+                        errores += 1
+            finally:
+                connection.close()
+            with candado:
+                latencias.extend(propias)
+                contadores['errores'] += errores
+
+        def escribir():
+            azar = random.Random(1)
+            escritas, errores = 0, 0
+            comienzo.wait()
+            fin = proxima = time.perf_counter()
+            fin += segundos
+            try:
+                while time.perf_counter() < fin:
+                    try:
+                        Comentario.objects.create(
+                            articulo_id=azar.choice(articulos), autor=usuario, contenido='Comentario de prueba',
+                        )
+                        escritas += 1
+                    except DatabaseError:
+                        errores += 1
+                    if intervalo:
+                        proxima += intervalo
+                        time.sleep(max(0, min(proxima, fin) - time.perf_counter()))
+            finally:
+                connection.close()
+            with candado:
+                contadores['escrituras'] += escritas
+                contadores['errores'] += errores
+
+        hilos = [threading.Thread(target=leer, args=(numero,)) for numero in range(options['lectores'])]
+        hilos.append(threading.Thread(target=escribir))
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        latencias.sort()
+        return {
+            'lecturas': len(latencias) / segundos,
+            'p50': percentil(latencias, 50) if latencias else 0,
+            'p95': percentil(latencias, 95) if latencias else 0,
+            'p99': percentil(latencias, 99) if latencias else 0,
+            'escrituras': contadores['escrituras'] / segundos,
+            'errores': contadores['errores'],
+        }
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from apps.blog import estaticos
+
+
+class Command(BaseCommand):
+    help = 'Copia los estáticos a STATIC_ROOT minificados y con hash en el nombre, y los precomprime'
+
+    def handle(self, *args, **options):
+        # --clear: no quedan versiones viejas ni .gz de otra construcción
+        call_command('collectstatic', interactive=False, clear=True, verbosity=max(options['verbosity'] - 1, 0))
+        totales = estaticos.comprimir(settings.STATIC_ROOT)
+        if options['verbosity'] < 1:
+            return
+        for sufijo, (cantidad, antes, despues) in sorted(totales.items()):
+            self.stdout.write(
+                f'{sufijo}: {cantidad} archivos, {antes / 1024:.0f} KB -> {despues / 1024:.0f} KB '
+                f'({100 * despues / antes:.0f}%)'
+            )
+        if estaticos.brotli is None:
+            self.stdout.write('brotli no está instalado: solo se generaron las versiones .gz')
@@ -0,0 +1,316 @@
+import random
+import re
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.blog import busqueda, datos_ejemplo
+from apps.blog.cache import CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES, RELACIONADOS, invalidar
+from apps.blog.cache_paginas import ARTICULOS
+from apps.blog.models import (
+    RESUMEN_LARGO, AcercaDe, Articulo, ArticuloRelacionado, Categoria, Comentario, Perfil,
+    TerminosArticulo, generar_resumen,
+)
+
+from .recount import recontar_totales
+
+
+# Proporción de roles entre los usuarios generados
+PROPORCION_ADMINISTRADORES = 0.01
+PROPORCION_COLABORADORES = 0.08
+PROPORCION_DESTACADOS = 0.03
+# Exponente de la distribución de fechas: > 1 concentra los artículos en los últimos días
+CONCENTRACION_RECIENTES = 1.5
+# Los comentarios llegan en promedio dos días después del artículo
+DEMORA_COMENTARIOS = 2 * 24 * 3600
+# Popularidad de los artículos (Pareto): unos pocos se llevan la mayoría de los comentarios
+ALFA_POPULARIDAD = 1.2
+
+
+def _en_lotes(iterable, tamanio):
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) == tamanio:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+@contextmanager
+def _fechas_manuales(*modelos):
+    """Desactiva auto_now/auto_now_add para poder cargar fechas históricas"""
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for modelo in modelos for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+@contextmanager
+def _escritura_rapida():
+    """En SQLite, sin fsync por transacción mientras dura la carga"""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        anterior = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(anterior)}')
+
+
+class Command(BaseCommand):
+    help = 'Genera datos de prueba en masa (usuarios, artículos y comentarios) con bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articulos', type=int, default=1000, help='Artículos sintéticos (por defecto 1000)')
+        parser.add_argument('--comentarios', type=int, default=5000, help='Comentarios (por defecto 5000)')
+        parser.add_argument('--usuarios', type=int, default=100, help='Usuarios además de los de ejemplo (por defecto 100)')
+        parser.add_argument('--seed', type=int, help='Semilla para repetir exactamente los mismos datos')
+        parser.add_argument('--dias', type=int, default=730, help='Antigüedad máxima de los artículos (por defecto 730)')
+        parser.add_argument('--lote', type=int, default=10000, help='Filas por transacción (por defecto 10000)')
+        parser.add_argument(
+            '--limpiar', action='store_true',
+            help='Borra antes los artículos, comentarios, categorías y usuarios que no sean superusuarios',
+        )
+
+    def handle(self, *args, **options):
+        for opcion in ('articulos', 'comentarios', 'usuarios', 'dias'):
+            if options[opcion] < 0:
+                raise CommandError(f'--{opcion} no puede ser negativo')
+        if options['lote'] < 1:
+            raise CommandError('--lote tiene que ser mayor que 0')
+
+        self.azar = random.Random(options['seed'])
+        self.lote = options['lote']
+        self.ahora = timezone.now()
+        inicio = time.monotonic()
+
+        # Sin triggers FTS ni fsync durante la carga; el índice se reconstruye al final
+        with _escritura_rapida(), busqueda.indexar_al_final(), _fechas_manuales(Articulo, Comentario):
+            if options['limpiar']:
+                self._limpiar()
+            categorias = self._categorias()
+            autores, usuarios = self._usuarios(options['usuarios'])
+            self._acerca_de()
+            ids, edades = self._articulos(options['articulos'], options['dias'], categorias, autores)
+            self._comentarios(options['comentarios'], ids, edades, usuarios)
+            self._paso('Reconstruyendo el índice de búsqueda')
+
+        # bulk_create no dispara señales: contadores, sellos y cachés a mano
+        recontar_totales()
+        Categoria.objects.update(fecha_actualizacion=timezone.now())
+        invalidar(ARTICULOS, CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES, RELACIONADOS)
+
+        self.stdout.write(self.style.SUCCESS(f'Datos generados en {time.monotonic() - inicio:.1f} s'))
+        self.stdout.write(
+            'Para los relacionados y los sitemaps: python manage.py recompute_related '
+            'y python manage.py generate_sitemaps'
+        )
+
+    def _paso(self, texto, cantidad=None):
+        if cantidad is not None:
+            texto = f'{texto}: {cantidad}'
+        self.stdout.write(f'  {texto}')
+
+    def _limpiar(self):
+        # DELETE directo: el ORM leería cada artículo para mandar sus señales
+        with transaction.atomic(), connection.cursor() as cursor:
+            for modelo in (Comentario, ArticuloRelacionado, TerminosArticulo, Articulo):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(modelo._meta.db_table)}')
+        User.objects.filter(is_superuser=False).delete()
+        Categoria.objects.all().delete()
+        self._paso('Datos anteriores borrados')
+
+    def _categorias(self):
+        """{nombre: (id, peso)} de las categorías de ejemplo, creando las que falten"""
+        Categoria.objects.bulk_create(
+            [Categoria(nombre=nombre, descripcion=descripcion) for nombre, descripcion, _ in datos_ejemplo.CATEGORIAS],
+            ignore_conflicts=True,
+        )
+        ids = dict(Categoria.objects.filter(
+            nombre__in=[nombre for nombre, _, _ in datos_ejemplo.CATEGORIAS]
+        ).values_list('nombre', 'id'))
+        return {nombre: (ids[nombre], peso) for nombre, _, peso in datos_ejemplo.CATEGORIAS}
+
+    def _usuarios(self, cantidad):
+        """Crea los usuarios con su Perfil en bloque; devuelve (ids de autores, ids de todos)"""
+        # Un solo hash para todos: hashear un millón de contraseñas llevaría horas
+        clave = make_password(datos_ejemplo.PASSWORD)
+        existentes = set(User.objects.filter(
+            username__in=[username for username, *_ in datos_ejemplo.USUARIOS]
+        ).values_list('username', flat=True))
+        nuevos = [usuario for usuario in datos_ejemplo.USUARIOS if usuario[0] not in existentes]
+
+        ultimo = User.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+        for numero in range(ultimo + 1, ultimo + cantidad + 1):
+            sorteo = self.azar.random()
+            if sorteo < PROPORCION_ADMINISTRADORES:
+                rol = 'administrador'
+            elif sorteo < PROPORCION_ADMINISTRADORES + PROPORCION_COLABORADORES:
+                rol = 'colaborador'
+            else:
+                rol = 'miembro'
+            nuevos.append((
+                f'usuario{numero}', self.azar.choice(datos_ejemplo.NOMBRES), self.azar.choice(datos_ejemplo.APELLIDOS), rol,
+            ))
+
+        for lote in _en_lotes(nuevos, self.lote):
+            with transaction.atomic():
+                creados = User.objects.bulk_create([
+                    User(
+                        username=username, first_name=nombre, last_name=apellido,
+                        email=f'{username}@tododeporte.com', password=clave,
+                    )
+                    for username, nombre, apellido, _ in lote
+                ])
+                # La señal post_save que crea el Perfil no corre con bulk_create
+                Perfil.objects.bulk_create([
+                    Perfil(user_id=usuario.pk, rol=rol) for usuario, (*_, rol) in zip(creados, lote)
+                ])
+        self._paso('Usuarios creados', len(nuevos))
+        # Los que ya existían sin perfil (creados también con bulk_create)
+        faltantes = Perfil.objects.crear_faltantes()
+        if faltantes:
+            self._paso('Perfiles faltantes creados', faltantes)
+
+        autores = list(Perfil.objects.filter(
+            rol__in=['colaborador', 'administrador']
+        ).values_list('user_id', flat=True))
+        usuarios = array('q', User.objects.values_list('pk', flat=True))
+        return autores, usuarios
+
+    def _acerca_de(self):
+        AcercaDe.objects.get_or_create(id=1, defaults={
+            'contenido': datos_ejemplo.ACERCA_DE_CONTENIDO,
+            'integrantes': datos_ejemplo.ACERCA_DE_INTEGRANTES,
+        })
+
+    def _articulos(self, cantidad, dias, categorias, autores):
+        """
+        Inserta los artículos por lotes y devuelve sus ids y su antigüedad en
+        segundos (arrays compactos, para repartir después los comentarios).
+        """
+        azar = self.azar
+        # Párrafos reales de cada categoría, para armar contenidos verosímiles
+        parrafos = {nombre: [] for nombre in categorias}
+        for ejemplo in datos_ejemplo.ARTICULOS:
+            parrafos[ejemplo['categoria']] += [
+                ' '.join(parrafo.split()) for parrafo in re.split(r'\n\s*\n|\n', ejemplo['contenido']) if parrafo.strip()
+            ]
+        nombres = list(categorias)
+        pesos = list(accumulate(peso for _, peso in categorias.values()))
+        resumenes = {}
+        sitio_vacio = not Articulo.objects.exists()
+
+        def resumen(primero, contenido):
+            # Si el primer párrafo ya supera el largo, el resumen solo depende de él
+            if len(primero) <= RESUMEN_LARGO:
+                return generar_resumen(contenido)
+            if primero not in resumenes:
+                resumenes[primero] = generar_resumen(primero)
+            return resumenes[primero]
+
+        def nuevos():
+            # Antigüedades en segundos, de la más vieja a la más nueva: los ids
+            # quedan en el mismo orden que las fechas, como en el sitio real
+            segundos = dias * 24 * 3600
+            edades = sorted(
+                (segundos * azar.random() ** CONCENTRACION_RECIENTES for _ in range(cantidad)), reverse=True
+            )
+            for edad in edades:
+                nombre = azar.choices(nombres, cum_weights=pesos)[0]
+                elegidos = azar.sample(parrafos[nombre], k=min(len(parrafos[nombre]), azar.randint(2, 5)))
+                contenido = '\n\n'.join(elegidos)
+                yield edad, {
+                    'titulo': (
+                        f'{azar.choice(datos_ejemplo.PROTAGONISTAS[nombre])} '
+                        f'{azar.choice(datos_ejemplo.ACCIONES)}{azar.choice(datos_ejemplo.TORNEOS)}'
+                    ),
+                    'contenido': contenido,
+                    'resumen': resumen(elegidos[0], contenido),
+                    'categoria_id': categorias[nombre][0],
+                    'destacado': azar.random() < PROPORCION_DESTACADOS,
+                }
+            # Los artículos reales van últimos (los más recientes) si el sitio está vacío
+            if sitio_vacio:
+                for posicion, ejemplo in enumerate(reversed(datos_ejemplo.ARTICULOS)):
+                    yield (len(datos_ejemplo.ARTICULOS) - posicion) * 2 * 24 * 3600, {
+                        'titulo': ejemplo['titulo'],
+                        'contenido': ejemplo['contenido'],
+                        'resumen': generar_resumen(ejemplo['contenido']),
+                        'categoria_id': categorias[ejemplo['categoria']][0],
+                        'destacado': ejemplo['destacado'],
+                    }
+
+        ids, edades = array('q'), array('d')
+        for lote in _en_lotes(nuevos(), self.lote):
+            objetos = []
+            for edad, campos in lote:
+                fecha = self.ahora - timedelta(seconds=edad)
+                objetos.append(Articulo(
+                    autor_id=azar.choice(autores) if autores else None,
+                    fecha_creacion=fecha, fecha_actualizacion=fecha, **campos,
+                ))
+            with transaction.atomic():
+                Articulo.objects.bulk_create(objetos)
+            ids.extend(articulo.pk for articulo in objetos)
+            edades.extend(edad for edad, _ in lote)
+        self._paso('Artículos creados', len(ids))
+
+        if not ids:
+            # Sin artículos nuevos, los comentarios van a los que ya había
+            for articulo_id, fecha in Articulo.objects.values_list('pk', 'fecha_creacion').iterator(chunk_size=self.lote):
+                ids.append(articulo_id)
+                edades.append(max(0.0, (self.ahora - fecha).total_seconds()))
+        return ids, edades
+
+    def _comentarios(self, cantidad, ids, edades, usuarios):
+        if not cantidad:
+            return
+        if not ids or not usuarios:
+            raise CommandError('No hay artículos o usuarios a los que asignar comentarios')
+        azar = self.azar
+        acumulados = array('d', accumulate(azar.paretovariate(ALFA_POPULARIDAD) for _ in ids))
+        posiciones = range(len(ids))
+
+        creados = 0
+        while creados < cantidad:
+            tamanio = min(self.lote, cantidad - creados)
+            objetos = []
+            for posicion in azar.choices(posiciones, cum_weights=acumulados, k=tamanio):
+                edad = max(0.0, edades[posicion] - azar.expovariate(1 / DEMORA_COMENTARIOS))
+                fecha = self.ahora - timedelta(seconds=edad)
+                objetos.append(Comentario(
+                    articulo_id=ids[posicion],
+                    autor_id=azar.choice(usuarios),
+                    contenido=azar.choice(datos_ejemplo.COMENTARIOS),
+                    fecha_creacion=fecha,
+                    fecha_actualizacion=fecha,
+                ))
+            with transaction.atomic():
+                Comentario.objects.bulk_create(objetos)
+            creados += tamanio
+        self._paso('Comentarios creados', creados)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.blog import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Genera los sitemaps (índice y partes de hasta 50.000 URLs) en archivos estáticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help='Reescribe todas las partes aunque no hayan cambiado',
+        )
+        parser.add_argument(
+            '--dominio', default=settings.SITIO_URL,
+            help=f'Esquema y dominio de las URLs (por defecto {settings.SITIO_URL})',
+        )
+
+    def handle(self, *args, **options):
+        reescritas, borradas = sitemaps.generar(options['dominio'], todos=options['todos'])
+        for parte in borradas:
+            self.stdout.write(f'Borrada la parte {parte}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(reescritas)} partes reescritas en {sitemaps.directorio()}'
+            + (f': {", ".join(reescritas)}' if reescritas else '')
+        ))
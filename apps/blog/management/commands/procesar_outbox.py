@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog import correo
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes del outbox (por ejemplo, desde cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=correo.TAMANIO_LOTE,
+            help=f'Correos por conexión SMTP (por defecto {correo.TAMANIO_LOTE})',
+        )
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='No termina: sigue revisando el outbox cada --intervalo segundos',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=5.0,
+            help='Segundos entre revisiones en modo continuo (por defecto 5)',
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote tiene que ser mayor que 0')
+
+        total_enviados = total_errores = 0
+        while True:
+            enviados, errores = correo.procesar_lote(options['lote'])
+            total_enviados += enviados
+            total_errores += errores
+            if enviados or errores:
+                self.stdout.write(f'Lote: {enviados} enviados, {errores} con error')
+            # Lote completo: probablemente quedan más, se sigue sin esperar
+            if enviados + errores == options['lote']:
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Outbox procesado: {total_enviados} enviados, {total_errores} con error'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog import relacionados
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los artículos relacionados (TF-IDF) de los artículos nuevos o modificados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help='Vuelve a vectorizar y recalcular todo el corpus',
+        )
+        parser.add_argument(
+            '--vecinos', type=int, default=relacionados.VECINOS,
+            help=f'Cantidad de relacionados por artículo (por defecto {relacionados.VECINOS})',
+        )
+        parser.add_argument(
+            '--max-terminos', type=int, default=relacionados.MAX_TERMINOS,
+            help=f'Términos guardados por artículo (por defecto {relacionados.MAX_TERMINOS})',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise CommandError('recompute_related necesita NumPy: pip install numpy')
+
+        if options['vecinos'] < 1:
+            raise CommandError('--vecinos tiene que ser mayor que 0')
+
+        vectorizados, recalculados = relacionados.recalcular(
+            todos=options['todos'],
+            vecinos=options['vecinos'],
+            max_terminos=options['max_terminos'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Relacionados actualizados: {vectorizados} artículos vectorizados, '
+            f'{recalculados} listas recalculadas'
+        ))
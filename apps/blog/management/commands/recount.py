@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.blog.models import Articulo, Categoria, Comentario, Perfil
+
+
+def _conteo(queryset, campo):
+    """Subconsulta COUNT(*) agrupada por `campo`, 0 si no hay filas"""
+    subconsulta = (
+        queryset.filter(**{campo: OuterRef('pk')})
+        .order_by()
+        .values(campo)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(subconsulta, output_field=IntegerField()), Value(0))
+
+
+def recontar_totales():
+    """Recalcula desde cero los contadores de artículos y comentarios"""
+    with transaction.atomic():
+        Articulo.objects.update(
+            total_comentarios=_conteo(Comentario.objects.all(), 'articulo'),
+        )
+        Categoria.objects.update(
+            total_articulos=_conteo(Articulo.objects.all(), 'categoria'),
+            total_comentarios=_conteo(Comentario.objects.all(), 'articulo__categoria'),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los contadores de artículos y comentarios de cada categoría y artículo, '
+        'y crea el perfil de los usuarios que no tienen'
+    )
+
+    def handle(self, *args, **options):
+        recontar_totales()
+        self.stdout.write(self.style.SUCCESS(
+            f'Contadores recalculados: {Categoria.objects.count()} categorías, '
+            f'{Articulo.objects.count()} artículos'
+        ))
+        perfiles = Perfil.objects.crear_faltantes()
+        self.stdout.write(self.style.SUCCESS(f'Perfiles creados: {perfiles}'))
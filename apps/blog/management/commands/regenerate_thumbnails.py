@@ -0,0 +1,53 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from apps.blog import derivados
+from apps.blog.models import Articulo
+
+
+class Command(BaseCommand):
+    help = 'Genera en paralelo las miniaturas de imagen_destacada que falten'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help='Vuelve a generar también las que ya existen',
+        )
+        parser.add_argument(
+            '--procesos', type=int, default=derivados.PROCESOS,
+            help=f'Procesos en paralelo (por defecto {derivados.PROCESOS})',
+        )
+
+    def handle(self, *args, **options):
+        if options['procesos'] < 1:
+            raise CommandError('--procesos tiene que ser mayor que 0')
+
+        articulos = Articulo.objects.exclude(imagen_destacada='').exclude(imagen_destacada__isnull=True)
+        if not options['todos']:
+            articulos = articulos.exclude(imagen_derivados=F('imagen_destacada'))
+        pendientes = list(articulos.values_list('id', 'imagen_destacada'))
+
+        generadas = errores = 0
+        with derivados.crear_pool(options['procesos']) as pool:
+            futuros = {
+                derivados.enviar(pool, nombre): (articulo_id, nombre)
+                for articulo_id, nombre in pendientes
+            }
+            for futuro in as_completed(futuros):
+                articulo_id, nombre = futuros[futuro]
+                try:
+                    futuro.result()
+                except Exception as error:
+                    errores += 1
+                    self.stderr.write(f'Artículo {articulo_id} ({nombre}): {error}')
+                    continue
+                derivados.marcar_generados(articulo_id, nombre)
+                generadas += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Miniaturas generadas para {generadas} de {len(pendientes)} artículos'
+        ))
+        if errores:
+            raise CommandError(f'{errores} imágenes no se pudieron procesar')
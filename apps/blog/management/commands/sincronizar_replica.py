@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.blog import replica
+
+
+class Command(BaseCommand):
+    help = 'Copia la base a la réplica de solo lectura con la API de backup de SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='No termina: vuelve a copiar cada --intervalo segundos',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=30.0,
+            help='Segundos entre copias en modo continuo (por defecto 30; menos que REPLICA_VENTANA)',
+        )
+
+    def handle(self, *args, **options):
+        if options['continuo'] and options['intervalo'] >= settings.REPLICA_VENTANA:
+            self.stderr.write(
+                f'Aviso: con un intervalo de {options["intervalo"]:g} s y REPLICA_VENTANA = '
+                f'{settings.REPLICA_VENTANA} s, quien escribe puede volver a leer de una réplica vieja'
+            )
+        while True:
+            duracion = replica.sincronizar()
+            self.stdout.write(f'Réplica actualizada en {duracion:.2f} s')
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
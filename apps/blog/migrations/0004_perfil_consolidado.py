@@ -1,10 +1,37 @@
 # Generated manually to consolidate Perfil model from users app to blog app
 
+import copy
+
 from django.conf import settings
 from django.db import migrations, models
 import django.db.models.deletion
 
 
+def _renombrar(apps, schema_editor, viejo, nuevo):
+    Perfil = apps.get_model('blog', 'Perfil')
+    # En las dos direcciones el estado que llega es el de antes del RenameField
+    campos = {}
+    for nombre in (viejo, nuevo):
+        campo = copy.copy(Perfil._meta.get_field('usuario'))
+        campo.name = nombre
+        campo.attname, campo.column = campo.get_attname_column()
+        campos[nombre] = campo
+    with schema_editor.connection.cursor() as cursor:
+        columnas = {
+            c.name for c in schema_editor.connection.introspection.get_table_description(cursor, Perfil._meta.db_table)
+        }
+    if campos[viejo].column in columnas:
+        schema_editor.alter_field(Perfil, campos[viejo], campos[nuevo])
+
+
+def usuario_a_user(apps, schema_editor):
+    _renombrar(apps, schema_editor, 'usuario', 'user')
+
+
+def user_a_usuario(apps, schema_editor):
+    _renombrar(apps, schema_editor, 'user', 'usuario')
+
+
 class Migration(migrations.Migration):
 
     dependencies = [
@@ -13,6 +40,17 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
+        # En el estado de las migraciones el campo todavía se llama "usuario"
+        # (0001_initial). La columna solo se renombra si existe: las bases que
+        # vienen de users_perfil ya tienen user_id.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(model_name='perfil', old_name='usuario', new_name='user'),
+            ],
+            database_operations=[
+                migrations.RunPython(usuario_a_user, user_a_usuario),
+            ],
+        ),
         # Esta migración asume que la tabla blog_perfil ya existe con los datos de users_perfil
         # Actualiza el related_name de perfil_users a perfil
         migrations.AlterField(
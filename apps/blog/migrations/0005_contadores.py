@@ -0,0 +1,57 @@
+# Generated by Django 5.2.9 on 2026-10-18 07:47
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_contadores(apps, schema_editor):
+    Articulo = apps.get_model('blog', 'Articulo')
+    Categoria = apps.get_model('blog', 'Categoria')
+    Comentario = apps.get_model('blog', 'Comentario')
+
+    def conteo(queryset, campo):
+        subconsulta = (
+            queryset.filter(**{campo: OuterRef('pk')})
+            .order_by()
+            .values(campo)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(subconsulta, output_field=IntegerField()), Value(0))
+
+    Articulo.objects.update(total_comentarios=conteo(Comentario.objects.all(), 'articulo'))
+    Categoria.objects.update(
+        total_articulos=conteo(Articulo.objects.all(), 'categoria'),
+        total_comentarios=conteo(Comentario.objects.all(), 'articulo__categoria'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_perfil_consolidado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='total_comentarios',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='total_articulos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='total_comentarios',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['-total_articulos', '-total_comentarios'], name='blog_cat_populares_idx'),
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
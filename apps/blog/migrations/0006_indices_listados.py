@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-18 07:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_contadores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articulo',
+            name='categoria',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='articulos', to='blog.categoria'),
+        ),
+        migrations.AlterField(
+            model_name='comentario',
+            name='articulo',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comentarios', to='blog.articulo'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='blog_art_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['titulo', 'id'], name='blog_art_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['categoria', 'fecha_creacion', 'id'], name='blog_art_cat_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['categoria', 'titulo', 'id'], name='blog_art_cat_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['destacado', 'fecha_creacion'], name='blog_art_dest_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['categoria', 'destacado', 'fecha_creacion'], name='blog_art_cat_dest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['articulo', 'fecha_creacion', 'id'], name='blog_com_art_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 07:50
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def calcular_resumenes(apps, schema_editor):
+    Articulo = apps.get_model('blog', 'Articulo')
+    lote = []
+    for articulo in Articulo.objects.only('id', 'contenido').iterator(chunk_size=1000):
+        articulo.resumen = Truncator(' '.join((articulo.contenido or '').split())).chars(200)
+        lote.append(articulo)
+        if len(lote) >= 1000:
+            Articulo.objects.bulk_update(lote, ['resumen'])
+            lote = []
+    if lote:
+        Articulo.objects.bulk_update(lote, ['resumen'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_indices_listados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='resumen',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(calcular_resumenes, migrations.RunPython.noop),
+    ]
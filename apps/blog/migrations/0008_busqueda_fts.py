@@ -0,0 +1,30 @@
+# Índice de búsqueda de texto completo (solo SQLite, ver apps/blog/busqueda.py)
+
+from django.db import migrations
+
+from apps.blog import busqueda
+
+
+def crear_indice(apps, schema_editor):
+    if busqueda.fts_disponible(schema_editor.connection):
+        busqueda.instalar_indice(schema_editor.connection)
+
+
+def borrar_indice(apps, schema_editor):
+    if not busqueda.fts_disponible(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sufijo in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {busqueda.TABLA_FTS}_{sufijo}')
+        cursor.execute(f'DROP TABLE IF EXISTS {busqueda.TABLA_FTS}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_resumen_articulo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
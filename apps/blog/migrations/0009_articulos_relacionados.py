@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-18 07:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminosArticulo',
+            fields=[
+                ('articulo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='terminos', serialize=False, to='blog.articulo')),
+                ('terminos', models.JSONField(default=dict)),
+                ('fecha_articulo', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Términos de artículos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticuloRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('similitud', models.FloatField()),
+                ('articulo', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='relaciones', to='blog.articulo')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionado_en', to='blog.articulo')),
+            ],
+            options={
+                'verbose_name_plural': 'Artículos relacionados',
+                'ordering': ['articulo', 'posicion'],
+                'constraints': [models.UniqueConstraint(fields=('articulo', 'posicion'), name='blog_relacionado_posicion_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_categoria_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='imagen_derivados',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
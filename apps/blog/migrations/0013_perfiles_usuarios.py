@@ -0,0 +1,44 @@
+# Perfil para todos los usuarios existentes, una sola vez: las vistas ya no
+# lo crean por su cuenta en cada request. Y el índice FTS de la búsqueda de
+# usuarios (solo SQLite, ver apps/blog/busqueda.py).
+
+from django.conf import settings
+from django.db import migrations
+
+from apps.blog import busqueda
+
+
+TANDA = 1000
+
+
+def crear_perfiles(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Perfil = apps.get_model('blog', 'Perfil')
+    sin_perfil = User.objects.filter(perfil__isnull=True).order_by('pk').values_list('pk', flat=True)
+    ids = list(sin_perfil[:TANDA])
+    while ids:
+        Perfil.objects.bulk_create([Perfil(user_id=user_id, rol='miembro') for user_id in ids])
+        ids = list(sin_perfil.filter(pk__gt=ids[-1])[:TANDA])
+
+
+def crear_indice(apps, schema_editor):
+    if busqueda.fts_disponible(schema_editor.connection):
+        busqueda.instalar_indice(schema_editor.connection, tabla=busqueda.TABLA_FTS_USUARIOS)
+
+
+def borrar_indice(apps, schema_editor):
+    if busqueda.fts_disponible(schema_editor.connection):
+        busqueda.borrar_indice(schema_editor.connection, tabla=busqueda.TABLA_FTS_USUARIOS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_outbox_correos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_perfiles, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_perfiles_usuarios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['articulo', 'fecha_actualizacion'], name='blog_com_art_act_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+"""
+Versiones reducidas de `imagen_destacada` (WebP + JPEG) para tarjetas,
+carrusel y detalle.
+
+Este módulo solo usa Pillow y la biblioteca estándar: se ejecuta dentro de
+los procesos del pool (ver derivados.py), que no cargan Django.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+
+# Anchos de cada uso: el primero es 1x y el segundo para pantallas de alta densidad
+TAMANIOS = {
+    'card': (96, 192),
+    'hero': (1200, 2000),
+    'detalle': (900, 1800),
+}
+
+# Atributo `sizes` de cada uso (cuánto ocupa la imagen en pantalla)
+SIZES = {
+    'card': '96px',
+    'hero': '(max-width: 1200px) 100vw, 1200px',
+    'detalle': '(max-width: 900px) 100vw, 900px',
+}
+
+FORMATOS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+CARPETA = 'derivados'
+
+
+def anchos():
+    """Todos los anchos distintos que hay que generar por imagen"""
+    return sorted({ancho for tamanio in TAMANIOS.values() for ancho in tamanio})
+
+
+def nombre_derivado(nombre, ancho, extension):
+    """
+    articulos/foto.png -> articulos/derivados/foto.png-900.webp
+
+    Conserva la extensión original: foto.png y foto.jpg no comparten miniaturas.
+    """
+    carpeta, archivo = os.path.split(nombre)
+    return os.path.join(carpeta, CARPETA, f'{archivo}-{ancho}.{extension}').replace(os.sep, '/')
+
+
+def nombres_derivados(nombre):
+    """Todos los archivos que genera generar_derivados() para `nombre`"""
+    return [nombre_derivado(nombre, ancho, extension) for ancho in anchos() for extension in FORMATOS]
+
+
+def generar_derivados(origen, raiz, nombre):
+    """
+    Genera todos los anchos y formatos de la imagen `origen` (ruta absoluta).
+
+    Los archivos se escriben bajo `raiz` (MEDIA_ROOT) con nombre_derivado().
+    Nunca se agranda la imagen: si es más chica que el ancho pedido se
+    reencodea con su tamaño original. Devuelve `nombre` para identificar el
+    trabajo terminado.
+    """
+    with Image.open(origen) as imagen:
+        imagen = ImageOps.exif_transpose(imagen)
+        if imagen.mode not in ('RGB', 'L'):
+            fondo = Image.new('RGB', imagen.size, 'white')
+            imagen = imagen.convert('RGBA')
+            fondo.paste(imagen, mask=imagen.getchannel('A'))
+            imagen = fondo
+
+        for ancho in anchos():
+            if imagen.width > ancho:
+                alto = round(imagen.height * ancho / imagen.width)
+                reducida = imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+            else:
+                reducida = imagen
+            for extension, (formato, opciones) in FORMATOS.items():
+                destino = os.path.join(raiz, nombre_derivado(nombre, ancho, extension))
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                # Se escribe a un temporal y se renombra: nunca se sirve un archivo a medias
+                temporal = f'{destino}.tmp'
+                reducida.save(temporal, formato, **opciones)
+                os.replace(temporal, destino)
+    return nombre
@@ -1,18 +1,71 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.text import Truncator
+
+
+RESUMEN_LARGO = 200
+
+
+def generar_resumen(contenido):
+    """Primeros caracteres del contenido en una sola línea, para las tarjetas"""
+    return Truncator(' '.join((contenido or '').split())).chars(RESUMEN_LARGO)
+
+def _guardar_sin_contadores(instance, contadores, kwargs):
+    """
+    Al editar un objeto existente no se escriben los contadores: los mantienen
+    las señales con F() y el valor en memoria puede estar desactualizado.
+    """
+    if not instance._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+        diferidos = instance.get_deferred_fields()
+        kwargs['update_fields'] = [
+            f.name for f in instance._meta.concrete_fields
+            if not f.primary_key and f.name not in contadores and f.attname not in diferidos
+        ]
+    return kwargs
+
 
 # Create your models here.
 class Categoria(models.Model):
     nombre = models.CharField(max_length=60, unique=True)
     descripcion = models.TextField(blank=True, null=True)
+    # Contadores desnormalizados, los mantienen las señales (ver signals.py)
+    total_articulos = models.PositiveIntegerField(default=0, editable=False)
+    total_comentarios = models.PositiveIntegerField(default=0, editable=False)
+    # Sello de cambios: lo actualizan las señales cuando cambia cualquier artículo
+    # o comentario de la categoría (ver condicional.py)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categorías"
         ordering = ['nombre']
+        indexes = [
+            # Ranking de "categorías populares"
+            models.Index(fields=['-total_articulos', '-total_comentarios'], name='blog_cat_populares_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **_guardar_sin_contadores(self, ('total_articulos', 'total_comentarios'), kwargs))
+
+
+class PerfilManager(models.Manager):
+    def crear_faltantes(self, rol='miembro', tanda=1000):
+        """
+        Crea en bloques el perfil de los usuarios que no tienen uno (por
+        ejemplo los creados con bulk_create, que no disparan la señal).
+        Devuelve cuántos se crearon.
+        """
+        sin_perfil = User.objects.filter(perfil__isnull=True).order_by('pk').values_list('pk', flat=True)
+        creados = 0
+        ids = list(sin_perfil[:tanda])
+        while ids:
+            creados += len(self.bulk_create([self.model(user_id=user_id, rol=rol) for user_id in ids]))
+            ids = list(sin_perfil.filter(pk__gt=ids[-1])[:tanda])
+        return creados
+
 
 class Perfil(models.Model):
     ROL_CHOICES = [
@@ -24,11 +77,28 @@ class Perfil(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='perfil')
     rol = models.CharField(max_length=20, choices=ROL_CHOICES, default='miembro')
 
+    objects = PerfilManager()
+
     class Meta:
         verbose_name_plural = "Perfiles"
 
     def __str__(self):
         return f'{self.user.username} - {self.rol}'
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._rol_original = self.rol
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Recordamos el rol con el que se leyó para guardar solo si cambió
+        instance = super().from_db(db, field_names, values)
+        instance._rol_original = instance.__dict__.get('rol')
+        return instance
+
+    def tiene_cambios(self):
+        """True si el rol cambió desde que se leyó o se guardó por última vez"""
+        return self._state.adding or self.rol != getattr(self, '_rol_original', None)
     
     def es_administrador(self):
         """Verifica si el usuario tiene rol de administrador"""
@@ -43,26 +113,112 @@ class Perfil(models.Model):
         return self.rol == 'administrador'
 
 
+class ArticuloQuerySet(models.QuerySet):
+    # Columnas que usan las tarjetas (card_articulo.html y hero_carrusel.html)
+    CAMPOS_LISTADO = (
+        'id', 'titulo', 'resumen', 'imagen_destacada', 'imagen_derivados', 'fecha_creacion', 'destacado',
+        'categoria__id', 'categoria__nombre',
+    )
+
+    def para_listado(self):
+        """Solo lo necesario para listar: sin `contenido` y con la categoría en el mismo JOIN"""
+        return self.select_related('categoria').only(*self.CAMPOS_LISTADO)
+
+    def relacionados_con(self, articulo_id):
+        """Artículos relacionados precalculados, en orden de similitud"""
+        return self.para_listado().filter(
+            relacionado_en__articulo_id=articulo_id
+        ).order_by('relacionado_en__posicion')
+
+
 class Articulo(models.Model):
     titulo = models.CharField(max_length=200)
     contenido = models.TextField()
-    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='articulos')
+    # Se recalcula en save() a partir del contenido
+    resumen = models.CharField(max_length=RESUMEN_LARGO, blank=True, editable=False)
+    # db_index=False: los índices compuestos de Meta ya empiezan por categoría
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='articulos', db_index=False)
     autor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='articulos')
     imagen_destacada = models.ImageField(upload_to='articulos/', blank=True, null=True)
+    # Imagen para la que ya existen las miniaturas (ver derivados.py)
+    imagen_derivados = models.CharField(max_length=100, blank=True, editable=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     destacado = models.BooleanField(default=False)
+    total_comentarios = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ArticuloQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Artículos"
         ordering = ['-fecha_creacion']
+        # Un índice por cada forma de consulta de los listados (ver views.index y
+        # views.listar_por_categoria). El "id" final es el desempate de la
+        # paginación por cursor; SQLite recorre los índices en ambos sentidos.
+        indexes = [
+            models.Index(fields=['fecha_creacion', 'id'], name='blog_art_fecha_idx'),
+            models.Index(fields=['titulo', 'id'], name='blog_art_titulo_idx'),
+            models.Index(fields=['categoria', 'fecha_creacion', 'id'], name='blog_art_cat_fecha_idx'),
+            models.Index(fields=['categoria', 'titulo', 'id'], name='blog_art_cat_titulo_idx'),
+            # Carrusel de destacados (general y por categoría)
+            models.Index(fields=['destacado', 'fecha_creacion'], name='blog_art_dest_fecha_idx'),
+            models.Index(fields=['categoria', 'destacado', 'fecha_creacion'], name='blog_art_cat_dest_idx'),
+        ]
 
     def __str__(self):
         return self.titulo
 
+    def save(self, *args, **kwargs):
+        if 'contenido' not in self.get_deferred_fields():
+            self.resumen = generar_resumen(self.contenido)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'contenido' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'resumen'}
+        # imagen_derivados la escribe el pool de miniaturas con update()
+        super().save(*args, **_guardar_sin_contadores(self, ('total_comentarios', 'imagen_derivados'), kwargs))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Recordamos la categoría con la que se leyó para detectar cambios al guardar
+        instance = super().from_db(db, field_names, values)
+        instance._categoria_original_id = instance.__dict__.get('categoria_id')
+        return instance
+
+
+class TerminosArticulo(models.Model):
+    """Frecuencia de cada término del artículo, usada para calcular relacionados"""
+    articulo = models.OneToOneField(Articulo, on_delete=models.CASCADE, primary_key=True, related_name='terminos')
+    terminos = models.JSONField(default=dict)
+    # fecha_actualizacion del artículo cuando se vectorizó: si cambia, hay que recalcular
+    fecha_articulo = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Términos de artículos"
+
+    def __str__(self):
+        return f'Términos de {self.articulo_id}'
+
+
+class ArticuloRelacionado(models.Model):
+    """Vecinos más cercanos de cada artículo, precalculados por recompute_related"""
+    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='relaciones', db_index=False)
+    relacionado = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='relacionado_en')
+    posicion = models.PositiveSmallIntegerField()
+    similitud = models.FloatField()
+
+    class Meta:
+        verbose_name_plural = "Artículos relacionados"
+        ordering = ['articulo', 'posicion']
+        constraints = [
+            models.UniqueConstraint(fields=['articulo', 'posicion'], name='blog_relacionado_posicion_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.articulo_id} -> {self.relacionado_id} ({self.similitud:.2f})'
+
 
 class Comentario(models.Model):
-    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='comentarios')
+    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='comentarios', db_index=False)
     autor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='comentarios')
     contenido = models.TextField()
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -71,10 +227,22 @@ class Comentario(models.Model):
     class Meta:
         verbose_name_plural = "Comentarios"
         ordering = ['fecha_creacion']
+        indexes = [
+            models.Index(fields=['articulo', 'fecha_creacion', 'id'], name='blog_com_art_fecha_idx'),
+            # El último comentario editado de un artículo (sello_articulo) en una sola búsqueda
+            models.Index(fields=['articulo', 'fecha_actualizacion'], name='blog_com_art_act_idx'),
+        ]
 
     def __str__(self):
         return f'Comentario de {self.autor} en {self.articulo.titulo}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Igual que en Articulo: detecta si el comentario cambia de artículo
+        instance = super().from_db(db, field_names, values)
+        instance._articulo_original_id = instance.__dict__.get('articulo_id')
+        return instance
+
 
 class MensajeContacto(models.Model):
     nombre = models.CharField(max_length=120)
@@ -101,4 +269,40 @@ class AcercaDe(models.Model):
         verbose_name_plural = "Acerca de"
 
     def __str__(self):
-        return f"Acerca de (actualizado: {self.fecha_actualizacion.strftime('%d/%m/%Y')})"
\ No newline at end of file
+        return f"Acerca de (actualizado: {self.fecha_actualizacion.strftime('%d/%m/%Y')})"
+
+class CorreoPendiente(models.Model):
+    """Correo a enviar por el comando procesar_outbox, fuera del request"""
+    PENDIENTE = 'pendiente'
+    ENVIADO = 'enviado'
+    FALLIDO = 'fallido'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (ENVIADO, 'Enviado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=254, blank=True)
+    # Lista de direcciones; vacía significa "todos los superusuarios"
+    destinatarios = models.JSONField(default=list, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    # Lote del worker que lo está enviando (ver correo.reclamar_lote)
+    reclamo = models.UUIDField(null=True, blank=True, editable=False)
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Correos pendientes"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='blog_correo_pendientes_idx'),
+            models.Index(fields=['reclamo'], name='blog_correo_reclamo_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.asunto} ({self.get_estado_display()})'
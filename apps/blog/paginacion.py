@@ -0,0 +1,150 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+En lugar de OFFSET, cada página se pide a partir del último (o primer) registro
+de la página anterior, de modo que la página N cuesta lo mismo que la página 1.
+El orden siempre es (campo, id) para que el cursor sea único aunque el campo
+principal se repita (ej: dos artículos con el mismo título).
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+SIGUIENTE = 's'
+ANTERIOR = 'a'
+
+
+class PaginaCursor:
+    """Resultado de una página: los elementos y los tokens para moverse"""
+
+    def __init__(self, elementos, cursor_siguiente=None, cursor_anterior=None):
+        self.elementos = elementos
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+
+    def __iter__(self):
+        return iter(self.elementos)
+
+    def __len__(self):
+        return len(self.elementos)
+
+    @property
+    def tiene_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def tiene_anterior(self):
+        return self.cursor_anterior is not None
+
+
+def codificar_cursor(direccion, valores):
+    """Convierte (dirección, valores) en un token opaco apto para la URL"""
+    datos = json.dumps([direccion, valores], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """Devuelve (dirección, valores) o None si el token no es válido"""
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        direccion, valores = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direccion not in (SIGUIENTE, ANTERIOR) or not isinstance(valores, list):
+        return None
+    return direccion, valores
+
+
+def _desglosar_orden(orden):
+    """('-fecha_creacion', '-id') -> [('fecha_creacion', True), ('id', True)]"""
+    return [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+
+
+def _filtro_desde(campos, valores, hacia_atras):
+    """
+    Arma el filtro "después de (v1, v2)" respetando el sentido de cada campo.
+
+    Se usa la forma  campo <= v1 AND (campo < v1 OR id < v2)  en vez de
+    (campo < v1) OR (campo = v1 AND id < v2): la primera condición permite que
+    SQLite haga un salto directo dentro del índice en lugar de recorrerlo.
+    """
+    (campo, desc), (desempate, desc_desempate) = campos
+    valor, valor_desempate = valores
+
+    # Al ir hacia atrás se invierte el sentido de la comparación
+    menor = desc != hacia_atras
+    menor_desempate = desc_desempate != hacia_atras
+
+    return Q(**{f'{campo}__{"lte" if menor else "gte"}': valor}) & (
+        Q(**{f'{campo}__{"lt" if menor else "gt"}': valor})
+        | Q(**{f'{desempate}__{"lt" if menor_desempate else "gt"}': valor_desempate})
+    )
+
+
+def _convertir_valores(modelo, campos, valores):
+    """Convierte los valores del cursor (texto JSON) al tipo de cada campo"""
+    if len(valores) != len(campos):
+        raise ValidationError('Cursor incompleto')
+    # to_python deja pasar None, y con None el filtro queda "campo < NULL"
+    if any(valor is None for valor in valores):
+        raise ValidationError('Cursor con valores nulos')
+    try:
+        return [
+            modelo._meta.get_field(campo).to_python(valor)
+            for (campo, _), valor in zip(campos, valores)
+        ]
+    except FieldDoesNotExist as e:
+        raise ValidationError(str(e))
+    except (TypeError, ValueError):
+        # Un valor que no es del tipo del campo (una lista, un objeto) en un cursor armado a mano
+        raise ValidationError('Cursor con valores inválidos')
+
+
+def paginar_por_cursor(queryset, orden, cursor=None, tamanio=10):
+    """
+    Devuelve una PaginaCursor con a lo sumo `tamanio` elementos.
+
+    `orden` es una tupla (campo, desempate), por ejemplo ('-fecha_creacion', '-id').
+    Se pide un elemento de más para saber si hay otra página sin hacer COUNT.
+    """
+    campos = _desglosar_orden(orden)
+    datos = decodificar_cursor(cursor)
+    direccion = SIGUIENTE
+    if datos:
+        try:
+            direccion, valores = datos[0], _convertir_valores(queryset.model, campos, datos[1])
+        except ValidationError:
+            datos = None
+        else:
+            queryset = queryset.filter(_filtro_desde(campos, valores, direccion == ANTERIOR))
+
+    if direccion == ANTERIOR:
+        # Se recorre en sentido inverso y luego se da vuelta la lista
+        orden_consulta = [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in orden]
+    else:
+        orden_consulta = list(orden)
+
+    filas = list(queryset.order_by(*orden_consulta)[:tamanio + 1])
+    hay_mas = len(filas) > tamanio
+    filas = filas[:tamanio]
+
+    if direccion == ANTERIOR:
+        filas.reverse()
+        hay_siguiente, hay_anterior = True, hay_mas
+    else:
+        hay_siguiente, hay_anterior = hay_mas, bool(datos)
+
+    def valores_de(obj):
+        return [getattr(obj, campo) for campo, _ in campos]
+
+    return PaginaCursor(
+        filas,
+        cursor_siguiente=codificar_cursor(SIGUIENTE, valores_de(filas[-1])) if filas and hay_siguiente else None,
+        cursor_anterior=codificar_cursor(ANTERIOR, valores_de(filas[0])) if filas and hay_anterior else None,
+    )
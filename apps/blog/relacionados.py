@@ -0,0 +1,324 @@
+"""
+Artículos relacionados por similitud de contenido (TF-IDF + coseno).
+
+Cada artículo se tokeniza una sola vez y sus frecuencias se guardan en
+TerminosArticulo; recalcular() solo vuelve a tokenizar los que cambiaron
+(según fecha_actualizacion). Con esas frecuencias se arma la matriz TF-IDF
+del corpus completo en NumPy; los candidatos de cada artículo salen de un
+índice invertido recortado y los vecinos más cercanos entre ellos se guardan
+en ArticuloRelacionado, así la vista de detalle hace una sola consulta.
+
+NumPy se importa dentro de las funciones que lo usan: el sitio funciona sin
+él, solo lo necesita el comando recompute_related.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .cache import RELACIONADOS, invalidar
+from .models import Articulo, ArticuloRelacionado, TerminosArticulo
+
+
+VECINOS = 4
+MAX_TERMINOS = 200
+
+# Las palabras del título cuentan como si aparecieran varias veces
+PESO_TITULO = 3
+
+# Tamaño de los lotes de ids en los filtros __in (límite de parámetros de SQLite)
+LOTE = 500
+
+# Elementos de los arreglos intermedios por bloque de artículos
+ELEMENTOS_POR_BLOQUE = 8_000_000
+
+# Límites del índice invertido que elige los candidatos (ver _similitudes):
+# artículos por término, términos por consulta y candidatos por artículo
+POR_TERMINO = 200
+TERMINOS_CONSULTA = 32
+CANDIDATOS = 64
+
+PALABRAS_VACIAS = frozenset("""
+    ante bajo cada como con contra cual cuando de del desde donde durante el ella
+    ellas ellos en entre era eran es esa ese eso esta este esto estos estas fue
+    fueron gran hace han hasta hay las les los mas mientras muy nos otra otro
+    para pero por porque que quien sea ser sin sobre son su sus tambien tiene
+    tras una uno unos unas ya fue sido esta estan ademas solo todo todos
+""".split())
+
+
+def _en_lotes(valores, tamanio=LOTE):
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamanio):
+        yield valores[inicio:inicio + tamanio]
+
+
+def tokenizar(texto):
+    """Palabras en minúscula y sin acentos, sin números ni palabras vacías"""
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [
+        palabra for palabra in re.findall(r'[a-z0-9ñ]+', texto)
+        if len(palabra) > 2 and not palabra.isdigit() and palabra not in PALABRAS_VACIAS
+    ]
+
+
+def contar_terminos(titulo, contenido, max_terminos=MAX_TERMINOS):
+    """Frecuencia de los `max_terminos` términos más repetidos del artículo"""
+    conteo = Counter(tokenizar(contenido))
+    for palabra in tokenizar(titulo):
+        conteo[palabra] += PESO_TITULO
+    return dict(conteo.most_common(max_terminos))
+
+
+def vectorizar_cambiados(todos=False, max_terminos=MAX_TERMINOS):
+    """
+    Actualiza TerminosArticulo de los artículos nuevos o modificados desde la
+    última corrida y devuelve sus ids.
+    """
+    vectorizados = dict(TerminosArticulo.objects.values_list('articulo_id', 'fecha_articulo'))
+    cambiados = [
+        articulo_id
+        for articulo_id, fecha in Articulo.objects.values_list('id', 'fecha_actualizacion').iterator()
+        if todos or vectorizados.get(articulo_id) != fecha
+    ]
+
+    for lote in _en_lotes(cambiados):
+        terminos = [
+            TerminosArticulo(
+                articulo_id=articulo_id,
+                terminos=contar_terminos(titulo, contenido, max_terminos),
+                fecha_articulo=fecha,
+            )
+            for articulo_id, titulo, contenido, fecha in Articulo.objects.filter(id__in=lote)
+            .values_list('id', 'titulo', 'contenido', 'fecha_actualizacion')
+        ]
+        TerminosArticulo.objects.bulk_create(
+            terminos,
+            update_conflicts=True,
+            unique_fields=['articulo'],
+            update_fields=['terminos', 'fecha_articulo'],
+        )
+    return cambiados
+
+
+def _matriz_tfidf():
+    """
+    Matriz TF-IDF del corpus en formato CSR, con cada fila normalizada.
+
+    Devuelve (ids, indptr, columnas, valores): la fila i corresponde al
+    artículo ids[i] y sus valores son valores[indptr[i]:indptr[i + 1]].
+    """
+    import numpy as np
+
+    ids, filas = [], []
+    for articulo_id, terminos in TerminosArticulo.objects.order_by('articulo_id').values_list('articulo_id', 'terminos'):
+        ids.append(articulo_id)
+        filas.append(terminos)
+
+    vocabulario = {}
+    indptr, columnas, frecuencias = [0], [], []
+    for terminos in filas:
+        for termino, frecuencia in terminos.items():
+            columnas.append(vocabulario.setdefault(termino, len(vocabulario)))
+            frecuencias.append(frecuencia)
+        indptr.append(len(columnas))
+
+    ids = np.array(ids, dtype=np.int64)
+    indptr = np.array(indptr, dtype=np.int64)
+    columnas = np.array(columnas, dtype=np.int64)
+    frecuencias = np.array(frecuencias, dtype=np.float32)
+
+    # IDF suavizado: log((1 + N) / (1 + df)) + 1
+    documentos = np.bincount(columnas, minlength=len(vocabulario))
+    idf = np.log((1 + len(ids)) / (1 + documentos)).astype(np.float32) + 1
+    valores = (1 + np.log(frecuencias)) * idf[columnas] if len(columnas) else frecuencias
+
+    # Normalización L2 de cada fila: el producto escalar pasa a ser el coseno
+    largo_filas = np.diff(indptr)
+    normas = np.sqrt(np.add.reduceat(valores ** 2, indptr[:-1][largo_filas > 0])) if len(valores) else []
+    escala = np.ones(len(ids), dtype=np.float32)
+    escala[largo_filas > 0] = normas
+    valores = valores / np.repeat(escala, largo_filas)
+    return ids, indptr, columnas, valores, len(vocabulario)
+
+
+def _mejores_por_grupo(grupos, puntajes, cantidad, total_grupos):
+    """
+    Índices de los `cantidad` puntajes más altos de cada grupo, ordenados por
+    grupo y de mayor a menor puntaje (a igual puntaje, en el orden en que vienen).
+    """
+    import numpy as np
+
+    if not len(grupos):
+        return np.zeros(0, dtype=np.int64)
+    bajo, alto = puntajes.min(), puntajes.max()
+    relativos = (puntajes - bajo) / (alto - bajo) if alto > bajo else np.zeros(len(puntajes))
+    # Un solo ordenamiento: el grupo en la parte entera y el puntaje, invertido, en la fraccionaria
+    orden = np.argsort(grupos * 2.0 + (1 - relativos), kind='stable')
+    ordenados = grupos[orden]
+    rango = np.arange(len(orden)) - np.searchsorted(ordenados, np.arange(total_grupos))[ordenados]
+    return orden[rango < cantidad]
+
+
+def _rangos(inicios, fines):
+    """Concatena los rangos [inicios[k], fines[k]); devuelve (índices, largo de cada rango)"""
+    import numpy as np
+
+    largos = fines - inicios
+    desplazamientos = inicios - (np.cumsum(largos) - largos)
+    return np.arange(largos.sum()) + np.repeat(desplazamientos, largos), largos
+
+
+def _recortar(grupos, puntajes, cantidad, total_grupos):
+    """Se queda con los `cantidad` mejores de cada grupo; devuelve (indptr, índices elegidos)"""
+    import numpy as np
+
+    elegidos = _mejores_por_grupo(grupos, puntajes, cantidad, total_grupos)
+    indptr = np.zeros(total_grupos + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(grupos[elegidos], minlength=total_grupos))
+    return indptr, elegidos
+
+
+def _similitudes(posiciones, ids, indptr, columnas, valores, dimension):
+    """
+    Genera (bloque, filas, candidatos, similitudes) por bloque de `posiciones`:
+    cada par es un artículo (su fila dentro del bloque) y uno de sus
+    CANDIDATOS más prometedores, con el coseno exacto entre los dos.
+
+    Comparar cada artículo con todo el corpus es cuadrático. En cambio se
+    usa un índice invertido recortado: cada término guarda solo los
+    POR_TERMINO artículos en los que más pesa, y cada artículo consulta con
+    sus TERMINOS_CONSULTA términos más pesados. Lo que suman esos productos
+    elige los candidatos, y para esos se calcula el coseno completo. La
+    memoria y el tiempo por artículo quedan acotados sin importar el tamaño
+    del corpus, a cambio de que un vecino que solo comparte términos de poco
+    peso pueda quedar afuera.
+    """
+    import numpy as np
+
+    total = len(ids)
+    filas = np.repeat(np.arange(total, dtype=np.int64), np.diff(indptr))
+    # Índice invertido (por término) y consultas (por artículo), recortados
+    invertido_ptr, invertido = _recortar(columnas, valores, POR_TERMINO, dimension)
+    invertido_filas, invertido_valores = filas[invertido], valores[invertido]
+    consulta_ptr, consulta = _recortar(filas, valores, TERMINOS_CONSULTA, total)
+    consulta_columnas, consulta_valores = columnas[consulta], valores[consulta]
+
+    # Elementos por artículo: los postings de sus términos y los términos de sus candidatos
+    terminos_por_fila = int(np.diff(indptr).max()) if total else 0
+    por_articulo = max(TERMINOS_CONSULTA * POR_TERMINO, CANDIDATOS * terminos_por_fila, 1)
+    tamanio_bloque = max(1, ELEMENTOS_POR_BLOQUE // por_articulo)
+
+    for inicio in range(0, len(posiciones), tamanio_bloque):
+        bloque = posiciones[inicio:inicio + tamanio_bloque]
+
+        # Puntaje aproximado con el índice recortado
+        indices, largos = _rangos(consulta_ptr[bloque], consulta_ptr[bloque + 1])
+        locales = np.repeat(np.arange(len(bloque), dtype=np.int64), largos)
+        terminos = consulta_columnas[indices]
+        postings, largos = _rangos(invertido_ptr[terminos], invertido_ptr[terminos + 1])
+        locales = np.repeat(locales, largos)
+        candidatos = invertido_filas[postings]
+        productos = np.repeat(consulta_valores[indices], largos) * invertido_valores[postings]
+        propio = candidatos != bloque[locales]  # un artículo no es su propio vecino
+        claves, inversa = np.unique(locales[propio] * total + candidatos[propio], return_inverse=True)
+        aproximado = np.bincount(inversa, weights=productos[propio], minlength=len(claves))
+        locales, candidatos = claves // total, claves % total
+        elegidos = _mejores_por_grupo(locales, aproximado, CANDIDATOS, len(bloque))
+        locales, candidatos = locales[elegidos], candidatos[elegidos]
+
+        # Coseno exacto de cada par: los términos del candidato buscados en los del artículo
+        indices, largos = _rangos(indptr[bloque], indptr[bloque + 1])
+        claves_articulo = np.repeat(np.arange(len(bloque), dtype=np.int64), largos) * dimension + columnas[indices]
+        orden = np.argsort(claves_articulo, kind='stable')
+        claves_articulo, valores_articulo = claves_articulo[orden], valores[indices][orden]
+        terminos, largos = _rangos(indptr[candidatos], indptr[candidatos + 1])
+        buscadas = np.repeat(locales, largos) * dimension + columnas[terminos]
+        similitud = np.zeros(len(candidatos), dtype=np.float32)
+        if len(claves_articulo):
+            posicion = np.minimum(np.searchsorted(claves_articulo, buscadas), len(claves_articulo) - 1)
+            coincide = claves_articulo[posicion] == buscadas
+            pares = np.repeat(np.arange(len(candidatos)), largos)[coincide]
+            productos = valores_articulo[posicion[coincide]] * valores[terminos[coincide]]
+            similitud = np.bincount(pares, weights=productos, minlength=len(candidatos)).astype(np.float32)
+        yield bloque, locales, candidatos, similitud
+
+
+def recalcular(todos=False, vecinos=VECINOS, max_terminos=MAX_TERMINOS):
+    """
+    Recalcula los artículos relacionados y devuelve (vectorizados, recalculados).
+
+    Se recalculan los vecinos de los artículos que cambiaron y de los que
+    podrían verse afectados por ellos: los que ya los tenían como vecinos y
+    los que ahora les resultan más similares que su último vecino guardado.
+    Los que perdieron un vecino borrado cuentan como cambiados (ver signals.py).
+    El IDF cambia un poco con cada artículo nuevo; `todos` recalcula el corpus
+    completo para absorber esa deriva.
+    """
+    import numpy as np
+
+    cambiados = vectorizar_cambiados(todos, max_terminos)
+    if not cambiados and not todos:
+        return 0, 0
+
+    ids, indptr, columnas, valores, dimension = _matriz_tfidf()
+    posicion_de = {articulo_id: posicion for posicion, articulo_id in enumerate(ids.tolist())}
+
+    if todos:
+        afectados = set(range(len(ids)))
+    else:
+        afectados = {posicion_de[articulo_id] for articulo_id in cambiados if articulo_id in posicion_de}
+        # Umbral de cada artículo: la similitud de su último vecino guardado, o
+        # 0 si su lista no está completa (solo se guardan similitudes positivas)
+        umbral = np.zeros(len(ids), dtype=np.float32)
+        for articulo_id, cantidad, minima in (
+            ArticuloRelacionado.objects.order_by().values('articulo_id')
+            .annotate(cantidad=Count('id'), minima=Min('similitud'))
+            .values_list('articulo_id', 'cantidad', 'minima')
+        ):
+            if articulo_id in posicion_de and cantidad >= vecinos:
+                umbral[posicion_de[articulo_id]] = minima
+        # Los que tenían a un cambiado como vecino
+        for lote in _en_lotes(cambiados):
+            afectados.update(
+                posicion_de[articulo_id]
+                for articulo_id in ArticuloRelacionado.objects.filter(relacionado_id__in=lote)
+                .values_list('articulo_id', flat=True)
+                if articulo_id in posicion_de
+            )
+        # Los que ahora tienen a un cambiado más cerca que su último vecino
+        cambiados_en_matriz = np.array(sorted(
+            posicion_de[articulo_id] for articulo_id in cambiados if articulo_id in posicion_de
+        ), dtype=np.int64)
+        for _, _, candidatos, similitud in _similitudes(cambiados_en_matriz, ids, indptr, columnas, valores, dimension):
+            afectados.update(candidatos[similitud > umbral[candidatos]].tolist())
+
+    afectados = np.array(sorted(afectados), dtype=np.int64)
+    relaciones = []
+    for bloque, locales, candidatos, similitud in _similitudes(afectados, ids, indptr, columnas, valores, dimension):
+        positivos = similitud > 0
+        locales, candidatos, similitud = locales[positivos], candidatos[positivos], similitud[positivos]
+        mejores = _mejores_por_grupo(locales, similitud, vecinos, len(bloque))
+        anterior, orden = -1, 0
+        for local, vecino, valor in zip(locales[mejores].tolist(), candidatos[mejores].tolist(), similitud[mejores].tolist()):
+            orden = orden + 1 if local == anterior else 0
+            anterior = local
+            relaciones.append(ArticuloRelacionado(
+                articulo_id=int(ids[bloque[local]]),
+                relacionado_id=int(ids[vecino]),
+                posicion=orden,
+                similitud=valor,
+            ))
+
+    with transaction.atomic():
+        if todos:
+            ArticuloRelacionado.objects.all().delete()
+        else:
+            for lote in _en_lotes(ids[afectados].tolist()):
+                ArticuloRelacionado.objects.filter(articulo_id__in=lote).delete()
+        ArticuloRelacionado.objects.bulk_create(relaciones, batch_size=1000)
+        invalidar(RELACIONADOS)
+    return len(cambiados), len(afectados)
@@ -0,0 +1,212 @@
+"""
+Lecturas desde una réplica de la base.
+
+- EnrutadorReplica manda a la réplica las lecturas de los modelos del blog
+  mientras se atiende una vista pública (VISTAS_REPLICA) y todas las
+  escrituras a 'default'. Sesiones y usuarios se leen siempre del primario.
+- ReplicaMiddleware decide por request: después de escribir, el usuario
+  recibe una cookie y durante REPLICA_VENTANA segundos lee del primario, así
+  ve enseguida lo que acaba de publicar.
+- Los demás leen de la réplica mientras su copia tenga menos de
+  REPLICA_RETRASO_MAXIMO segundos, aunque haya escrituras más nuevas: ven
+  los cambios con ese atraso como máximo.
+- Cada escritura (de un request, un comando o un hilo como el de las
+  miniaturas) queda registrada. Lo que se arma desde una réplica anterior a
+  la última escritura (lectura_al_dia() es False) no se guarda en la caché
+  de páginas ni lleva ETag: quedaría bajo la versión nueva de sus etiquetas.
+
+En local la réplica es una copia de la base que actualiza
+"python manage.py sincronizar_replica" con la API de backup de SQLite; al
+terminar cada copia deja la hora en que empezó en un archivo al lado
+(ruta_marca()). Si la réplica no está configurada, no se copió nunca o su
+copia es más vieja que REPLICA_RETRASO_MAXIMO, todo se lee del primario.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+REPLICA = 'replica'
+
+# Vistas públicas que pueden leer de la réplica (nombres de apps/blog/urls.py)
+VISTAS_REPLICA = frozenset({
+    'index', 'listar_por_categoria', 'detalle_articulo',
+    'feed', 'feed_formato', 'feed_categoria', 'feed_categoria_formato',
+})
+
+COOKIE = 'leer_primario'
+ULTIMA_ESCRITURA = 'blog:replica:ultima_escritura'
+
+# Una escritura fuera de un request se registra antes de confirmarse: se
+# anota este margen hacia adelante, más que el busy_timeout (5 s) que puede
+# esperar el lock
+MARGEN_ESCRITURA = 10
+
+_estado = threading.local()
+# Copia local de ULTIMA_ESCRITURA: la clave de la caché puede desalojarse
+_ultima_escritura = 0.0
+
+
+def _leer_de_replica():
+    return getattr(_estado, 'replica', False)
+
+
+def ruta_marca():
+    """Archivo cuya fecha de modificación es el instante de la última copia"""
+    return f'{settings.DATABASES[REPLICA]["NAME"]}.instante'
+
+
+def instante_replica():
+    """Hora (time.time()) en que empezó la última copia, o None si no hay réplica"""
+    if REPLICA not in settings.DATABASES:
+        return None
+    try:
+        return os.stat(ruta_marca()).st_mtime
+    except OSError:
+        return None
+
+
+def replica_vigente():
+    """True si la última copia de la réplica tiene menos de REPLICA_RETRASO_MAXIMO segundos"""
+    instante = instante_replica()
+    return instante is not None and time.time() - instante <= settings.REPLICA_RETRASO_MAXIMO
+
+
+def replica_al_dia():
+    """True si la réplica ya tiene todas las escrituras registradas"""
+    instante = instante_replica()
+    if instante is None:
+        return False
+    return max(_ultima_escritura, cache.get(ULTIMA_ESCRITURA) or 0) <= instante
+
+
+def lectura_al_dia():
+    """False si el request lee de una réplica a la que le falta la última escritura"""
+    return not _leer_de_replica() or replica_al_dia()
+
+
+def sincronizar():
+    """
+    Copia 'default' sobre la réplica con la API de backup de SQLite y
+    devuelve los segundos que tardó.
+
+    La copia se hace en un solo paso: es una foto consistente de la base. La
+    réplica está en modo WAL, así que quien la está leyendo sigue viendo la
+    copia anterior hasta que termina la nueva.
+    """
+    if REPLICA not in settings.DATABASES:
+        raise ImproperlyConfigured(f"No hay una base '{REPLICA}' en settings.DATABASES")
+    origen = connections[DEFAULT_DB_ALIAS]
+    if origen.vendor != 'sqlite':
+        raise ImproperlyConfigured('La réplica local solo sirve con SQLite')
+
+    origen.ensure_connection()
+    inicio = time.time()
+    destino = sqlite3.connect(settings.DATABASES[REPLICA]['NAME'], timeout=30)
+    try:
+        destino.execute('PRAGMA journal_mode = WAL')
+        origen.connection.backup(destino)
+    finally:
+        destino.close()
+
+    # La marca va al final: si la copia falló, la réplica sigue contando como vieja
+    marca = ruta_marca()
+    with open(marca, 'a'):
+        pass
+    os.utime(marca, (inicio, inicio))
+    return time.time() - inicio
+
+
+def _registrar_escritura(margen=0):
+    # En la caché, para los otros procesos
+    global _ultima_escritura
+    instante = time.time() + margen
+    if instante <= _ultima_escritura:
+        # Ya hay una marca posterior (la de una escritura anterior con margen)
+        return
+    # Con margen, un segundo más: las escrituras seguidas de un comando no
+    # vuelven a escribir la caché cada vez
+    _ultima_escritura = instante + 1 if margen else instante
+    # Sin pisar una marca más nueva de otro proceso
+    cache.set(ULTIMA_ESCRITURA, max(_ultima_escritura, cache.get(ULTIMA_ESCRITURA) or 0), None)
+
+
+class EnrutadorReplica:
+    def db_for_read(self, model, **hints):
+        if _leer_de_replica() and model._meta.app_label == 'blog':
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not getattr(_estado, 'en_request', False):
+            # Comandos, shell, hilos (miniaturas): no hay un final de request
+            # que la vuelva a marcar cuando ya está confirmada
+            _registrar_escritura(MARGEN_ESCRITURA)
+            if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+                transaction.on_commit(_registrar_escritura, using=DEFAULT_DB_ALIAS)
+        elif not _estado.escribio:
+            # La primera escritura del request la registra ya mismo; el
+            # middleware la vuelve a marcar al terminar
+            _estado.escribio = True
+            _registrar_escritura()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Son los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia: nunca se migra
+        if db == REPLICA:
+            return False
+        return None
+
+
+def _en_replica(partes):
+    """Las respuestas por partes (feeds) leen la base después de salir de la vista"""
+    _estado.replica = True
+    try:
+        yield from partes
+    finally:
+        _estado.replica = False
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _estado.en_request = True
+        _estado.replica = False
+        _estado.escribio = False
+        try:
+            respuesta = self.get_response(request)
+            leyo_de_replica = _leer_de_replica()
+        finally:
+            escribio = _estado.escribio
+            _estado.replica = False
+            _estado.en_request = False
+
+        if escribio:
+            _registrar_escritura()
+            respuesta.set_cookie(
+                COOKIE, '1', max_age=settings.REPLICA_VENTANA, httponly=True, samesite='Lax',
+            )
+        elif leyo_de_replica and respuesta.streaming:
+            respuesta.streaming_content = _en_replica(respuesta.streaming_content)
+        return respuesta
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.url_name in VISTAS_REPLICA
+            and COOKIE not in request.COOKIES
+            and replica_vigente()
+        ):
+            _estado.replica = True
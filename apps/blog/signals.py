@@ -1,26 +1,251 @@
-from django.db.models.signals import post_save
+import logging
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Perfil
+from django.utils import timezone
+from . import busqueda, derivados
+from .cache import CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES, invalidar
+from .cache_paginas import ARTICULOS, COMENTARIOS, USUARIOS, etiqueta_articulo, etiqueta_categoria
+from .models import Articulo, ArticuloRelacionado, Categoria, Comentario, Perfil, TerminosArticulo
+
+
+logger = logging.getLogger(__name__)
+
 
+# ========== PERFILES ==========
+# Los usuarios creados con bulk_create no pasan por acá: "python manage.py
+# recount" les crea el perfil (Perfil.objects.crear_faltantes()).
 
 # Crea automáticamente un Perfil cuando se crea un nuevo User
 @receiver(post_save, sender=User)
-def crear_perfil_usuario(sender, instance, created, **kwargs):
+def crear_perfil_usuario(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    # Al asignar user= el perfil queda también en la caché del usuario
+    Perfil.objects.create(
+        user=instance,
+        # Rol predeterminado
+        rol='miembro'
+    )
+    logger.info('Perfil creado automáticamente para %s', instance.username)
 
-    if created:
-        Perfil.objects.create(
-            user=instance,
-            # Rol predeterminado
-            rol='miembro'
-        )
-        print(f"Perfil creado automaticamente para {instance.username}")
+
+# Guarda el perfil cuando se actualiza el usuario, solo si cambió. El login
+# guarda el usuario (last_login) en cada inicio de sesión: ahí no se escribe
+# ni se consulta nada más.
+@receiver(post_save, sender=User)
+def guardar_perfil_usuario(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    # Si el perfil no se cargó, nadie pudo haberlo modificado
+    if not User.perfil.is_cached(instance):
+        return
+    # Cargado con select_related y sin fila: el acceso lanza RelatedObjectDoesNotExist
+    perfil = getattr(instance, 'perfil', None)
+    if perfil is not None and perfil.tiene_cambios():
+        perfil.save(update_fields=['rol'])
+        logger.debug('Perfil actualizado para %s', instance.username)
+
+
+# ========== CACHÉ DE PÁGINAS ==========
+# Cada cambio invalida solo las páginas que muestran el objeto (ver cache_paginas.py).
+# Van antes que los contadores, que actualizan _categoria_original_id al terminar.
+
+@receiver(post_save, sender=Articulo)
+@receiver(post_delete, sender=Articulo)
+def invalidar_paginas_articulo(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    etiquetas = {ARTICULOS, etiqueta_articulo(instance.pk), etiqueta_categoria(instance.categoria_id)}
+    # Si se movió de categoría, el listado anterior también cambia
+    categoria_anterior_id = getattr(instance, '_categoria_original_id', None)
+    if categoria_anterior_id is not None:
+        etiquetas.add(etiqueta_categoria(categoria_anterior_id))
+    invalidar(*etiquetas)
+
+
+@receiver(post_save, sender=Comentario)
+@receiver(post_delete, sender=Comentario)
+def invalidar_paginas_comentario(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    etiquetas = {COMENTARIOS, etiqueta_articulo(instance.articulo_id)}
+    articulo_anterior_id = getattr(instance, '_articulo_original_id', None)
+    if articulo_anterior_id is not None:
+        etiquetas.add(etiqueta_articulo(articulo_anterior_id))
+    invalidar(*etiquetas)
 
 
-# Guarda el perfil cuando se actualiza el usuario
 @receiver(post_save, sender=User)
-def guardar_perfil_usuario(sender, instance, **kwargs):
-    
-    if hasattr(instance, 'perfil'):
-        instance.perfil.save()
-        print(f"Perfil actualizado para {instance.username}")
\ No newline at end of file
+@receiver(post_delete, sender=User)
+def invalidar_paginas_usuario(sender, instance, raw=False, update_fields=None, **kwargs):
+    # El login solo guarda last_login, que no se muestra en ningún lado
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    invalidar(USUARIOS)
+
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_paginas_categoria(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidar(etiqueta_categoria(instance.pk))
+
+
+# ========== CONTADORES DE ARTÍCULOS Y COMENTARIOS ==========
+# Se actualizan con F() para que dos requests simultáneos no se pisen.
+# Las operaciones masivas (update/bulk_create) no disparan señales:
+# después de usarlas hay que correr "python manage.py recount".
+# Cada cambio también renueva Categoria.fecha_actualizacion, el sello que
+# usan las respuestas condicionales (ver condicional.py).
+
+def _sumar(campo, cantidad):
+    # Nunca por debajo de cero aunque el contador se haya desfasado
+    return Greatest(F(campo) + cantidad, Value(0))
+
+
+def _sumar_a_categoria(categoria_id, articulos=0, comentarios=0):
+    Categoria.objects.filter(pk=categoria_id).update(
+        total_articulos=_sumar('total_articulos', articulos),
+        total_comentarios=_sumar('total_comentarios', comentarios),
+        fecha_actualizacion=timezone.now(),
+    )
+
+
+def _sumar_a_articulo(articulo_id, comentarios):
+    Articulo.objects.filter(pk=articulo_id).update(total_comentarios=_sumar('total_comentarios', comentarios))
+    Categoria.objects.filter(pk=_categoria_de_articulo(articulo_id)).update(
+        total_comentarios=_sumar('total_comentarios', comentarios),
+        fecha_actualizacion=timezone.now(),
+    )
+
+
+def _categoria_de_articulo(articulo_id):
+    """Subconsulta con la categoría del artículo (evita leerlo en Python)"""
+    return Subquery(Articulo.objects.filter(pk=articulo_id).values('categoria_id')[:1])
+
+
+@receiver(post_save, sender=Articulo)
+def contar_articulo_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        _sumar_a_categoria(instance.categoria_id, articulos=1)
+        invalidar(CATEGORIAS_POPULARES)
+    else:
+        categoria_anterior_id = getattr(instance, '_categoria_original_id', None)
+        if categoria_anterior_id is not None and categoria_anterior_id != instance.categoria_id:
+            # El artículo se movió de categoría: se lleva sus comentarios
+            comentarios = Articulo.objects.filter(pk=instance.pk).values_list('total_comentarios', flat=True).first() or 0
+            _sumar_a_categoria(categoria_anterior_id, articulos=-1, comentarios=-comentarios)
+            _sumar_a_categoria(instance.categoria_id, articulos=1, comentarios=comentarios)
+            invalidar(CATEGORIAS_POPULARES)
+        else:
+            # Edición sin mover: los listados de la categoría cambian igual
+            Categoria.objects.filter(pk=instance.categoria_id).update(fecha_actualizacion=timezone.now())
+
+    instance._categoria_original_id = instance.categoria_id
+
+
+@receiver(post_delete, sender=Articulo)
+def contar_articulo_eliminado(sender, instance, **kwargs):
+    # Los comentarios ya se descontaron uno a uno al borrarse en cascada
+    _sumar_a_categoria(instance.categoria_id, articulos=-1)
+    invalidar(CATEGORIAS_POPULARES)
+
+
+@receiver(post_save, sender=Comentario)
+def contar_comentario_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        _sumar_a_articulo(instance.articulo_id, 1)
+        invalidar(CATEGORIAS_POPULARES)
+    else:
+        # Desde el admin se puede mover un comentario a otro artículo
+        articulo_anterior_id = getattr(instance, '_articulo_original_id', None)
+        if articulo_anterior_id is not None and articulo_anterior_id != instance.articulo_id:
+            _sumar_a_articulo(articulo_anterior_id, -1)
+            _sumar_a_articulo(instance.articulo_id, 1)
+            invalidar(CATEGORIAS_POPULARES)
+
+    instance._articulo_original_id = instance.articulo_id
+
+
+@receiver(post_delete, sender=Comentario)
+def contar_comentario_eliminado(sender, instance, **kwargs):
+    _sumar_a_articulo(instance.articulo_id, -1)
+    invalidar(CATEGORIAS_POPULARES)
+
+
+# ========== INVALIDACIÓN DE CACHÉ ==========
+# El menú del header y el ranking muestran el nombre de cada categoría: si se
+# crea, renombra o borra una hay que reconstruir ambos. Los contadores se
+# actualizan con update() y no pasan por aquí.
+# El sello de las páginas de las otras categorías no se toca: su ETag incluye
+# la versión de CATEGORIAS_GLOBALES.
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_cache_categorias(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidar(CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES)
+
+
+# ========== MINIATURAS ==========
+# Si la imagen es nueva se generan sus versiones reducidas en segundo plano,
+# una vez confirmada la transacción (el archivo ya está guardado). Las de la
+# imagen anterior se borran cuando las nuevas están listas (derivados.py); si
+# se quitó la imagen o se borró el artículo, enseguida.
+
+@receiver(post_save, sender=Articulo)
+def generar_miniaturas(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    imagen = instance.imagen_destacada
+    if not imagen:
+        anterior = instance.imagen_derivados
+        if anterior:
+            Articulo.objects.filter(pk=instance.pk).update(imagen_derivados='')
+            instance.imagen_derivados = ''
+            transaction.on_commit(partial(derivados.borrar_derivados, anterior))
+        return
+    if imagen.name != instance.imagen_derivados:
+        transaction.on_commit(partial(derivados.encolar, instance.pk, imagen.name))
+
+
+@receiver(post_delete, sender=Articulo)
+def borrar_miniaturas(sender, instance, **kwargs):
+    if instance.imagen_derivados:
+        transaction.on_commit(partial(derivados.borrar_derivados, instance.imagen_derivados))
+
+
+# ========== RELACIONADOS ==========
+# Al borrar un artículo, sus filas en las listas de relacionados de los demás
+# se borran en cascada y esas listas quedan cortas. Se descartan los términos
+# de esos artículos: recompute_related los toma como modificados y les vuelve
+# a buscar vecinos.
+
+@receiver(pre_delete, sender=Articulo)
+def encolar_relacionados_afectados(sender, instance, **kwargs):
+    TerminosArticulo.objects.filter(
+        articulo_id__in=ArticuloRelacionado.objects.filter(relacionado=instance)
+        .exclude(articulo=instance).values('articulo_id')
+    ).delete()
+
+
+# ========== ÍNDICE DE BÚSQUEDA ==========
+# Si una migración reconstruyó blog_articulo, SQLite borró los triggers del
+# índice FTS: se vuelven a crear y se reindexa.
+
+@receiver(post_migrate)
+def asegurar_indice_busqueda(sender, using='default', **kwargs):
+    if sender.name == 'apps.blog':
+        busqueda.asegurar_indice(connections[using])
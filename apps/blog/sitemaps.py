@@ -0,0 +1,155 @@
+"""
+Sitemaps precalculados en archivos estáticos.
+
+Los artículos se reparten en partes por rango de id (la parte n tiene los ids
+de n * URLS_POR_PARTE + 1 a (n + 1) * URLS_POR_PARTE), así que cada una tiene
+como mucho 50.000 URLs, el máximo que aceptan los buscadores, y un artículo
+nuevo o borrado solo cambia su parte. Las categorías van en una parte aparte.
+
+manifest.json guarda la firma de cada parte (cantidad, suma de ids y última
+fecha de actualización). Una sola consulta agrupada calcula las firmas
+actuales y solo se reescriben las partes cuya firma cambió.
+"""
+import json
+import os
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Sum
+from django.urls import reverse
+
+from .models import Articulo, Categoria
+
+
+URLS_POR_PARTE = 50000
+# Filas que se leen por vez al escribir una parte
+TAMANIO_TANDA = 2000
+
+INDICE = 'sitemap.xml'
+MANIFIESTO = 'manifest.json'
+CATEGORIAS = 'categorias'
+
+_CABECERA = '<?xml version="1.0" encoding="UTF-8"?>\n'
+_XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def directorio():
+    return getattr(settings, 'SITEMAPS_ROOT', None) or os.path.join(settings.BASE_DIR, 'sitemaps')
+
+
+def nombre_archivo(parte):
+    return f'sitemap-{parte}.xml'
+
+
+def _escribir(ruta, lineas):
+    """Escribe el archivo completo en uno temporal y lo reemplaza de una vez"""
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        archivo.writelines(lineas)
+    os.replace(temporal, ruta)
+
+
+def _url(dominio, ruta, fecha):
+    return f'<url><loc>{escape(dominio + ruta)}</loc><lastmod>{fecha.isoformat()}</lastmod></url>\n'
+
+
+def _firmas_actuales():
+    """{parte: firma} de todas las partes con una consulta agrupada por rango de id"""
+    filas = (
+        Articulo.objects.order_by()
+        .annotate(parte=(F('id') - 1) / URLS_POR_PARTE)
+        .values('parte')
+        .annotate(total=Count('id'), suma=Sum('id'), ultima=Max('fecha_actualizacion'))
+        .values_list('parte', 'total', 'suma', 'ultima')
+    )
+    firmas = {
+        str(parte): [total, suma, ultima.isoformat()] for parte, total, suma, ultima in filas
+    }
+    categorias = Categoria.objects.aggregate(
+        total=Count('id'), suma=Sum('id'), ultima=Max('fecha_actualizacion')
+    )
+    if categorias['total']:
+        firmas[CATEGORIAS] = [categorias['total'], categorias['suma'], categorias['ultima'].isoformat()]
+    return firmas
+
+
+def _lineas_articulos(parte, dominio):
+    desde = int(parte) * URLS_POR_PARTE
+    filas = (
+        Articulo.objects.filter(id__gt=desde, id__lte=desde + URLS_POR_PARTE)
+        .order_by('id')
+        .values_list('id', 'fecha_actualizacion')
+    )
+    yield f'{_CABECERA}<urlset {_XMLNS}>\n'
+    for articulo_id, fecha in filas.iterator(chunk_size=TAMANIO_TANDA):
+        yield _url(dominio, reverse('detalle_articulo', args=[articulo_id]), fecha)
+    yield '</urlset>\n'
+
+
+def _lineas_categorias(dominio):
+    filas = Categoria.objects.order_by('id').values_list('id', 'fecha_actualizacion')
+    yield f'{_CABECERA}<urlset {_XMLNS}>\n'
+    ultima = None
+    for categoria_id, fecha in filas.iterator(chunk_size=TAMANIO_TANDA):
+        ultima = max(ultima, fecha) if ultima else fecha
+        yield _url(dominio, reverse('listar_por_categoria', args=[categoria_id]), fecha)
+    # La portada cambia con cualquier artículo, igual que alguna categoría
+    if ultima:
+        yield _url(dominio, reverse('index'), ultima)
+    yield '</urlset>\n'
+
+
+def _leer_manifiesto(raiz):
+    try:
+        with open(os.path.join(raiz, MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def generar(dominio, todos=False):
+    """
+    Reescribe las partes que cambiaron desde la última vez (o todas) y el índice.
+
+    Devuelve (partes reescritas, partes borradas).
+    """
+    raiz = directorio()
+    os.makedirs(raiz, exist_ok=True)
+    dominio = dominio.rstrip('/')
+
+    anterior = _leer_manifiesto(raiz)
+    if anterior.get('dominio') != dominio:
+        todos = True
+    firmas_anteriores = {} if todos else anterior.get('partes', {})
+    firmas = _firmas_actuales()
+
+    reescritas = []
+    for parte, firma in firmas.items():
+        existe = os.path.exists(os.path.join(raiz, nombre_archivo(parte)))
+        if firmas_anteriores.get(parte) == firma and existe:
+            continue
+        if parte == CATEGORIAS:
+            lineas = _lineas_categorias(dominio)
+        else:
+            lineas = _lineas_articulos(parte, dominio)
+        _escribir(os.path.join(raiz, nombre_archivo(parte)), lineas)
+        reescritas.append(parte)
+
+    borradas = [parte for parte in anterior.get('partes', {}) if parte not in firmas]
+    for parte in borradas:
+        try:
+            os.remove(os.path.join(raiz, nombre_archivo(parte)))
+        except FileNotFoundError:
+            pass
+
+    if reescritas or borradas or not os.path.exists(os.path.join(raiz, INDICE)):
+        indice = [f'{_CABECERA}<sitemapindex {_XMLNS}>\n']
+        for parte, (_, _, ultima) in sorted(firmas.items()):
+            loc = dominio + reverse('sitemap_parte', args=[nombre_archivo(parte)])
+            indice.append(f'<sitemap><loc>{escape(loc)}</loc><lastmod>{ultima}</lastmod></sitemap>\n')
+        indice.append('</sitemapindex>\n')
+        _escribir(os.path.join(raiz, INDICE), indice)
+
+    # El manifiesto va al final: si algo falló antes, la próxima corrida lo rehace
+    _escribir(os.path.join(raiz, MANIFIESTO), [json.dumps({'dominio': dominio, 'partes': firmas}, indent=1)])
+    return reescritas, borradas
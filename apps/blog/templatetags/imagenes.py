@@ -0,0 +1,46 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from apps.blog.miniaturas import SIZES, TAMANIOS, nombre_derivado
+
+
+register = template.Library()
+
+
+def _srcset(nombre, anchos, extension):
+    return ', '.join(
+        f'{default_storage.url(nombre_derivado(nombre, ancho, extension))} {ancho}w'
+        for ancho in anchos
+    )
+
+
+@register.simple_tag
+def imagen_articulo(articulo, uso, **atributos):
+    """
+    <img> de `imagen_destacada` para `uso` ('card', 'hero' o 'detalle').
+
+    Con las miniaturas ya generadas arma un <picture> con WebP y JPEG de
+    respaldo; si todavía no existen usa la imagen original. Los atributos
+    extra (style, loading, ...) van al <img>.
+    """
+    imagen = articulo.imagen_destacada
+    if not imagen:
+        return ''
+    atributos = flatatt(atributos)
+
+    if imagen.name != articulo.imagen_derivados:
+        return format_html('<img src="{}" alt="{}"{}>', imagen.url, articulo.titulo, atributos)
+
+    anchos = TAMANIOS[uso]
+    return format_html(
+        '<picture class="imagen-responsiva">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}>'
+        '</picture>',
+        _srcset(imagen.name, anchos, 'webp'), SIZES[uso],
+        default_storage.url(nombre_derivado(imagen.name, anchos[0], 'jpg')),
+        _srcset(imagen.name, anchos, 'jpg'), SIZES[uso],
+        articulo.titulo, atributos,
+    )
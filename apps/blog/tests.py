@@ -1,3 +1,894 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Count
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import limites, minificar, replica, sitemaps, views
+from .cache import invalidar
+from .correo import encolar_correo, procesar_lote
+from .miniaturas import nombres_derivados
+from .models import Articulo, ArticuloRelacionado, Categoria, Comentario, CorreoPendiente
+from .paginacion import codificar_cursor
+
+
+def setUpModule():
+    # Los baldes de limitar_escrituras en un archivo propio: los ids y la IP de
+    # los tests se repiten entre corridas y no deben heredar fichas gastadas
+    global _directorio_limites, _ajuste_limites
+    _directorio_limites = tempfile.TemporaryDirectory()
+    _ajuste_limites = override_settings(LIMITES_ARCHIVO=os.path.join(_directorio_limites.name, 'limites.bin'))
+    _ajuste_limites.enable()
+
+
+def tearDownModule():
+    _ajuste_limites.disable()
+    _cerrar_limites()
+    _directorio_limites.cleanup()
+
+
+def _cerrar_limites():
+    if limites._mapa is not None:
+        descriptor, mapa = limites._mapa
+        mapa.close()
+        os.close(descriptor)
+        limites._mapa = None
+
+
+class PlanDeConsultasTests(TestCase):
+    """
+    Verifica con EXPLAIN QUERY PLAN que las consultas de los listados usan un
+    índice en lugar de recorrer la tabla completa y ordenar en un B-tree temporal.
+    """
+
+    TABLAS = ('blog_articulo', 'blog_comentario')
+
+    @classmethod
+    def setUpTestData(cls):
+        autor = User.objects.create_user('autor', password='x')
+        cls.categoria = Categoria.objects.create(nombre='Fútbol')
+        otra = Categoria.objects.create(nombre='Tenis')
+        ahora = timezone.now()
+        for i in range(30):
+            articulo = Articulo.objects.create(
+                titulo=f'Artículo {i % 7}',
+                contenido='Contenido de prueba',
+                categoria=cls.categoria if i % 2 else otra,
+                autor=autor,
+                destacado=i % 4 == 0,
+            )
+            Articulo.objects.filter(pk=articulo.pk).update(fecha_creacion=ahora - timedelta(days=i))
+            Comentario.objects.create(articulo=articulo, autor=autor, contenido='Comentario')
+        cls.articulo = articulo
+
+    def setUp(self):
+        # Sin páginas cacheadas: cada request tiene que llegar a la base de datos
+        cache.clear()
+
+    def _planes(self, url):
+        """Ejecuta la vista y devuelve (sql, plan) de cada consulta a las tablas del blog"""
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+
+        planes = []
+        with connection.cursor() as cursor:
+            for consulta in consultas.captured_queries:
+                sql = consulta['sql']
+                if not sql.startswith('SELECT') or not any(f'"{t}"' in sql for t in self.TABLAS):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                planes.append((sql, [fila[-1] for fila in cursor.fetchall()]))
+        return respuesta, planes
+
+    def assertUsaIndices(self, url):
+        respuesta, planes = self._planes(url)
+        self.assertTrue(planes, f'{url} no consultó artículos ni comentarios')
+        for sql, plan in planes:
+            for paso in plan:
+                self.assertNotIn('USE TEMP B-TREE', paso, f'{url}: ordena sin índice\n{sql}\n{plan}')
+                for tabla in self.TABLAS:
+                    self.assertNotEqual(paso, f'SCAN {tabla}', f'{url}: recorre {tabla} completa\n{sql}\n{plan}')
+        return respuesta
+
+    def test_index(self):
+        for orden in ('reciente', 'antigua', 'alpha_asc', 'alpha_desc'):
+            with self.subTest(orden=orden):
+                respuesta = self.assertUsaIndices(f"{reverse('index')}?orden={orden}")
+                # La segunda página también debe ir por índice
+                pagina = respuesta.context['pagina']
+                self.assertTrue(pagina.tiene_siguiente)
+                self.assertUsaIndices(f"{reverse('index')}?orden={orden}&cursor={pagina.cursor_siguiente}")
+
+    def test_listados_sin_campos_diferidos(self):
+        # Con imagen, las tarjetas usan también las miniaturas
+        Articulo.objects.update(imagen_destacada='articulos/foto.png', imagen_derivados='articulos/foto.png')
+        # Un campo que falte en para_listado() sumaría una consulta por tarjeta
+        # Portada: sello, destacados, ranking, menú y la página
+        with self.assertNumQueries(5):
+            self.assertEqual(self.client.get(reverse('index')).status_code, 200)
+        # Categoría: sello, la categoría, destacados, ranking, menú y la página
+        cache.clear()
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(reverse('listar_por_categoria', args=[self.categoria.id])).status_code, 200)
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        primera = self.client.get(reverse('index')).context['pagina']
+        for valores in (None, [None, None], [[1], {'a': 2}], ['no es fecha', 'x']):
+            with self.subTest(valores=valores):
+                # Sin la caché de páginas, que la sirve con la clave de la primera
+                cache.clear()
+                cursor = codificar_cursor('s', valores)
+                respuesta = self.client.get(f"{reverse('index')}?cursor={cursor}")
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(list(respuesta.context['pagina']), list(primera))
+        respuesta = self.client.get(f"{reverse('index')}?cursor=no-es-base64!")
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_cursor_de_busqueda_invalido(self):
+        for valores in ([[1], 2], [1.5, '2'], [True, 1], [None, None]):
+            with self.subTest(valores=valores):
+                cursor = codificar_cursor('s', valores)
+                respuesta = self.client.get(f"{reverse('buscar')}?q=articulo&cursor={cursor}")
+                self.assertEqual(respuesta.status_code, 200)
+
+    def test_listar_por_categoria(self):
+        url = reverse('listar_por_categoria', args=[self.categoria.id])
+        for orden in ('reciente', 'antigua', 'alpha_asc', 'alpha_desc'):
+            with self.subTest(orden=orden):
+                respuesta = self.assertUsaIndices(f'{url}?orden={orden}')
+                pagina = respuesta.context['pagina']
+                self.assertUsaIndices(f'{url}?orden={orden}&cursor={pagina.cursor_siguiente}')
+
+    def test_detalle_articulo(self):
+        self.assertUsaIndices(reverse('detalle_articulo', args=[self.articulo.id]))
+
+
+class RespuestasCondicionalesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('lector', password='x')
+        cls.futbol = Categoria.objects.create(nombre='Fútbol')
+        cls.tenis = Categoria.objects.create(nombre='Tenis')
+        Articulo.objects.create(titulo='Final', contenido='Contenido', categoria=cls.futbol, autor=cls.usuario)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_el_etag_distingue_al_usuario(self):
+        anonima = self.client.get(reverse('index'))
+        self.assertIn('ETag', anonima)
+        # Una fecha no distingue al usuario: sin Last-Modified no hay 304 por If-Modified-Since
+        self.assertNotIn('Last-Modified', anonima)
+        self.assertEqual(self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=anonima['ETag']).status_code, 304)
+
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(
+            reverse('index'), HTTP_IF_NONE_MATCH=anonima['ETag'], HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_editar_una_categoria_no_renueva_las_demas(self):
+        antes = Categoria.objects.get(pk=self.tenis.pk).fecha_actualizacion
+        self.futbol.descripcion = 'Nueva descripción'
+        self.futbol.save()
+        self.assertEqual(Categoria.objects.get(pk=self.tenis.pk).fecha_actualizacion, antes)
+
+    def test_sello_del_articulo(self):
+        articulo = Articulo.objects.get()
+        otro = Articulo.objects.create(titulo='Semifinal', contenido='Texto', categoria=self.tenis, autor=self.usuario)
+        ArticuloRelacionado.objects.create(articulo=articulo, relacionado=otro, posicion=0, similitud=0.5)
+        Comentario.objects.create(articulo=articulo, autor=self.usuario, contenido='Comentario')
+        url = reverse('detalle_articulo', args=[articulo.id])
+        # Logueado: sin la caché de páginas, el sello se calcula en cada request
+        self.client.force_login(self.usuario)
+
+        # Revalidar no recorre los comentarios: una búsqueda en el índice
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        sql = next(c['sql'] for c in consultas.captured_queries if '"blog_comentario"' in c['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' | '.join(fila[-1] for fila in cursor.fetchall())
+        self.assertIn('blog_com_art_act_idx', plan)
+
+        # Un relacionado cambia de título
+        otro.titulo = 'Final anticipada'
+        with self.captureOnCommitCallbacks(execute=True):
+            otro.save()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+
+        # El autor de un comentario cambia de nombre de usuario
+        self.usuario.username = 'lector2'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 200)
+
+    def test_comentar_renueva_el_etag_de_la_api(self):
+        self.client.force_login(self.usuario)
+        anterior = self.client.get(reverse('api_articulos'))['ETag']
+        articulo = Articulo.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('detalle_articulo', args=[articulo.id]), {'contenido': 'Gran partido'})
+        respuesta = self.client.get(reverse('api_articulos'), HTTP_IF_NONE_MATCH=anterior)
+        self.assertEqual(respuesta.status_code, 200)
+        datos = json.loads(b''.join(respuesta.streaming_content))
+        self.assertEqual(datos['resultados'][0]['total_comentarios'], 1)
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.autor = User.objects.create_user('autor', password='x', first_name='Ana', last_name='Gómez')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        Articulo.objects.create(titulo='Final', contenido='Texto', categoria=categoria, autor=cls.autor)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_etag_del_feed(self):
+        respuesta = self.client.get(reverse('feed'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Ana Gómez', b''.join(respuesta.streaming_content).decode())
+        etag = respuesta['ETag']
+        self.assertEqual(self.client.get(reverse('feed'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # El autor cambia de nombre: el lector tiene que recibir el feed nuevo
+        self.autor.first_name = 'Ana María'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.autor.save()
+        respuesta = self.client.get(reverse('feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Ana María Gómez', b''.join(respuesta.streaming_content).decode())
+
+
+class PermisosPorRolTests(TestCase):
+    """El rol sale de la misma consulta que carga el usuario de la sesión"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = {}
+        for rol in ('miembro', 'colaborador', 'administrador'):
+            usuario = User.objects.create_user(rol, password='x')
+            usuario.perfil.rol = rol
+            usuario.perfil.save()
+            cls.usuarios[rol] = usuario
+
+    def test_acceso_por_rol(self):
+        casos = [
+            ('crear_articulo', {'miembro': 302, 'colaborador': 200, 'administrador': 200}),
+            ('users_lista', {'miembro': 403, 'colaborador': 403, 'administrador': 200}),
+        ]
+        for nombre, esperados in casos:
+            for rol, status in esperados.items():
+                with self.subTest(url=nombre, rol=rol):
+                    self.client.force_login(self.usuarios[rol])
+                    self.assertEqual(self.client.get(reverse(nombre)).status_code, status)
+
+    def test_perfil_en_la_consulta_del_usuario(self):
+        self.client.force_login(self.usuarios['colaborador'])
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('crear_articulo'))
+        perfiles = [c['sql'] for c in consultas.captured_queries if '"blog_perfil"' in c['sql']]
+        self.assertEqual(len(perfiles), 1, perfiles)
+        self.assertIn('"auth_user"', perfiles[0])
+
+    def test_cambio_de_rol_masivo(self):
+        otros = [User.objects.create_user(f'otro{i}', password='x') for i in range(5)]
+        self.client.force_login(self.usuarios['administrador'])
+        ids = [u.pk for u in otros] + [self.usuarios['administrador'].pk]
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('gestion_usuarios'), {'usuarios': ids, 'rol': 'colaborador'})
+        actualizaciones = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE "blog_perfil"')]
+        self.assertEqual(len(actualizaciones), 1)
+        roles = dict(User.objects.filter(pk__in=ids).values_list('username', 'perfil__rol'))
+        # Un administrador no puede cambiar a otro administrador (ni a sí mismo)
+        self.assertEqual(roles.pop('administrador'), 'administrador')
+        self.assertEqual(set(roles.values()), {'colaborador'})
+
+    def test_sesion_del_model_backend(self):
+        # Sesión iniciada antes de BackendConPerfil
+        self.client.force_login(self.usuarios['colaborador'], backend='django.contrib.auth.backends.ModelBackend')
+        respuesta = self.client.get(reverse('crear_articulo'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['user'].rol, 'colaborador')
+
+    def test_buscar_usuarios_por_parte_del_nombre(self):
+        User.objects.create_user('jperez', email='juan@club.com', password='x', first_name='Juan', last_name='Pérez')
+        self.client.force_login(self.usuarios['administrador'])
+        for busqueda in ('PEREZ', 'CLUB.com', 'uan', 'érez', 'juan pér'):
+            with self.subTest(busqueda=busqueda):
+                with CaptureQueriesContext(connection) as consultas:
+                    respuesta = self.client.get(reverse('gestion_usuarios'), {'buscar': busqueda})
+                nombres = [u.username for u in respuesta.context['usuarios']]
+                self.assertEqual(nombres, ['jperez'])
+                # Por el índice trigram, sin recorrer auth_user
+                sql = next(c['sql'] for c in consultas.captured_queries if 'blog_user_fts' in c['sql'])
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = [fila[-1] for fila in cursor.fetchall()]
+                self.assertNotIn('SCAN auth_user', plan)
+
+    def test_cambio_de_rol_omitidos(self):
+        self.client.force_login(self.usuarios['administrador'])
+        miembro = self.usuarios['miembro'].pk
+        respuesta = self.client.post(
+            reverse('gestion_usuarios'),
+            {'usuarios': [miembro, miembro, 999999, self.usuarios['administrador'].pk], 'rol': 'colaborador'},
+            follow=True,
+        )
+        # El repetido y el inexistente no cuentan: solo el administrador quedó sin cambiar
+        self.assertEqual(
+            [str(m) for m in respuesta.context['messages']],
+            ['1 usuario(s) no se modificaron: superusuarios o administradores'],
+        )
+        self.assertEqual(User.objects.get(pk=miembro).perfil.rol, 'colaborador')
+
+    def test_usuario_sin_perfil(self):
+        usuario = User.objects.bulk_create([User(username='importado')])[0]
+        usuario = User.objects.select_related('perfil').get(pk=usuario.pk)
+        usuario.first_name = 'Importado'
+        usuario.save()
+
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(User.objects.get(pk=usuario.pk).perfil.rol, 'miembro')
+
+    def test_login_no_escribe_el_perfil(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(self.client.login(username='colaborador', password='x'))
+        escrituras = [c['sql'] for c in consultas.captured_queries if '"blog_perfil"' in c['sql']]
+        self.assertEqual(escrituras, [])
+
+
+class CorreoTests(TestCase):
+    def test_sin_destinatarios_queda_pendiente(self):
+        encolar_correo('Aviso', 'Cuerpo')
+        self.assertEqual(procesar_lote(), (0, 1))
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.estado, CorreoPendiente.PENDIENTE)
+        self.assertIn('Sin destinatarios', correo.ultimo_error)
+
+        # Con un superusuario con email sale en el próximo intento
+        User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        CorreoPendiente.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(procesar_lote(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+
+
+class MiniaturasTests(TestCase):
+    def test_nombres_distintos_por_extension(self):
+        self.assertNotEqual(
+            set(nombres_derivados('articulos/foto.png')), set(nombres_derivados('articulos/foto.jpg')),
+        )
+
+    def test_borrar_el_articulo_borra_sus_miniaturas(self):
+        with tempfile.TemporaryDirectory() as raiz, override_settings(MEDIA_ROOT=raiz):
+            autor = User.objects.create_user('autor', password='x')
+            categoria = Categoria.objects.create(nombre='Fútbol')
+            articulo = Articulo.objects.create(titulo='Final', contenido='Texto', categoria=categoria, autor=autor)
+            Articulo.objects.filter(pk=articulo.pk).update(
+                imagen_destacada='articulos/foto.png', imagen_derivados='articulos/foto.png',
+            )
+            derivados = nombres_derivados('articulos/foto.png')
+            for nombre in derivados:
+                default_storage.save(nombre, ContentFile(b'x'))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Articulo.objects.get(pk=articulo.pk).delete()
+            self.assertFalse(any(default_storage.exists(nombre) for nombre in derivados))
+
+
+class EstaticosTests(TestCase):
+    def test_minificar_es_idempotente(self):
+        js = 'const r = /a\\/b/g; // comentario\nconst t = `x ${ "}" } y`;\n\n  f(1 / 2);'
+        minificado = minificar.js(js)
+        self.assertEqual(minificado, 'const r = /a\\/b/g;\nconst t = `x ${ "}" } y`;\nf(1 / 2);')
+        self.assertEqual(minificar.js(minificado), minificado)
+        css = 'a :hover , b > c { color: red ; /* x */ content: " ; " ; }'
+        self.assertEqual(minificar.css(css), 'a :hover,b>c{color:red;content:" ; "}')
+
+    def test_sirve_la_version_comprimida_con_cache_inmutable(self):
+        with tempfile.TemporaryDirectory() as raiz, override_settings(STATIC_ROOT=raiz, PRODUCCION=True):
+            salida = StringIO()
+            call_command('construir_estaticos', verbosity=0, stdout=salida)
+            self.assertEqual(salida.getvalue(), '')
+            url = static('css/styles.css')
+            self.assertRegex(url, r'^/static/css/styles\.[0-9a-f]{12}\.css$')
+
+            respuesta = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            contenido = gzip.decompress(b''.join(respuesta.streaming_content))
+            self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+            self.assertEqual(respuesta['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(respuesta['Vary'], 'Accept-Encoding')
+            self.assertNotIn(b'/*', contenido)
+
+            # Sin hash en el nombre: se revalida siempre
+            respuesta = self.client.get('/static/css/styles.css')
+            self.assertNotIn('Content-Encoding', respuesta)
+            self.assertEqual(respuesta['Cache-Control'], 'no-cache')
+            respuesta.close()
+            respuesta = self.client.get(
+                '/static/css/styles.css', HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified'],
+            )
+            self.assertEqual(respuesta.status_code, 304)
+
+
+class ReplicaTests(TestCase):
+    """A qué base van las lecturas de las vistas públicas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('lector', password='x')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        cls.articulo = Articulo.objects.create(titulo='Final', contenido='Texto', categoria=categoria, autor=cls.usuario)
+
+    def setUp(self):
+        cache.clear()
+        # La réplica de los tests es la misma base: con la misma conexión ve
+        # los datos de la transacción del test en vez de quedar bloqueada
+        conexion = connections[replica.REPLICA]
+        connections[replica.REPLICA] = connections['default']
+        self.addCleanup(connections.__setitem__, replica.REPLICA, conexion)
+        # Una copia de la réplica de hace un segundo, sin escrituras posteriores
+        for parche in (
+            mock.patch.object(replica, 'instante_replica', return_value=time.time() - 1),
+            mock.patch.object(replica, '_ultima_escritura', 0.0),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _bases_leidas(self, url):
+        """Las bases a las que el enrutador mandó las lecturas de los modelos del blog"""
+        bases = []
+        original = replica.EnrutadorReplica.db_for_read
+
+        def registrar(enrutador, model, **hints):
+            base = original(enrutador, model, **hints)
+            if model._meta.app_label == 'blog':
+                bases.append(base or 'default')
+            return base
+
+        with mock.patch.object(replica.EnrutadorReplica, 'db_for_read', registrar):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return set(bases)
+
+    def _comentar(self):
+        self.client.force_login(self.usuario)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('detalle_articulo', args=[self.articulo.id]), {'contenido': 'Gran partido'})
+
+    def test_vistas_publicas_leen_de_la_replica(self):
+        self.assertEqual(self._bases_leidas(reverse('index')), {'replica'})
+        self.assertEqual(self._bases_leidas(reverse('detalle_articulo', args=[self.articulo.id])), {'replica'})
+
+    def test_despues_de_escribir_lee_del_primario(self):
+        respuesta = self._comentar()
+        self.assertIn(replica.COOKIE, respuesta.cookies)
+        # Aunque la réplica ya tenga el comentario, la cookie (que el cliente
+        # reenvía) sigue mandando al primario
+        url = reverse('detalle_articulo', args=[self.articulo.id])
+        copia = time.time() + replica.MARGEN_ESCRITURA + 1
+        with mock.patch.object(replica, 'instante_replica', return_value=copia):
+            self.assertTrue(replica.replica_al_dia())
+            self.assertEqual(self._bases_leidas(url), {'default'})
+            self.client.cookies.pop(replica.COOKIE)
+            self.assertEqual(self._bases_leidas(url), {'replica'})
+
+    def test_escritura_posterior_a_la_copia(self):
+        self.assertTrue(replica.replica_al_dia())
+        self._comentar()
+        self.assertFalse(replica.replica_al_dia())
+        # Otro visitante, sin la cookie, acepta el atraso y sigue en la réplica...
+        self.client.logout()
+        self.assertNotIn(replica.COOKIE, self.client.cookies)
+        self.assertEqual(self._bases_leidas(reverse('index')), {'replica'})
+        # ...pero esa página no lleva ETag ni queda en la caché de páginas
+        self.assertNotIn('ETag', self.client.get(reverse('index')))
+        self.assertEqual(self._bases_leidas(reverse('index')), {'replica'})
+
+    def test_escritura_fuera_de_un_request(self):
+        # Como marcar_generados desde el hilo de las miniaturas
+        Articulo.objects.filter(pk=self.articulo.pk).update(imagen_derivados='articulos/foto.png')
+        self.assertFalse(replica.replica_al_dia())
+
+    def test_replica_demasiado_vieja(self):
+        vieja = time.time() - settings.REPLICA_RETRASO_MAXIMO - 1
+        with mock.patch.object(replica, 'instante_replica', return_value=vieja):
+            self.assertEqual(self._bases_leidas(reverse('index')), {'default'})
+
+
+class LimitesTests(TestCase):
+    """Token bucket de las escrituras (limites.py y limitar_escrituras)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('lector', password='x')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        cls.articulo = Articulo.objects.create(titulo='Final', contenido='Texto', categoria=categoria, autor=cls.usuario)
+
+    def setUp(self):
+        cache.clear()
+        # Un archivo de baldes propio, vacío en cada test
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajuste = override_settings(LIMITES_ARCHIVO=os.path.join(directorio.name, 'limites.bin'))
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        _cerrar_limites()
+        self.addCleanup(_cerrar_limites)
+
+    def _comentar(self, **extra):
+        return self.client.post(
+            reverse('detalle_articulo', args=[self.articulo.id]), {'contenido': 'Gran partido'}, **extra
+        )
+
+    def test_consumir(self):
+        for _ in range(3):
+            self.assertEqual(limites.consumir('prueba', 3, 0.5, ahora=100), 0)
+        self.assertEqual(limites.consumir('prueba', 3, 0.5, ahora=100), 2)
+        # Con una ficha recargada, una pasa y la siguiente espera
+        self.assertEqual(limites.consumir('prueba', 3, 0.5, ahora=102), 0)
+        self.assertEqual(limites.consumir('prueba', 3, 0.5, ahora=102), 2)
+        # Otra clave tiene su propio balde
+        self.assertEqual(limites.consumir('otra', 3, 0.5, ahora=102), 0)
+
+    def test_consumir_todos_no_gasta_si_alguno_esta_vacio(self):
+        self.assertEqual(limites.consumir('lleno', 1, 1, ahora=100), 0)
+        self.assertEqual(limites.consumir_todos([('grande', 2, 1), ('lleno', 1, 1)], ahora=100), 1)
+        # El rechazo no gastó la ficha del balde grande
+        self.assertEqual(limites.consumir('grande', 2, 1, ahora=100), 0)
+        self.assertEqual(limites.consumir('grande', 2, 1, ahora=100), 0)
+        self.assertEqual(limites.consumir('grande', 2, 1, ahora=100), 1)
+
+    def test_rafaga_de_comentarios(self):
+        self.client.force_login(self.usuario)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                self.assertEqual(self._comentar().status_code, 302)
+            respuesta = self._comentar()
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertEqual(respuesta['Retry-After'], '10')
+        self.assertEqual(Comentario.objects.count(), 5)
+        # Una sesión nueva del mismo usuario, desde otra IP, sigue limitada
+        self.client.logout()
+        self.client.force_login(self.usuario)
+        self.assertEqual(self._comentar(REMOTE_ADDR='10.0.0.2').status_code, 429)
+        # Otro usuario no
+        otro = User.objects.create_user('otro', password='x')
+        self.client.force_login(otro)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._comentar().status_code, 302)
+
+    @override_settings(PROXIES_CONFIABLES=1)
+    def test_ip_detras_del_proxy(self):
+        # Anónimos: solo el balde por IP (capacidad 20), con la IP que anotó el proxy
+        for _ in range(20):
+            self._comentar(HTTP_X_FORWARDED_FOR='1.1.1.1')
+        self.assertEqual(self._comentar(HTTP_X_FORWARDED_FOR='1.1.1.1').status_code, 429)
+        # Anteponer una IP falsa no cambia de balde; otro cliente real sí
+        self.assertEqual(self._comentar(HTTP_X_FORWARDED_FOR='9.9.9.9, 1.1.1.1').status_code, 429)
+        self.assertEqual(self._comentar(HTTP_X_FORWARDED_FOR='2.2.2.2').status_code, 302)
+
+
+class ContadoresTests(TestCase):
+    """Los contadores que mantienen las señales coinciden con un COUNT() después de cada operación"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('autor', password='x')
+        cls.futbol = Categoria.objects.create(nombre='Fútbol')
+        cls.tenis = Categoria.objects.create(nombre='Tenis')
+
+    def _articulo(self, titulo, categoria):
+        return Articulo.objects.create(titulo=titulo, contenido='Texto', categoria=categoria, autor=self.usuario)
+
+    def _comentar(self, articulo, cantidad=1):
+        return [
+            Comentario.objects.create(articulo=articulo, autor=self.usuario, contenido='Comentario')
+            for _ in range(cantidad)
+        ]
+
+    def assertContadoresCorrectos(self):
+        for categoria in Categoria.objects.annotate(
+            contados=Count('articulos', distinct=True), comentados=Count('articulos__comentarios'),
+        ):
+            self.assertEqual(categoria.total_articulos, categoria.contados, categoria.nombre)
+            self.assertEqual(categoria.total_comentarios, categoria.comentados, categoria.nombre)
+        for articulo in Articulo.objects.annotate(comentados=Count('comentarios')):
+            self.assertEqual(articulo.total_comentarios, articulo.comentados, articulo.titulo)
+
+    def test_crear_y_borrar(self):
+        final = self._articulo('Final', self.futbol)
+        semifinal = self._articulo('Semifinal', self.futbol)
+        self.assertContadoresCorrectos()
+        comentarios = self._comentar(final, 3)
+        self._comentar(semifinal)
+        self.assertContadoresCorrectos()
+        comentarios[0].delete()
+        self.assertContadoresCorrectos()
+
+    def test_cambio_de_categoria(self):
+        final = self._articulo('Final', self.futbol)
+        self._comentar(final, 2)
+        final = Articulo.objects.get(pk=final.pk)
+        final.categoria = self.tenis
+        final.save()
+        self.assertContadoresCorrectos()
+        self.assertEqual(Categoria.objects.get(pk=self.futbol.pk).total_comentarios, 0)
+
+    def test_comentario_movido_a_otro_articulo(self):
+        final = self._articulo('Final', self.futbol)
+        abierto = self._articulo('Abierto', self.tenis)
+        comentario = Comentario.objects.get(pk=self._comentar(final)[0].pk)
+        comentario.articulo = abierto
+        comentario.save()
+        self.assertContadoresCorrectos()
+
+    def test_borrado_en_cascada(self):
+        final = self._articulo('Final', self.futbol)
+        self._comentar(final, 3)
+        self._comentar(self._articulo('Abierto', self.tenis))
+        # El artículo se lleva sus comentarios
+        final.delete()
+        self.assertContadoresCorrectos()
+        # La categoría se lleva sus artículos y los comentarios de estos
+        Categoria.objects.get(pk=self.tenis.pk).delete()
+        self.assertContadoresCorrectos()
+
+    def test_nunca_por_debajo_de_cero(self):
+        final = self._articulo('Final', self.futbol)
+        comentario = self._comentar(final)[0]
+        # Contadores desfasados (p. ej. por un update() masivo)
+        Articulo.objects.filter(pk=final.pk).update(total_comentarios=0)
+        Categoria.objects.filter(pk=self.futbol.pk).update(total_articulos=0, total_comentarios=0)
+        comentario.delete()
+        final.delete()
+        categoria = Categoria.objects.get(pk=self.futbol.pk)
+        self.assertEqual((categoria.total_articulos, categoria.total_comentarios), (0, 0))
+        self.assertContadoresCorrectos()
+
+    def test_recount(self):
+        final = self._articulo('Final', self.futbol)
+        self._comentar(final, 2)
+        Articulo.objects.update(total_comentarios=7)
+        Categoria.objects.update(total_articulos=5, total_comentarios=0)
+        call_command('recount', stdout=StringIO())
+        self.assertContadoresCorrectos()
+
+
+class RelacionadosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        autor = User.objects.create_user('autor', password='x')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        textos = {
+            'final': 'Boca y River jugaron la final del torneo con goles de penal en el estadio',
+            'revancha': 'Boca y River jugarán la revancha de la final del torneo en el estadio',
+            'penales': 'La final del torneo se definió por penales en el estadio',
+            'tenis': 'Nadal ganó el abierto de tenis en polvo de ladrillo',
+        }
+        cls.articulos = {
+            titulo: Articulo.objects.create(titulo=titulo, contenido=contenido, categoria=categoria, autor=autor)
+            for titulo, contenido in textos.items()
+        }
+
+    def _recalcular(self):
+        salida = StringIO()
+        call_command('recompute_related', vecinos=1, stdout=salida)
+        return salida.getvalue()
+
+    def _vecino(self, titulo):
+        return (
+            ArticuloRelacionado.objects.filter(articulo=self.articulos[titulo])
+            .values_list('relacionado__titulo', flat=True).first()
+        )
+
+    def test_recompute_related(self):
+        self.assertIn('4 artículos vectorizados', self._recalcular())
+        self.assertEqual(self._vecino('final'), 'revancha')
+        self.assertEqual(self._vecino('revancha'), 'final')
+        # Sin cambios no hay nada que recalcular
+        self.assertIn('0 artículos vectorizados', self._recalcular())
+
+    def test_borrar_un_articulo_recalcula_a_quienes_lo_tenian(self):
+        self._recalcular()
+        self.articulos['revancha'].delete()
+        self.assertIsNone(self._vecino('final'))
+        self._recalcular()
+        self.assertEqual(self._vecino('final'), 'penales')
+
+
+class CachePaginasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        autor = User.objects.create_user('autor', password='x')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        cls.articulo = Articulo.objects.create(titulo='Final', contenido='Texto', categoria=categoria, autor=autor)
+        cls.otro = Articulo.objects.create(titulo='Semifinal', contenido='Texto', categoria=categoria, autor=autor)
+        ArticuloRelacionado.objects.create(articulo=cls.articulo, relacionado=cls.otro, posicion=0, similitud=0.5)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertDesdeLaCache(self, url, cacheada=True):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(consultas) == 0, cacheada, url)
+
+    def test_parametros_inventados_comparten_la_entrada(self):
+        self.client.get(reverse('index'))
+        # Un orden o un cursor que la vista ignora sirven la misma página
+        self.assertDesdeLaCache(reverse('index') + '?orden=cualquiera')
+        self.assertDesdeLaCache(reverse('index') + '?cursor=basura')
+        self.assertDesdeLaCache(reverse('index') + '?orden=otro&cursor=' + codificar_cursor('s', [{'a': 1}, 2]))
+        # Un orden válido es otra página
+        self.assertDesdeLaCache(reverse('index') + '?orden=antigua', cacheada=False)
+
+    def test_etiqueta_invalidada_mientras_se_arma_la_pagina(self):
+        url = reverse('detalle_articulo', args=[self.articulo.id])
+        self.client.get(url)
+        self.assertDesdeLaCache(url)
+        cache.clear()
+        original = views.etiquetar
+
+        def etiquetar(request, *etiquetas):
+            # Otro worker guarda el relacionado justo después de que la vista leyó su título
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidar(*etiquetas)
+            original(request, *etiquetas)
+
+        with mock.patch.object(views, 'etiquetar', etiquetar):
+            self.client.get(url)
+        self.assertDesdeLaCache(url, cacheada=False)
+        self.assertDesdeLaCache(url)
+
+
+class ComentariosArticuloTests(TestCase):
+    """Páginas de comentarios que pide la carga al hacer scroll"""
+
+    @classmethod
+    def setUpTestData(cls):
+        autor = User.objects.create_user('autor', password='x')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        cls.articulo = Articulo.objects.create(titulo='Final', contenido='Texto', categoria=categoria, autor=autor)
+        for i in range(25):
+            Comentario.objects.create(articulo=cls.articulo, autor=autor, contenido=f'Comentario {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def _pedir(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_paginas(self):
+        url = reverse('comentarios_articulo', args=[self.articulo.id])
+        primera = self._pedir(url)
+        # Los más recientes primero
+        self.assertEqual(primera['html'].count('Comentario '), 20)
+        self.assertIn('Comentario 24', primera['html'])
+        self.assertNotIn('Comentario 4<', primera['html'])
+        self.assertTrue(primera['siguiente'].startswith(f'{url}?cursor='))
+
+        segunda = self._pedir(primera['siguiente'])
+        self.assertEqual(segunda['html'].count('Comentario '), 5)
+        self.assertIn('Comentario 0', segunda['html'])
+        self.assertIsNone(segunda['siguiente'])
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        url = reverse('comentarios_articulo', args=[self.articulo.id])
+        primera = self._pedir(url)
+        for cursor in ('basura', codificar_cursor('s', ['no es fecha', 'x'])):
+            with self.subTest(cursor=cursor):
+                cache.clear()
+                self.assertEqual(self._pedir(f'{url}?cursor={cursor}'), primera)
+
+    def test_articulo_inexistente(self):
+        respuesta = self.client.get(reverse('comentarios_articulo', args=[self.articulo.id + 100]))
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class SitemapsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        autor = User.objects.create_user('autor', password='x')
+        categoria = Categoria.objects.create(nombre='Fútbol')
+        cls.articulos = [
+            Articulo.objects.create(titulo=f'Artículo {i}', contenido='Texto', categoria=categoria, autor=autor)
+            for i in range(6)
+        ]
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.raiz = directorio.name
+        ajuste = override_settings(SITEMAPS_ROOT=self.raiz)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        # Partes de dos artículos para tener varias con pocos datos
+        parche = mock.patch.object(sitemaps, 'URLS_POR_PARTE', 2)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _parte(self, articulo):
+        return str((articulo.id - 1) // 2)
+
+    def _generar(self):
+        reescritas, borradas = sitemaps.generar('https://example.com')
+        return set(reescritas), set(borradas)
+
+    def test_solo_se_reescribe_la_parte_editada(self):
+        partes = {self._parte(articulo) for articulo in self.articulos}
+        self.assertEqual(self._generar(), (partes | {sitemaps.CATEGORIAS}, set()))
+        self.assertEqual(self._generar(), (set(), set()))
+
+        editado = self.articulos[3]
+        editado.titulo = 'Título nuevo'
+        editado.save()
+        # La edición renueva la categoría (y su URL en la parte de categorías)
+        self.assertEqual(self._generar(), ({self._parte(editado), sitemaps.CATEGORIAS}, set()))
+        with open(os.path.join(self.raiz, sitemaps.nombre_archivo(self._parte(editado))), encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        fecha = Articulo.objects.get(pk=editado.pk).fecha_actualizacion.isoformat()
+        self.assertIn(f'<lastmod>{fecha}</lastmod>', contenido)
+
+    def test_parte_vacia_se_borra(self):
+        self._generar()
+        parte = self._parte(self.articulos[-1])
+        for articulo in self.articulos:
+            if self._parte(articulo) == parte:
+                articulo.delete()
+        self.assertEqual(self._generar()[1], {parte})
+        self.assertFalse(os.path.exists(os.path.join(self.raiz, sitemaps.nombre_archivo(parte))))
+
+
+class PragmasTests(TestCase):
+    """Los PRAGMA de SQLITE_PRAGMAS se aplican en cada conexión nueva"""
+
+    def _pragmas(self, conexion, *nombres):
+        with conexion.cursor() as cursor:
+            valores = {}
+            for nombre in nombres:
+                cursor.execute(f'PRAGMA {nombre}')
+                valores[nombre] = cursor.fetchone()[0]
+        return valores
+
+    def test_conexion_nueva_a_un_archivo(self):
+        # La base de los tests está en memoria, donde journal_mode queda en 'memory'
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = {**connections['default'].settings_dict, 'NAME': os.path.join(directorio.name, 'db.sqlite3')}
+        conexion = type(connections['default'])(ajustes, alias='pragmas')
+        self.addCleanup(conexion.close)
+        # synchronous = NORMAL es 1
+        self.assertEqual(
+            self._pragmas(conexion, 'journal_mode', 'synchronous', 'busy_timeout', 'temp_store'),
+            {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'temp_store': 2},
+        )
+
+    def test_conexion_de_los_tests(self):
+        self.assertEqual(
+            self._pragmas(connection, 'journal_mode', 'synchronous', 'busy_timeout'),
+            {'journal_mode': 'memory', 'synchronous': 1, 'busy_timeout': 5000},
+        )
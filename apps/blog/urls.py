@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views 
-from . import views
+from . import api, views
 
 urlpatterns = [
     # PÁGINAS PRINCIPALES
@@ -8,9 +8,11 @@ urlpatterns = [
     path('nosotros/', views.about, name='about'),
     path('contacto/', views.contact, name='contact'),
     path('terminos/', views.terms, name='terms'),
+    path('buscar/', views.buscar, name='buscar'),
 
     # GESTIÓN DE ARTÍCULOS
     path('articulo/<int:id>/', views.detalle_articulo, name='detalle_articulo'),
+    path('articulo/<int:id>/comentarios/', views.comentarios_articulo, name='comentarios_articulo'),
     path('crear/', views.crear_articulo, name='crear_articulo'),
     path('editar/<int:id>/', views.editar_articulo, name='editar_articulo'),
     path('eliminar/<int:id>/', views.eliminar_articulo, name='eliminar_articulo'),
@@ -22,6 +24,22 @@ urlpatterns = [
     # GESTIÓN DE CATEGORÍAS
     path('categoria/<int:categoria_id>/', views.listar_por_categoria, name='listar_por_categoria'),
 
+    # FEEDS (RSS, ATOM Y JSON FEED)
+    path('feed/', views.feed_articulos, name='feed'),
+    path('feed/<str:formato>/', views.feed_articulos, name='feed_formato'),
+    path('categoria/<int:categoria_id>/feed/', views.feed_articulos, name='feed_categoria'),
+    path('categoria/<int:categoria_id>/feed/<str:formato>/', views.feed_articulos, name='feed_categoria_formato'),
+
+    # API JSON DE SOLO LECTURA (ver api.py)
+    path('api/articulos/', api.articulos, name='api_articulos'),
+    path('api/articulos/<int:id>/', api.articulo, name='api_articulo'),
+    path('api/articulos/<int:id>/comentarios/', api.comentarios, name='api_comentarios'),
+    path('api/categorias/', api.categorias, name='api_categorias'),
+
+    # SITEMAPS (archivos generados con "python manage.py generate_sitemaps")
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path('sitemaps/<str:nombre>', views.sitemap, name='sitemap_parte'),
+
     # GESTIÓN DE USUARIOS (ADMINISTRADOR)
     path('gestion/usuarios/', views.gestion_usuarios, name='gestion_usuarios'),
     
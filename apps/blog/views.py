@@ -4,13 +4,15 @@ from django.shortcuts import (
     render
 )
 
-from django.core.mail import send_mail
-from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.static import serve
 from django.contrib import messages
 from django.contrib.auth import login, update_session_auth_hash
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q
+from django.db import transaction
 
 from apps.blog.forms import (
     ArticuloForm,
@@ -30,83 +32,167 @@ from .models import (
 )
 
 from .forms import ContactoForm
-from django.db.models import Count
+from .busqueda import MINIMO_BUSQUEDA_USUARIOS, buscar_articulos, filtrar_usuarios
+from .cache import (
+    CATEGORIAS_GLOBALES,
+    CATEGORIAS_POPULARES,
+    RELACIONADOS,
+    obtener_o_construir
+)
+from .cache_paginas import (
+    ARTICULOS,
+    USUARIOS,
+    cachear_para_anonimos,
+    etiqueta_articulo,
+    etiqueta_categoria,
+    etiquetar
+)
+from .correo import encolar_correo
+from .feeds import respuesta_feed
+from .decorators import limitar_escrituras
+from .autenticacion import tiene_rol
+from .condicional import condicional, sello_articulo, sello_listado
+from .paginacion import paginar_por_cursor
+from . import sitemaps
+
+# Ordenes disponibles para los listados: (campo, desempate) para la paginación por cursor
+ORDENES_ARTICULOS = {
+    'reciente': ('-fecha_creacion', '-id'),
+    'antigua': ('fecha_creacion', 'id'),
+    'alpha_asc': ('titulo', 'id'),
+    'alpha_desc': ('-titulo', '-id'),
+}
+
+ARTICULOS_POR_PAGINA = 6
+COMENTARIOS_POR_PAGINA = 20
+# Más recientes primero; usa el índice (articulo, fecha_creacion, id)
+ORDEN_COMENTARIOS = ('-fecha_creacion', '-id')
+
+
+def _obtener_orden(request):
+    """Devuelve la clave de orden pedida, o 'reciente' si no es válida"""
+    orden = request.GET.get('orden', 'reciente')
+    return orden if orden in ORDENES_ARTICULOS else 'reciente'
+
+
+def _obtener_categorias_populares():
+    """Ranking de categorías por cantidad de artículos y comentarios (top 8)"""
+    return obtener_o_construir(
+        CATEGORIAS_POPULARES,
+        lambda: list(
+            Categoria.objects.filter(
+                total_articulos__gt=0
+            ).order_by('-total_articulos', '-total_comentarios')[:8]
+        ),
+    )
+
 
+def _pagina_comentarios(articulo_id, cursor):
+    """Una página de comentarios del artículo con sus autores en la misma consulta"""
+    return paginar_por_cursor(
+        Comentario.objects.filter(articulo_id=articulo_id).select_related('autor'),
+        ORDEN_COMENTARIOS,
+        cursor=cursor,
+        tamanio=COMENTARIOS_POR_PAGINA,
+    )
+
+
+@cachear_para_anonimos(lambda: (ARTICULOS, CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES), ordenes=ORDENES_ARTICULOS)
+@condicional(sello_listado)
 def index(request):
-    orden = request.GET.get('orden', 'reciente')
-    
-    orden_opciones = {
-        'reciente': '-fecha_creacion',
-        'antigua': 'fecha_creacion',
-        'alpha_asc': 'titulo',
-        'alpha_desc': '-titulo'
-    }
-    campo_orden = orden_opciones.get(orden, '-fecha_creacion')
+    orden = _obtener_orden(request)
 
-    articulos_destacados = Articulo.objects.filter(destacado=True).order_by('-fecha_creacion')[:3]
-    
-    if orden == 'reciente':
-        ultimas_noticias = Articulo.objects.order_by(campo_orden)[:6]
-    else:
-        ultimas_noticias = Articulo.objects.order_by(campo_orden)
+    articulos_destacados = Articulo.objects.para_listado().filter(destacado=True).order_by('-fecha_creacion')[:3]
+
+    pagina = paginar_por_cursor(
+        Articulo.objects.para_listado(),
+        ORDENES_ARTICULOS[orden],
+        cursor=request.GET.get('cursor'),
+        tamanio=ARTICULOS_POR_PAGINA,
+    )
 
-    # Obtener categorías populares ordenadas por cantidad de artículos y comentarios
-    categorias_populares = Categoria.objects.annotate(
-        total_articulos=Count('articulos', distinct=True),
-        total_comentarios=Count('articulos__comentarios', distinct=True),
-    ).filter(total_articulos__gt=0).order_by('-total_articulos', '-total_comentarios')[:8]
+    # Obtener categorías populares (cacheadas, ver _obtener_categorias_populares)
+    categorias_populares = _obtener_categorias_populares()
 
     context = {
         'destacados': articulos_destacados,
-        'noticias': ultimas_noticias,
+        'noticias': pagina.elementos,
+        'pagina': pagina,
         'orden_actual': orden,
         'categorias': categorias_populares,
     }
     return render(request, 'pages/index.html', context)
 
 
+@cachear_para_anonimos(lambda categoria_id: (
+    etiqueta_categoria(categoria_id), CATEGORIAS_GLOBALES, CATEGORIAS_POPULARES
+), ordenes=ORDENES_ARTICULOS)
+@condicional(sello_listado)
 def listar_por_categoria(request, categoria_id):
     """Vista para mostrar artículos filtrados por categoría"""
     categoria = get_object_or_404(Categoria, id=categoria_id)
-    orden = request.GET.get('orden', 'reciente')
-    
-    orden_opciones = {
-        'reciente': '-fecha_creacion',
-        'antigua': 'fecha_creacion',
-        'alpha_asc': 'titulo',
-        'alpha_desc': '-titulo'
-    }
-    campo_orden = orden_opciones.get(orden, '-fecha_creacion')
-    
+    orden = _obtener_orden(request)
+
     # Filtrar artículos por categoría
-    articulos_destacados = Articulo.objects.filter(
+    articulos_destacados = Articulo.objects.para_listado().filter(
         categoria=categoria, 
         destacado=True
     ).order_by('-fecha_creacion')[:3]
     
-    noticias = Articulo.objects.filter(categoria=categoria).order_by(campo_orden)
+    pagina = paginar_por_cursor(
+        Articulo.objects.para_listado().filter(categoria=categoria),
+        ORDENES_ARTICULOS[orden],
+        cursor=request.GET.get('cursor'),
+        tamanio=ARTICULOS_POR_PAGINA,
+    )
     
-    # Obtener categorías populares
-    categorias_populares = Categoria.objects.annotate(
-        total_articulos=Count('articulos', distinct=True),
-        total_comentarios=Count('articulos__comentarios', distinct=True),
-    ).filter(total_articulos__gt=0).order_by('-total_articulos', '-total_comentarios')[:8]
+    # Obtener categorías populares (cacheadas, ver _obtener_categorias_populares)
+    categorias_populares = _obtener_categorias_populares()
     
     context = {
         'destacados': articulos_destacados,
-        'noticias': noticias,
+        'noticias': pagina.elementos,
+        'pagina': pagina,
         'orden_actual': orden,
         'categorias': categorias_populares,
         'categoria_seleccionada': categoria,
     }
     return render(request, 'pages/index.html', context)
 
+RESULTADOS_POR_PAGINA = 10
+
+
+def buscar(request):
+    """Búsqueda de artículos por texto, opcionalmente dentro de una categoría"""
+    texto = request.GET.get('q', '').strip()
+    categoria_id = request.GET.get('categoria', '')
+    categoria_id = int(categoria_id) if categoria_id.isdigit() else None
+
+    pagina = None
+    if texto:
+        pagina = buscar_articulos(
+            texto,
+            categoria_id=categoria_id,
+            cursor=request.GET.get('cursor'),
+            tamanio=RESULTADOS_POR_PAGINA,
+        )
+
+    context = {
+        'texto': texto,
+        'categoria_id': categoria_id,
+        'pagina': pagina,
+    }
+    return render(request, 'blog/buscar.html', context)
+
 def about(request):
     return render(request, 'pages/about.html')
 
+@limitar_escrituras('comentarios', rafaga=5, por_minuto=6)
+@cachear_para_anonimos(lambda id: (etiqueta_articulo(id), CATEGORIAS_GLOBALES, RELACIONADOS, USUARIOS))
+@condicional(sello_articulo)
 def detalle_articulo(request, id):
     articulo = get_object_or_404(Articulo, id=id)
-    comentarios = articulo.comentarios.all().order_by('-fecha_creacion')
+    comentarios = _pagina_comentarios(articulo.id, request.GET.get('cursor'))
     form = ComentarioForm()
 
     if request.method == 'POST':
@@ -121,13 +207,47 @@ def detalle_articulo(request, id):
         else:
             return redirect('login')
         
+    # La página muestra el título de cada relacionado: si cambia, hay que regenerarla
+    relacionados = list(Articulo.objects.relacionados_con(articulo.id))
+    etiquetar(request, *(etiqueta_articulo(relacionado.id) for relacionado in relacionados))
+
     context = {
         'articulo': articulo,
         'comentarios': comentarios,
+        'relacionados': relacionados,
         'form': form,
     }
     return render(request, 'blog/articulo_detail.html', context)
 
+@cachear_para_anonimos(lambda id: (etiqueta_articulo(id), USUARIOS))
+def comentarios_articulo(request, id):
+    """Página siguiente de comentarios en HTML, para la carga al hacer scroll"""
+    pagina = _pagina_comentarios(id, request.GET.get('cursor'))
+    # Solo una página vacía puede ser de un artículo que no existe
+    if not pagina.elementos and not Articulo.objects.filter(pk=id).exists():
+        raise Http404
+    siguiente = None
+    if pagina.tiene_siguiente:
+        siguiente = f"{reverse('comentarios_articulo', args=[id])}?cursor={pagina.cursor_siguiente}"
+    return JsonResponse({
+        'html': render_to_string(
+            'components/lista_comentarios.html', {'comentarios': pagina}, request=request
+        ),
+        'siguiente': siguiente,
+    })
+
+
+def feed_articulos(request, formato='rss', categoria_id=None):
+    """Feed RSS, Atom o JSON de los últimos artículos (ver feeds.py)"""
+    return respuesta_feed(request, formato, categoria_id)
+
+
+def sitemap(request, nombre=sitemaps.INDICE):
+    """Sirve los sitemaps que genera el comando generate_sitemaps, sin tocar la base"""
+    if not nombre.startswith('sitemap'):
+        raise Http404
+    return serve(request, nombre, document_root=sitemaps.directorio())
+
 def registro(request):
     if request.method == 'POST':
         form = RegistroForm(request.POST)
@@ -141,11 +261,11 @@ def registro(request):
 
 # --- Verifica si es superusuario O si tiene el rol de colaborador o administrador ---
 def es_colaborador(user):
-    return user.is_authenticated and (user.is_superuser or (hasattr(user, 'perfil') and user.perfil.es_colaborador_o_superior()))
+    return tiene_rol(user, 'colaborador')
 
 # --- Verifica si es administrador ---
 def es_administrador(user):
-    return user.is_authenticated and (user.is_superuser or (hasattr(user, 'perfil') and user.perfil.es_administrador()))
+    return tiene_rol(user, 'administrador')
 
 @user_passes_test(es_colaborador)
 def crear_articulo(request):
@@ -165,7 +285,7 @@ def editar_articulo(request, id):
     articulo = get_object_or_404(Articulo, id=id)
     
     # Verificar permisos: admin puede editar todo, colaborador solo sus artículos
-    es_admin = request.user.is_superuser or (hasattr(request.user, 'perfil') and request.user.perfil.es_administrador())
+    es_admin = es_administrador(request.user)
     es_autor = request.user == articulo.autor
     
     if not (es_admin or es_autor):
@@ -187,7 +307,7 @@ def eliminar_articulo(request, id):
     articulo = get_object_or_404(Articulo, id=id)
     
     # Verificar permisos: admin puede eliminar todo, colaborador solo sus artículos
-    es_admin = request.user.is_superuser or (hasattr(request.user, 'perfil') and request.user.perfil.es_administrador())
+    es_admin = es_administrador(request.user)
     es_autor = request.user == articulo.autor
     
     if not (es_admin or es_autor):
@@ -205,8 +325,8 @@ def eliminar_articulo(request, id):
 def editar_comentario(request, id):
     comentario = get_object_or_404(Comentario, id=id)
     es_autor = request.user == comentario.autor
-    es_colaborador = request.user.is_superuser or (hasattr(request.user, 'perfil') and request.user.perfil.es_colaborador_o_superior())
-    if not es_autor and not es_colaborador:
+    puede_moderar = tiene_rol(request.user, 'colaborador')
+    if not es_autor and not puede_moderar:
         return redirect('detalle_articulo', id=comentario.articulo.id)
 
     if request.method == 'POST':
@@ -229,9 +349,9 @@ def editar_comentario(request, id):
 def eliminar_comentario(request, id):
     comentario = get_object_or_404(Comentario, id=id)
     es_autor = request.user == comentario.autor
-    es_colaborador = request.user.is_superuser or (hasattr(request.user, 'perfil') and request.user.perfil.es_colaborador_o_superior())
+    puede_moderar = tiene_rol(request.user, 'colaborador')
 
-    if not es_autor and not es_colaborador:
+    if not es_autor and not puede_moderar:
         return redirect('detalle_articulo', id=comentario.articulo.id)
     
     if request.method == 'POST':
@@ -245,14 +365,16 @@ def terms(request):
     """Vista para mostrar términos y condiciones"""
     return render(request, 'terms.html')
 
+@limitar_escrituras('contacto', rafaga=3, por_minuto=2)
 def contact(request):
     if request.method == 'POST':
         form = ContactoForm(request.POST)
         if form.is_valid():
-            mensaje_nuevo = form.save()
+            with transaction.atomic():
+                mensaje_nuevo = form.save()
 
-            asunto = f'Nuevo mensaje de contacto de {mensaje_nuevo.nombre}'
-            cuerpo_mensaje = f"""
+                asunto = f'Nuevo mensaje de contacto de {mensaje_nuevo.nombre}'
+                cuerpo_mensaje = f"""
             Has recibido un nuevo mensaje desde TodoDeporte:
             
             Nombre: {mensaje_nuevo.nombre}
@@ -260,114 +382,84 @@ def contact(request):
             Mensaje: 
             {mensaje_nuevo.mensaje}
             """
-            
-            emails_admins = User.objects.filter(is_superuser=True).values_list('email', flat=True)
-
-            try:
-                send_mail(
-                    asunto,
-                    cuerpo_mensaje,
-                    settings.EMAIL_HOST_USER if hasattr(settings, 'EMAIL_HOST_USER') else 'noreply@tododeporte.com',
-                    list(emails_admins), # Lista de destinatarios
-                    fail_silently=False,
-                )
-                messages.success(request, '¡Tu mensaje ha sido enviado correctamente!')
-                return redirect('contact') # Redirigir a la misma página para limpiar el form
-            except Exception as e:
-                messages.error(request, 'Ocurrió un error al enviar el correo. Inténtalo más tarde.')
-                
+
+                # Lo envía el comando procesar_outbox a los superusuarios:
+                # el request no espera al servidor SMTP
+                encolar_correo(asunto, cuerpo_mensaje)
+
+            messages.success(request, '¡Tu mensaje ha sido enviado correctamente!')
+            return redirect('contact') # Redirigir a la misma página para limpiar el form
     else:
         form = ContactoForm()
 
     return render(request, 'pages/contact.html', {'form': form})
 
-def listar_por_categoria(request, categoria_id):
-    categoria = get_object_or_404(Categoria, id=categoria_id)
-    orden = request.GET.get('orden', 'reciente')
-    
-    orden_opciones = {
-        'reciente': '-fecha_creacion',
-        'antigua': 'fecha_creacion',
-        'alpha_asc': 'titulo',
-        'alpha_desc': '-titulo'
-    }
-    campo_orden = orden_opciones.get(orden, '-fecha_creacion')
-    
-    noticias = Articulo.objects.filter(categoria=categoria).order_by(campo_orden)
-    
-    context = {
-        'noticias': noticias,
-        'categoria_seleccionada': categoria,
-        'orden_actual': orden,
-    }
-    return render(request, 'pages/index.html', context)
+USUARIOS_POR_PAGINA = 50
+ORDEN_USUARIOS = ('username', 'id')
+
+
+def _buscar_usuarios(busqueda):
+    """Usuarios con su perfil en el mismo JOIN, filtrados por usuario, email o nombre"""
+    # Con el índice FTS trigram: "contiene" sin recorrer auth_user
+    return filtrar_usuarios(User.objects.select_related('perfil'), busqueda)
 
 
 @user_passes_test(es_administrador)
 def gestion_usuarios(request):
     """Vista para que administradores gestionen roles de usuarios"""
-    # Obtener parámetro de búsqueda
-    busqueda = request.GET.get('buscar', '').strip()
-    
-    # Filtrar usuarios
-    usuarios = User.objects.all().select_related('perfil').order_by('username')
-    
-    if busqueda:
-        usuarios = usuarios.filter(
-            Q(username__icontains=busqueda) | 
-            Q(email__icontains=busqueda) |
-            Q(first_name__icontains=busqueda) |
-            Q(last_name__icontains=busqueda)
-        )
-    
     # Verificar si el usuario actual es superusuario
     es_superusuario = request.user.is_superuser
-    
-    if request.method == 'POST':
-        usuario_id = request.POST.get('usuario_id')
-        nuevo_rol = request.POST.get('rol')
-        
-        if usuario_id and nuevo_rol:
-            try:
-                usuario = User.objects.get(id=usuario_id)
-                perfil, created = Perfil.objects.get_or_create(usuario=usuario)
-                
-                # No permitir cambiar el rol de superusuarios
-                if usuario.is_superuser:
-                    messages.warning(request, 'No se puede modificar el rol de un superusuario')
-                # No permitir que administradores cambien roles de otros administradores
-                elif perfil.rol == 'administrador' and not es_superusuario:
-                    messages.error(request, 'Solo el superusuario puede modificar roles de administradores')
-                # Solo superusuarios pueden asignar rol de administrador
-                elif nuevo_rol == 'administrador' and not es_superusuario:
-                    messages.error(request, 'Solo el superusuario puede asignar el rol de administrador')
-                # Validar que el rol sea válido
-                elif nuevo_rol in ['miembro', 'colaborador', 'administrador']:
-                    perfil.rol = nuevo_rol
-                    perfil.save()
-                    # Mensaje eliminado - ya se muestra en el frontend con JavaScript
-                else:
-                    messages.error(request, 'Rol no válido')
-                    
-            except User.DoesNotExist:
-                messages.error(request, 'Usuario no encontrado')
-        
-        return redirect('gestion_usuarios')
-    
+
     # Roles disponibles según el tipo de usuario
     if es_superusuario:
-        roles_disponibles = [
-            ('miembro', 'Miembro'), 
-            ('colaborador', 'Colaborador'),
-            ('administrador', 'Administrador')
-        ]
+        roles_disponibles = Perfil.ROL_CHOICES
     else:
-        roles_disponibles = [('miembro', 'Miembro'), ('colaborador', 'Colaborador')]
-    
+        roles_disponibles = [(valor, nombre) for valor, nombre in Perfil.ROL_CHOICES if valor != 'administrador']
+
+    if request.method == 'POST':
+        # Uno (el selector de cada fila) o varios (los marcados en la tabla)
+        ids = {int(valor) for valor in request.POST.getlist('usuarios') if valor.isdigit()}
+        nuevo_rol = request.POST.get('rol')
+
+        if not ids:
+            messages.error(request, 'No se seleccionó ningún usuario')
+        elif nuevo_rol == 'administrador' and not es_superusuario:
+            messages.error(request, 'Solo el superusuario puede asignar el rol de administrador')
+        elif nuevo_rol not in dict(roles_disponibles):
+            messages.error(request, 'Rol no válido')
+        else:
+            seleccionados = Perfil.objects.filter(user_id__in=ids)
+            # Los ids que ya no existen no cuentan como omitidos
+            encontrados = seleccionados.count()
+            # No se tocan superusuarios, ni administradores si no lo pide el superusuario
+            perfiles = seleccionados.filter(user__is_superuser=False)
+            if not es_superusuario:
+                perfiles = perfiles.exclude(rol='administrador')
+            # Un solo UPDATE para todos los seleccionados
+            modificados = perfiles.update(rol=nuevo_rol)
+            omitidos = encontrados - modificados
+            if omitidos:
+                messages.warning(request, f'{omitidos} usuario(s) no se modificaron: superusuarios o administradores')
+            elif modificados > 1:
+                # El cambio de uno solo ya se muestra en el frontend con JavaScript
+                messages.success(request, f'Rol actualizado para {modificados} usuarios')
+
+        # Vuelve a la misma búsqueda y página
+        return redirect(request.get_full_path())
+
+    busqueda = request.GET.get('buscar', '').strip()
+    pagina = paginar_por_cursor(
+        _buscar_usuarios(busqueda),
+        ORDEN_USUARIOS,
+        cursor=request.GET.get('cursor'),
+        tamanio=USUARIOS_POR_PAGINA,
+    )
     context = {
-        'usuarios': usuarios,
+        'usuarios': pagina,
+        'pagina': pagina,
         'roles_disponibles': roles_disponibles,
         'busqueda': busqueda,
+        'minimo_busqueda': MINIMO_BUSQUEDA_USUARIOS,
         'es_superusuario': es_superusuario,
     }
     return render(request, 'admin/gestion_usuarios.html', context)
@@ -411,7 +503,7 @@ def eliminar_categoria(request, id):
     
     # Verificar si tiene artículos asociados
     if categoria.articulos.exists():
-        messages.error(request, f'No se puede eliminar "{categoria.nombre}" porque tiene {categoria.articulos.count()} artículos asociados')
+        messages.error(request, f'No se puede eliminar "{categoria.nombre}" porque tiene {categoria.total_articulos} artículos asociados')
         return redirect('gestion_categorias')
     
     if request.method == 'POST':
@@ -425,12 +517,9 @@ def eliminar_categoria(request, id):
 @user_passes_test(es_administrador, login_url='index')
 def gestion_categorias(request):
     """Vista para listar y gestionar todas las categorías (solo administradores)"""
+    # total_articulos ya viene guardado en cada categoría
     categorias = Categoria.objects.all().order_by('nombre')
     
-    # Agregar conteo de artículos por categoría
-    for categoria in categorias:
-        categoria.total_articulos = categoria.articulos.count()
-    
     return render(request, 'admin/gestion_categorias.html', {'categorias': categorias})
 
 @login_required
@@ -469,49 +558,17 @@ def editar_perfil(request):
 
 from .decorators import administrador_required, visitante_required
 
-# Roles disponibles
-ROLES_DISPONIBLES = [
-    ('miembro', 'Miembro'),
-    ('colaborador', 'Colaborador'),
-    ('administrador', 'Administrador'),
-]
-
-@administrador_required
-def gestion_usuarios(request):
-    if request.method == 'POST':
-        usuario_id = request.POST.get('usuario_id')
-        nuevo_rol = request.POST.get('rol')
-
-        try:
-            usuario = User.objects.get(id=usuario_id)
-            if not usuario.is_superuser:
-                perfil = Perfil.objects.get_or_create(user=usuario)[0]
-                perfil.rol = nuevo_rol
-                perfil.save()
-            else:
-                messages.error(request, 'No se puede modificar el rol del superusuario.')
-        except User.DoesNotExist:
-            messages.error(request, 'Usuario no encontrado.')
-
-        return redirect('gestion_usuarios')
-
-    # Asegurar que todos tengan perfil
-    for u in User.objects.all():
-        Perfil.objects.get_or_create(user=u)
-
-    usuarios = User.objects.all()
-    return render(request, 'admin/gestion_usuarios.html', {
-        'usuarios': usuarios,
-        'roles_disponibles': ROLES_DISPONIBLES,
-        'es_superusuario': request.user.is_superuser
-    })
-
-
 @administrador_required
 def lista_usuarios(request):
-    usuarios = User.objects.all()
+    pagina = paginar_por_cursor(
+        User.objects.select_related('perfil'),
+        ORDEN_USUARIOS,
+        cursor=request.GET.get('cursor'),
+        tamanio=USUARIOS_POR_PAGINA,
+    )
     return render(request, 'users/lista_usuarios.html', {
-        'usuarios': usuarios
+        'usuarios': pagina,
+        'pagina': pagina,
     })
 
 
@@ -0,0 +1,62 @@
+// Carga de comentarios al hacer scroll en el detalle del artículo
+(function comentariosInfinitos() {
+  const lista = document.getElementById("comentarios");
+  const boton = document.getElementById("mas-comentarios");
+
+  if (!lista || !boton) {
+    return;
+  }
+
+  let cargando = false;
+
+  async function cargarSiguientes() {
+    if (cargando || !boton.dataset.url) {
+      return;
+    }
+    cargando = true;
+    boton.textContent = "Cargando...";
+
+    try {
+      const respuesta = await fetch(boton.dataset.url, {
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      });
+      if (!respuesta.ok) {
+        throw new Error(`HTTP ${respuesta.status}`);
+      }
+      const datos = await respuesta.json();
+      lista.insertAdjacentHTML("beforeend", datos.html);
+
+      if (datos.siguiente) {
+        boton.dataset.url = datos.siguiente;
+        boton.textContent = "Ver más comentarios";
+      } else {
+        observador?.disconnect();
+        boton.remove();
+      }
+    } catch (error) {
+      console.warn("No se pudieron cargar más comentarios:", error);
+      boton.textContent = "Ver más comentarios";
+    } finally {
+      cargando = false;
+    }
+  }
+
+  // El enlace sigue funcionando como respaldo, pero con JS carga en la misma página
+  boton.addEventListener("click", (event) => {
+    event.preventDefault();
+    cargarSiguientes();
+  });
+
+  const observador =
+    "IntersectionObserver" in window
+      ? new IntersectionObserver(
+          (entradas) => {
+            if (entradas.some((entrada) => entrada.isIntersecting)) {
+              cargarSiguientes();
+            }
+          },
+          { rootMargin: "400px" }
+        )
+      : null;
+  observador?.observe(boton);
+})();
@@ -45,12 +45,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Estáticos construidos (STATIC_ROOT), antes que sesiones y demás
+    'apps.blog.estaticos.EstaticosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.blog.replica.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'todoDeporte.urls'
@@ -68,6 +71,8 @@ TEMPLATES = [
 
                 # procesador de categorías globales
                 'apps.blog.context_processors.procesador_categorias',
+                # user.rol también para las sesiones del ModelBackend
+                'apps.blog.context_processors.procesador_rol',
             ],
         },
     },
@@ -79,12 +84,83 @@ WSGI_APPLICATION = 'todoDeporte.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Se ejecutan en cada conexión nueva:
+# - WAL: los lectores no esperan a quien escribe (y viceversa)
+# - synchronous=NORMAL: con WAL no corrompe la base; ante un corte de luz se
+#   puede perder solo la última transacción
+# - busy_timeout: espera el lock hasta 5 s antes de fallar con "database is locked"
+# - mmap_size, cache_size y temp_store: más lecturas y ordenamientos en memoria
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode = WAL;'
+    'PRAGMA synchronous = NORMAL;'
+    'PRAGMA busy_timeout = 5000;'
+    'PRAGMA mmap_size = 134217728;'
+    'PRAGMA cache_size = -20000;'
+    'PRAGMA temp_store = MEMORY;'
+)
+
+# Perfil de producción (variable de entorno DJANGO_PRODUCCION=1): conexiones
+# persistentes entre requests. En desarrollo no sirven: runserver abre un
+# hilo (y una conexión) por request.
+PRODUCCION = os.environ.get('DJANGO_PRODUCCION') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            # Las transacciones toman el lock de escritura al empezar: así
+            # busy_timeout sirve también para las que leen antes de escribir
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600 if PRODUCCION else 0,
+        'CONN_HEALTH_CHECKS': PRODUCCION,
+    },
+}
+# Réplica de solo lectura para las vistas públicas (ver apps/blog/replica.py).
+# En local es una copia que actualiza "python manage.py sincronizar_replica";
+# mientras no exista, todo se lee de 'default'.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.environ.get('REPLICA_NOMBRE', BASE_DIR / 'db-replica.sqlite3'),
+    'OPTIONS': {'init_command': SQLITE_PRAGMAS + 'PRAGMA query_only = ON;'},
+    'TEST': {'MIRROR': 'default'},
 }
+DATABASE_ROUTERS = ['apps.blog.replica.EnrutadorReplica']
+# Segundos que un usuario lee del primario después de escribir: tiene que
+# cubrir el retraso de la réplica (el intervalo de sincronizar_replica)
+REPLICA_VENTANA = 60
+# Atraso máximo que aceptan los demás lectores: con una copia más vieja todos
+# leen del primario (más que el intervalo de sincronizar_replica)
+REPLICA_RETRASO_MAXIMO = 120
+
+
+# Caché
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Compartida por todos los workers: las versiones que invalidan las señales,
+# los candados de reconstrucción, la caché de páginas y la marca de la última
+# escritura de la réplica tienen que verse desde cualquier proceso. Con
+# REDIS_URL se usa Redis (requiere el paquete redis); si no, archivos en
+# CACHE_DIR, que comparten los procesos de la misma máquina.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / 'cache'),
+            # Con el valor por defecto (300) la caché de páginas se desalojaría sola
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
 
 
 # Password validation
@@ -125,10 +201,33 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# "python manage.py construir_estaticos" deja en STATIC_ROOT el CSS y el JS
+# minificados, con el hash en el nombre y comprimidos (ver apps/blog/estaticos.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'apps.blog.estaticos.AlmacenEstaticos'},
+}
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Procesos que generan las miniaturas de las imágenes subidas (ver apps/blog/derivados.py)
+MINIATURAS_PROCESOS = 2
+
+# Archivo compartido por los workers con los límites de escritura (ver apps/blog/limites.py).
+# Por defecto va en el directorio temporal del sistema.
+LIMITES_ARCHIVO = os.environ.get('LIMITES_ARCHIVO')
+# Proxies inversos delante de Django (en producción, uno): la IP del cliente
+# para los límites sale de X-Forwarded-For y no de REMOTE_ADDR
+PROXIES_CONFIABLES = int(os.environ.get('PROXIES_CONFIABLES', 1 if PRODUCCION else 0))
+
+# Sitemaps precalculados por "python manage.py generate_sitemaps" (ver apps/blog/sitemaps.py)
+SITEMAPS_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+
+# Esquema y dominio públicos, para las URLs absolutas que se generan fuera de un request
+SITIO_URL = os.environ.get('SITIO_URL', 'https://loveyfacundo.pythonanywhere.com')
+
 # Static files (CSS, JavaScript, Images) - Para producción
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
@@ -139,6 +238,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 # Authentication Settings
+# El usuario de la sesión se carga junto con su perfil (una sola consulta)
+# y con el rol ya resuelto en user.rol
+AUTHENTICATION_BACKENDS = [
+    'apps.blog.autenticacion.BackendConPerfil',
+    # Las sesiones iniciadas antes de BackendConPerfil guardan este backend:
+    # sin él en la lista Django las descarta y desloguea a todos
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Redirección después del Login (usa el 'name' de la url de inicio)
 LOGIN_REDIRECT_URL = 'index'
 